@@ -1,26 +1,429 @@
+import argparse
+import os
+import socket
+import time
+import xml.etree.ElementTree as ET
+from functools import partial
+
+import pandas as pd
+import requests
 from dotenv import load_dotenv
-from edgar import Company
 from edgar.reference.tickers import get_company_tickers
 
-from stock_lab.old import QuarterlyData
+from stock_lab.cache import open_result_cache
+from stock_lab.consistency import check_store
+from stock_lab.crawl import load_fact_store, process_company
+from stock_lab.dedup import dedup_store
+from stock_lab.fetch import open_instance_parser
+from stock_lab.fiscal import FiscalCalendar
+from stock_lab.feed import (
+    FilingWatcher, ProcessedLedger, fetch_current_feed, latest_filed, store_filing,
+    store_filing_facts
+)
+from stock_lab.full_index import AccessionCatalog, build_catalog, catalog_filing
+from stock_lab.prefetch import prefetch_dir, prefetch_tickers
+from stock_lab.quarantine import QuarantineLedger, open_quarantine
+from stock_lab.scheduler import schedule_companies, stored_at
+from stock_lab.serve import serve
+from stock_lab.tag_stats import TagStats, open_tag_stats
+from stock_lab.telemetry import CrawlTelemetry
+from stock_lab.tensor import export_tensor
+from stock_lab.throttle import ThrottledError
+from stock_lab.universe import publish_universe
+from stock_lab.workers import GovernedPool
+from stock_lab.workqueue import SQLiteWorkQueue, accession_tasks, company_tasks, run_worker
 
 load_dotenv()
 
-sec_companies = get_company_tickers()
+MB = 1024 * 1024
+
+
+def _process_item(item, out_dir, cache_dir=None, quarantine_path=None, store_dir=None,
+                  tag_stats_path=None):
+    """
+    Pool task: process_company for one (cik, filings) item.
+    Returns (process_company result, telemetry export) so the parent can
+    merge the worker's timings, filing counts, cache hits and requests.
+    """
+    cik, filings = item
+    cache = open_result_cache(cache_dir) if cache_dir else None
+    quarantine = open_quarantine(quarantine_path) if quarantine_path else None
+    parse = open_instance_parser(store_dir) if store_dir else None
+    tag_stats = open_tag_stats(tag_stats_path) if tag_stats_path else None
+    telemetry = CrawlTelemetry(progress=False)
+    telemetry.attach()
+    try:
+        result = process_company(cik, out_dir, telemetry, filings=filings, cache=cache,
+                                 quarantine=quarantine, parse=parse, tag_stats=tag_stats)
+    finally:
+        telemetry.detach()
+    return result, telemetry.export()
+
+def read_watchlist(path, sec_companies=None):
+    """
+    CIKs from a file of one CIK or ticker per line (# starts a comment).
+    """
+    entries = [line.split("#")[0].strip() for line in open(path)]
+    entries = [e for e in entries if e]
+    ciks = {int(e) for e in entries if e.isdigit()}
+    tickers = {e.upper() for e in entries if not e.isdigit()}
+    if tickers:
+        sec_companies = get_company_tickers() if sec_companies is None else sec_companies
+        matched = sec_companies.loc[sec_companies["ticker"].str.upper().isin(tickers), "cik"]
+        ciks.update(int(cik) for cik in matched)
+    return ciks
+
+def crawl_order(out_dir, accessions=None, watchlist_path=None, feed=fetch_current_feed):
+    """
+    CIKs in PriorityScheduler order: watchlist, companies with a filing
+    newer than their stored facts, then stale and the rest, sharing the
+    request budget by class weight.
+    Without accessions, filing dates come from the latest-filings feed
+    (latest_filed), so only the newest filings mark a company as recent;
+    if the feed cannot be read, no company is.
+    The order is fixed up front from estimated request costs; it does not
+    adapt to the requests companies actually take.
+    """
+    if accessions is not None:
+        companies = accessions.df.groupby("cik", observed=True).agg(
+            last_filed=("date_filed", "max"), filings=("accession_no", "size"))
+        companies = companies.reset_index()
+        sec_companies = None
+    else:
+        sec_companies = get_company_tickers()
+        companies = pd.DataFrame({"cik": sec_companies["cik"].drop_duplicates()})
+        try:
+            companies["last_filed"] = companies["cik"].map(latest_filed(fetch=feed))
+        except (requests.RequestException, ThrottledError, ET.ParseError) as e:
+            print(f"Latest filings feed unavailable, no recent class: {e!r}")
+    companies["last_stored"] = companies["cik"].map(stored_at(out_dir))
+    watchlist = read_watchlist(watchlist_path, sec_companies) if watchlist_path else ()
+    return [cik for cik, _ in schedule_companies(companies, watchlist)]
 
-#TODO: Add tqdm for progress bar
-for index, row in sec_companies.iterrows():
-    cik = row['cik']
-    ticker = row['ticker']
-    company_name = row['company']
+def crawl(out_dir, workers=None, max_tasks=100, max_rss_mb=None, task_rss_mb=None,
+          metrics_path=None, catalog_path=None, cache_dir=None, quarantine_path=None,
+          store_dir=None, watchlist_path=None, tag_stats_path=None):
+    """
+    Walk the whole ticker list, in this process or in a GovernedPool
+    of memory-limited workers when workers is given.
+    With catalog_path, companies and their filings come from a saved
+    AccessionCatalog instead of one get_filings request per company.
+    Progress is shown live and metrics are written to metrics_path
+    (default out_dir/metrics.json); workers send theirs back with each
+    company's result (companies that fail contribute none).
+    With cache_dir, extraction results are memoized across runs, and with
+    quarantine_path, filings that failed validation are not retried.
+    With store_dir, only each filing's XBRL instance is downloaded, into
+    a FilingStore that also logs the bytes saved.
+    Companies are processed in crawl_order, watchlist_path first. A company
+    whose crawl raises (HTTP errors, throttling, missing instances) is
+    reported and skipped, so a rerun picks it up.
+    With tag_stats_path, the tag each filer matched is recorded for the
+    tags coverage summary.
+    """
+    accessions = AccessionCatalog.load(catalog_path) if catalog_path else None
+    ciks = crawl_order(out_dir, accessions, watchlist_path)
+    metrics_path = metrics_path or os.path.join(out_dir, "metrics.json")
 
-    company = Company(cik)
-    quarterly_filings = company.get_filings(form=['10-K', '10-Q'])
+    def company_filings(cik):
+        if accessions is None:
+            return None
+        return list(AccessionCatalog(accessions.for_cik(cik)).filings())
 
-    # TODO: Split by 10-Q vs 10-K
-    for quarter in quarterly_filings:
-        quarter_data = QuarterlyData(
-            accession_number=quarter
+    with CrawlTelemetry(total=len(ciks), metrics_path=metrics_path) as telemetry:
+        if not workers:
+            cache = open_result_cache(cache_dir) if cache_dir else None
+            quarantine = open_quarantine(quarantine_path) if quarantine_path else None
+            parse = open_instance_parser(store_dir) if store_dir else None
+            tag_stats = open_tag_stats(tag_stats_path) if tag_stats_path else None
+            for i, cik in enumerate(ciks):
+                telemetry.set_queue_depth("companies", len(ciks) - i)
+                try:
+                    process_company(cik, out_dir, telemetry, company_filings(cik),
+                                    cache, quarantine, parse, tag_stats)
+                except Exception as error:
+                    telemetry.bar.write(f"CIK {cik} failed: {error!r}")
+                telemetry.advance()
+            return
+        pool = GovernedPool(
+            partial(_process_item, out_dir=out_dir, cache_dir=cache_dir,
+                    quarantine_path=quarantine_path, store_dir=store_dir,
+                    tag_stats_path=tag_stats_path),
+            workers=workers,
+            max_tasks=max_tasks,
+            recycle_rss=max_rss_mb and max_rss_mb * MB,
+            task_rss_limit=task_rss_mb and task_rss_mb * MB,
         )
+        items = ((cik, company_filings(cik)) for cik in ciks)
+        for (cik, _), result, error in pool.imap_unordered(items):
+            if error is not None:
+                telemetry.bar.write(f"CIK {cik} failed: {error!r}")
+            else:
+                telemetry.merge(result[1])
+            telemetry.advance()
+            telemetry.set_queue_depth("companies", len(ciks) - telemetry.done)
+
+def catalog(catalog_path, start, end=None):
+    """
+    Enumerate every 10-K/10-Q and their amendments from the quarterly
+    full-index files.
+    """
+    accessions = build_catalog(start, end)
+    accessions.save(catalog_path)
+    print(f"Catalogued {len(accessions)} filings to {catalog_path}")
+
+def watch(out_dir, ledger_path, interval):
+    """
+    Poll the latest-filings feed and extract new 10-K/10-Qs as they arrive.
+    """
+    ledger = ProcessedLedger(ledger_path)
+    watcher = FilingWatcher(ledger, store_filing_facts(out_dir))
+    while True:
+        for entry, latency, error in watcher.poll_once():
+            if error is not None:
+                print(f"{entry.accession_no} failed: {error!r}")
+            else:
+                print(f"{entry.accession_no} {entry.form} {entry.company} "
+                      f"stored {latency:.0f}s after acceptance")
+        time.sleep(interval)
+
+def quarantined(quarantine_path, show_all=False):
+    """
+    Print quarantined filings grouped by failing fact type and error.
+    """
+    with QuarantineLedger(quarantine_path) as quarantine:
+        print(quarantine.summary().to_string(index=False))
+        if show_all:
+            print(quarantine.listing().to_string(index=False))
+
+def check(out_dir, flags_path=None):
+    """
+    Run the cross-fact consistency rules over every stored filing.
+    """
+    flags = check_store(out_dir)
+    print(flags["rule"].value_counts().to_string() if len(flags) else "No flags")
+    if flags_path:
+        flags.to_parquet(flags_path)
+        print(f"Wrote {len(flags)} flags to {flags_path}")
+
+def dedup(out_dir, dedup_path, superseded_path=None):
+    """
+    Keep the latest accepted copy of every stored fact reported by several filings.
+    """
+    kept, superseded = dedup_store(out_dir)
+    kept.to_parquet(dedup_path)
+    print(f"Kept {len(kept)} facts, superseded {len(superseded)} "
+          f"({superseded['restated'].sum()} restated)")
+    if superseded_path:
+        superseded.to_parquet(superseded_path)
+        print(f"Wrote superseded facts to {superseded_path}")
+
+def tags(tag_stats_path):
+    """
+    Print how often each configured tag matched across the crawled universe.
+    """
+    with TagStats(tag_stats_path) as tag_stats:
+        print(tag_stats.coverage().to_string(index=False))
+
+def publish(out_dir, universe_dir, keep):
+    """
+    Publish the stored facts as memory-mapped arrays for analysis workers.
+    """
+    facts = load_fact_store(out_dir)
+    version = publish_universe(facts, universe_dir, keep)
+    print(f"Published {len(facts)} facts to {universe_dir} as version {version}")
+
+def tensor(out_dir, tensor_dir):
+    """
+    Export stored facts as a dense company x quarter x fact_type tensor.
+    """
+    shape = export_tensor(out_dir, tensor_dir)
+    print(f"Wrote {shape} tensor to {tensor_dir}")
+
+def prefetch(store_dir, tickers=None, n=8, load_dir=None, fetch_workers=8,
+             parse_workers=None):
+    """
+    Download and pre-parse filings into a store so later extraction starts hot.
+    """
+    if load_dir:
+        summary = prefetch_dir(load_dir, store_dir, fetch_workers=fetch_workers,
+                               parse_workers=parse_workers)
+    else:
+        summary = prefetch_tickers(tickers, n, store_dir, fetch_workers=fetch_workers,
+                                   parse_workers=parse_workers)
+    failures = summary.pop("failures")
+    print(", ".join(f"{count} {name}" for name, count in summary.items()))
+    for accession, e in failures:
+        print(f"{accession}: {e!r}")
+
+def fiscal_calendar(out_dir, calendar_path):
+    """
+    Infer each stored company's fiscal year end and save the calendar index.
+    """
+    calendar = FiscalCalendar.from_facts(load_fact_store(out_dir))
+    calendar.to_parquet(calendar_path)
+    months = calendar.index["fiscal_year_end_month"]
+    print(f"{len(months)} companies, {(months != 12).sum()} with non-December year ends")
+
+def serve_facts(out_dir, host, port, cache_entries):
+    """
+    Serve stored facts over a local read-only HTTP API.
+    """
+    print(f"Serving {out_dir} on http://{host}:{port}")
+    serve(out_dir, host, port, cache_entries)
+
+def enqueue(queue_path, catalog_path=None):
+    """
+    Split the ticker list into one leased task per CIK, or a saved
+    catalog into one task per filing.
+    """
+    queue = SQLiteWorkQueue(queue_path)
+    if catalog_path:
+        tasks = accession_tasks(AccessionCatalog.load(catalog_path).df)
+    else:
+        tasks = company_tasks(get_company_tickers())
+    added = queue.enqueue(tasks)
+    print(f"Enqueued {added} tasks: {queue.counts()}")
+
+def run_task(payload, out_dir):
+    """
+    Queue task handler: a filing task (accession_tasks) stores that
+    filing's facts like the feed does, a company task runs process_company.
+    """
+    if "accession_no" in payload:
+        filing = catalog_filing(payload["cik"], payload["company"], payload["form"],
+                                payload["date_filed"], payload["accession_no"])
+        store_filing(filing, out_dir)
+    else:
+        process_company(payload["cik"], out_dir)
+
+def work(queue_path, out_dir, lease_seconds):
+    """
+    Pull company or filing tasks from the queue until it is drained.
+    """
+    queue = SQLiteWorkQueue(queue_path, lease_seconds=lease_seconds)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    done = run_worker(queue, partial(run_task, out_dir=out_dir), worker_id)
+    print(f"{worker_id} completed {done} tasks: {queue.counts()}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Crawl SEC quarterly filings.")
+    parser.add_argument("--out", default="facts", help="Directory for extracted facts.")
+    commands = parser.add_subparsers(dest="command")
+    crawl_parser = commands.add_parser(
+        "crawl", help="Crawl every company (default). Companies with new filings go "
+                      "first; without --catalog only those in the latest-filings feed "
+                      "are seen as new.")
+    crawl_parser.add_argument("--workers", type=int,
+                              help="Extract in this many memory-governed processes.")
+    crawl_parser.add_argument("--max-tasks", type=int, default=100,
+                              help="Recycle a worker after this many companies.")
+    crawl_parser.add_argument("--max-rss-mb", type=int,
+                              help="Recycle a worker whose RSS ends a task above this.")
+    crawl_parser.add_argument("--task-rss-mb", type=int,
+                              help="Kill a task whose worker RSS passes this.")
+    crawl_parser.add_argument("--metrics", help="Metrics JSON path.")
+    crawl_parser.add_argument("--catalog", help="Crawl filings from a saved catalog.")
+    crawl_parser.add_argument("--cache", help="Directory of memoized extraction results.")
+    crawl_parser.add_argument("--quarantine", help="SQLite ledger of failed filings to skip.")
+    crawl_parser.add_argument("--watchlist",
+                              help="File of CIKs/tickers to refresh first.")
+    crawl_parser.add_argument("--store",
+                              help="Fetch only XBRL instances into this FilingStore.")
+    crawl_parser.add_argument("--tag-stats",
+                              help="SQLite record of matched tags per filer.")
+    catalog_parser = commands.add_parser(
+        "catalog", help="Build a 10-K/10-Q catalog from EDGAR full-index files.")
+    catalog_parser.add_argument("--path", required=True, help="Catalog parquet path.")
+    catalog_parser.add_argument("--start", required=True, help="First filing date.")
+    catalog_parser.add_argument("--end", help="Last filing date (default today).")
+    watch_parser = commands.add_parser("watch", help="Extract new filings as accepted.")
+    watch_parser.add_argument("--ledger", default="processed.sqlite")
+    watch_parser.add_argument("--interval", type=float, default=60)
+    quarantine_parser = commands.add_parser(
+        "quarantine", help="List filings quarantined after failed extraction.")
+    quarantine_parser.add_argument("--path", required=True, help="Quarantine ledger path.")
+    quarantine_parser.add_argument("--all", action="store_true",
+                                   help="Also list every quarantined filing.")
+    check_parser = commands.add_parser(
+        "check", help="Flag stored filings whose facts contradict each other.")
+    check_parser.add_argument("--flags", help="Write the flag table to this parquet path.")
+    dedup_parser = commands.add_parser(
+        "dedup", help="Collapse facts restated across filings to the latest.")
+    dedup_parser.add_argument("--path", required=True, help="Deduplicated facts path.")
+    dedup_parser.add_argument("--superseded", help="Write superseded facts to this path.")
+    tags_parser = commands.add_parser(
+        "tags", help="Summarize which tags matched across the universe.")
+    tags_parser.add_argument("--path", required=True, help="Tag stats path.")
+    publish_parser = commands.add_parser(
+        "publish", help="Publish stored facts as shared memory-mapped arrays.")
+    publish_parser.add_argument("--universe", required=True,
+                                help="Universe directory (e.g. under /dev/shm).")
+    publish_parser.add_argument("--keep", type=int, default=2,
+                                help="Published versions to keep.")
+    tensor_parser = commands.add_parser(
+        "tensor", help="Export a company x quarter x fact_type tensor.")
+    tensor_parser.add_argument("--path", required=True, help="Output directory.")
+    prefetch_parser = commands.add_parser(
+        "prefetch", help="Download and pre-parse filings into a store.")
+    prefetch_parser.add_argument("--store", required=True, help="Filing store directory.")
+    prefetch_source = prefetch_parser.add_mutually_exclusive_group(required=True)
+    prefetch_source.add_argument("--tickers", nargs="+")
+    prefetch_source.add_argument("--dir", help="Directory of saved filing .pkl files.")
+    prefetch_parser.add_argument("-n", type=int, default=8,
+                                 help="Latest quarterly filings per ticker.")
+    prefetch_parser.add_argument("--fetch-workers", type=int, default=8)
+    prefetch_parser.add_argument("--parse-workers", type=int)
+    calendar_parser = commands.add_parser(
+        "calendar", help="Save each company's fiscal year end for alignment.")
+    calendar_parser.add_argument("--path", required=True, help="Calendar index path.")
+    serve_parser = commands.add_parser(
+        "serve", help="Serve stored facts over a local HTTP API.")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8080)
+    serve_parser.add_argument("--cache-entries", type=int, default=1024,
+                              help="Responses kept in the hot-set cache.")
+    enqueue_parser = commands.add_parser("enqueue", help="Fill a work queue.")
+    enqueue_parser.add_argument("--queue", required=True)
+    enqueue_parser.add_argument("--catalog",
+                                help="Enqueue one task per filing of a saved catalog.")
+    work_parser = commands.add_parser("work", help="Run a queue worker.")
+    work_parser.add_argument("--queue", required=True)
+    work_parser.add_argument("--lease-seconds", type=float, default=300)
+    return parser.parse_args()
 
-    print("break")
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command == "enqueue":
+        enqueue(args.queue, args.catalog)
+    elif args.command == "work":
+        work(args.queue, args.out, args.lease_seconds)
+    elif args.command == "crawl":
+        crawl(args.out, args.workers, args.max_tasks, args.max_rss_mb,
+              args.task_rss_mb, args.metrics, args.catalog, args.cache, args.quarantine,
+              args.store, args.watchlist, args.tag_stats)
+    elif args.command == "watch":
+        watch(args.out, args.ledger, args.interval)
+    elif args.command == "catalog":
+        catalog(args.path, args.start, args.end)
+    elif args.command == "quarantine":
+        quarantined(args.path, args.all)
+    elif args.command == "check":
+        check(args.out, args.flags)
+    elif args.command == "dedup":
+        dedup(args.out, args.path, args.superseded)
+    elif args.command == "tags":
+        tags(args.path)
+    elif args.command == "publish":
+        publish(args.out, args.universe, args.keep)
+    elif args.command == "tensor":
+        tensor(args.out, args.path)
+    elif args.command == "prefetch":
+        prefetch(args.store, args.tickers, args.n, args.dir, args.fetch_workers,
+                 args.parse_workers)
+    elif args.command == "calendar":
+        fiscal_calendar(args.out, args.path)
+    elif args.command == "serve":
+        serve_facts(args.out, args.host, args.port, args.cache_entries)
+    else:
+        crawl(args.out)
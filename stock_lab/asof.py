@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+
+from stock_lab.dedup import DIMENSION_PREFIX, dedup_key_columns
+
+# Group codes are packed above the knowledge time (seconds since epoch,
+# 34 bits reach past year 2500) so one sorted int64 key covers both.
+_SHIFT = 34
+
+
+def _utc_naive(values):
+    """
+    datetime-like values as tz-naive UTC datetime64[ns];
+    naive input is taken to be UTC already.
+    """
+    values = pd.to_datetime(values, utc=True)
+    if isinstance(values, pd.Series):
+        return values.dt.tz_localize(None).astype("datetime64[ns]")
+    return values.tz_localize(None).astype("datetime64[ns]")
+
+def _seconds(values):
+    return np.asarray(values, dtype="datetime64[s]").astype(np.int64)
+
+class AsOfIndex():
+    """
+    Point-in-time index over extracted facts for backtests.
+
+    Facts are keyed by (cik, fact_type, knowledge time), where knowledge
+    time is the filing's acceptance time plus an optional lag. Every row is
+    kept as a version of its series, the dedup key (period start, end or
+    instant, dimensions), so restatements in later filings and amendments
+    never overwrite what was known earlier and segment or year-to-date
+    rows never pass for versions of the quarter's total.
+
+    "Latest value" only considers undimensioned rows, and of those the
+    shortest duration reported for each period end, as tensor cells do:
+    the quarter rather than the year-to-date figure of a 10-Q. A 10-K's
+    period only has its annual figure, which then is the latest value.
+
+    as_of answers "latest period value known at date D" for a whole
+    universe x date grid with one vectorized binary search. A date D means
+    the instant D (midnight for plain dates), so a filing accepted during
+    day D only becomes visible from D + 1 unless a later time is given.
+    Rows without an acceptance time are dropped: placing them in time
+    would risk leaking future data.
+    """
+
+    def __init__(self, facts, known_at="acceptance_datetime", lag=None):
+        period = facts["period_end"]
+        if "period_instant" in facts.columns:
+            period = period.fillna(facts["period_instant"])
+        start = facts["period_start"] if "period_start" in facts.columns else pd.NaT
+        dims = [c for c in facts.columns if c.startswith(DIMENSION_PREFIX)]
+        dimensioned = facts[dims].notna().any(axis=1).to_numpy()
+        if "is_dimensioned" in facts.columns:
+            dimensioned |= facts["is_dimensioned"].fillna(False).to_numpy(bool)
+        df = pd.DataFrame({
+            "cik": facts["cik"].astype("int64").to_numpy(),
+            "fact_type": facts["fact_type"].to_numpy(),
+            "period_start": _utc_naive(pd.Series(start, index=facts.index)).to_numpy(),
+            "period": _utc_naive(period).to_numpy(),
+            "known_at": _utc_naive(facts[known_at]).to_numpy(),
+            "value": facts["value"].to_numpy(),
+            "accession_no": facts["accession_no"].to_numpy(),
+            "is_dimensioned": dimensioned,
+            "series": pd.util.hash_pandas_object(
+                facts[dedup_key_columns(facts)], index=False).to_numpy(),
+        })
+        for column in dims:
+            df[column] = facts[column].to_numpy()
+        if lag is not None:
+            df["known_at"] += pd.Timedelta(lag)
+        df = df.dropna(subset=["known_at", "period"])
+        df = df.sort_values(["cik", "fact_type", "known_at", "period"],
+                            ignore_index=True, kind="stable")
+        df["version"] = df.groupby("series").cumcount()
+        self.versions = df
+
+        # One series per (cik, fact_type, period) competes for "latest
+        # value": the undimensioned total of the shortest duration.
+        days = (df["period"] - df["period_start"]).dt.days.fillna(0)
+        shortest = days.where(~df["is_dimensioned"]).groupby(
+            [df["cik"], df["fact_type"], df["period"]]).transform("min")
+        df = df.loc[~df["is_dimensioned"] & (days == shortest)].reset_index(drop=True)
+
+        groups = df[["cik", "fact_type"]].drop_duplicates(ignore_index=True)
+        self.groups = groups
+        self._group_codes = pd.MultiIndex.from_frame(groups)
+        codes = self._group_codes.get_indexer(pd.MultiIndex.from_frame(df[["cik", "fact_type"]]))
+
+        # Only rows that advance (or match) the latest known period are
+        # candidates for "latest value": an amendment of an old period
+        # accepted after a newer filing must not replace the newer period.
+        period_ns = df["period"].to_numpy().astype(np.int64)
+        running_max = pd.Series(period_ns).groupby(codes).cummax().to_numpy()
+        frontier = period_ns >= running_max
+        self.frontier = df.loc[frontier].reset_index(drop=True)
+        self._frontier_keys = (
+            (codes[frontier].astype(np.int64) << _SHIFT)
+            | _seconds(self.frontier["known_at"])
+        )
+
+    def _lookup(self, codes, dates):
+        """
+        Frontier row index of the latest fact known at each date for each
+        group code (-1 where nothing was known yet). codes and dates are
+        broadcast-compatible arrays.
+        """
+        query = (codes.astype(np.int64) << _SHIFT) | _seconds(dates)
+        pos = np.searchsorted(self._frontier_keys, query, side="right") - 1
+        found = pos >= 0
+        same_group = np.zeros(query.shape, dtype=bool)
+        same_group[found] = (self._frontier_keys[pos[found]] >> _SHIFT) == (query[found] >> _SHIFT)
+        return np.where(same_group, pos, -1)
+
+    def _select_groups(self, ciks=None, fact_types=None):
+        groups = self.groups
+        mask = np.ones(len(groups), dtype=bool)
+        if ciks is not None:
+            mask &= groups["cik"].isin(ciks).to_numpy()
+        if fact_types is not None:
+            mask &= groups["fact_type"].isin(fact_types).to_numpy()
+        return np.flatnonzero(mask)
+
+    def as_of(self, dates, ciks=None, fact_types=None):
+        """
+        Long frame of the latest known value for every (date, cik, fact_type).
+        Columns: date, cik, fact_type, period, known_at, value, accession_no;
+        value and period are null where nothing was known at that date.
+        """
+        dates = _utc_naive(pd.DatetimeIndex(dates)).to_numpy()
+        codes = self._select_groups(ciks, fact_types)
+        grid_codes = np.repeat(codes, len(dates))
+        grid_dates = np.tile(dates, len(codes))
+        rows = self._lookup(grid_codes, grid_dates)
+        # Row -1 is absent from the frontier's RangeIndex, so misses become nulls.
+        picked = self.frontier.reindex(rows)
+        return pd.DataFrame({
+            "date": grid_dates,
+            "cik": self.groups["cik"].to_numpy()[grid_codes],
+            "fact_type": self.groups["fact_type"].to_numpy()[grid_codes],
+            "period": picked["period"].to_numpy(),
+            "known_at": picked["known_at"].to_numpy(),
+            "value": picked["value"].to_numpy(),
+            "accession_no": picked["accession_no"].to_numpy(),
+        })
+
+    def panel(self, dates, fact_type, ciks=None):
+        """
+        Wide (date x cik) frame of latest known values for one fact_type.
+        """
+        dates = _utc_naive(pd.DatetimeIndex(dates))
+        codes = self._select_groups(ciks, [fact_type])
+        rows = self._lookup(codes[np.newaxis, :], dates.to_numpy()[:, np.newaxis])
+        hit = rows >= 0
+        grid = np.full(rows.shape, np.nan)
+        grid[hit] = self.frontier["value"].to_numpy(dtype=float)[rows[hit]]
+        return pd.DataFrame(
+            grid, index=dates, columns=self.groups["cik"].to_numpy()[codes])
+
+    def history_as_of(self, date, ciks=None, fact_types=None):
+        """
+        Every series as it was known at date: the latest version accepted
+        by then, so later restatements are invisible.
+        """
+        date = _utc_naive(pd.DatetimeIndex([date]))[0]
+        df = self.versions.loc[self.versions["known_at"] <= date]
+        if ciks is not None:
+            df = df.loc[df["cik"].isin(ciks)]
+        if fact_types is not None:
+            df = df.loc[df["fact_type"].isin(fact_types)]
+        return df.drop_duplicates("series", keep="last").reset_index(drop=True)
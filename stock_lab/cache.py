@@ -0,0 +1,114 @@
+import functools
+import pickle
+from collections import OrderedDict
+
+from stock_lab.facts import FilingFacts, concat_facts
+from stock_lab.store import FilingStore, DocumentNotFound
+
+ROWS_KIND_PREFIX = "rows"
+
+
+def rows_kind(fact_type, schema_hash):
+    """FilingStore kind holding one fact type's rows under one schema hash."""
+    return f"{ROWS_KIND_PREFIX}/{fact_type}/{schema_hash}"
+
+class ResultCache():
+    """
+    Memoized FilingFacts results, one entry per (accession, fact type).
+
+    Entries are keyed by the accession number plus the fact type's
+    fact_type_hash, which covers its tags, validators (by source) and
+    VALIDATOR_VERSION.
+    Editing one fact type's tag list therefore only misses that fact type;
+    every other fact type of every filing is still served from cache.
+
+    A bounded in-memory LRU sits over a FilingStore on disk, so results
+    survive across runs and identical frames are stored once.
+    Failures (MissingFact/InvalidFact) are not cached.
+    """
+
+    def __init__(self, root, max_entries=4096, facts_class=FilingFacts):
+        self.store = FilingStore(root)
+        self.max_entries = max_entries
+        self.facts_class = facts_class
+        self.hashes = facts_class.schema_hashes()
+        self.memory = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def close(self):
+        self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _key(self, accession, fact_type):
+        return (accession, rows_kind(fact_type, self.hashes[fact_type]))
+
+    def _remember(self, key, rows_df):
+        self.memory[key] = rows_df
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, accession, fact_type):
+        """
+        Cached rows for one fact type of a filing, or None.
+        The frame is shared with the cache and must not be modified.
+        """
+        key = self._key(accession, fact_type)
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.memory_hits += 1
+            return self.memory[key]
+        try:
+            rows_df = pickle.loads(self.store.get(*key))
+        except DocumentNotFound:
+            return None
+        self.disk_hits += 1
+        self._remember(key, rows_df)
+        return rows_df
+
+    def put(self, accession, fact_type, rows_df):
+        key = self._key(accession, fact_type)
+        self.store.put(*key, pickle.dumps(rows_df))
+        self._remember(key, rows_df)
+
+    def get_rows(self, accession, load_facts):
+        """
+        Same result as facts_class(load_facts()).get_rows(), computing only
+        the fact types that are not cached yet. load_facts is only called
+        (once) when at least one fact type misses.
+        """
+        facts = None
+        frames = []
+        for fact_type in self.facts_class.gaap_tags:
+            rows_df = self.get(accession, fact_type)
+            if rows_df is None:
+                self.misses += 1
+                if facts is None:
+                    facts = self.facts_class(load_facts())
+                rows_df = facts.get_fact_type_rows(fact_type)
+                self.put(accession, fact_type, rows_df)
+            frames.append(rows_df)
+        return concat_facts(frames)
+
+    def stats(self):
+        return {
+            "memory_entries": len(self.memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+@functools.lru_cache(maxsize=None)
+def open_result_cache(root):
+    """
+    One ResultCache per process and root, for pool workers that cannot
+    share a SQLite connection with their parent.
+    """
+    return ResultCache(root)
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+from stock_lab.crawl import FILING_COLUMNS, load_fact_store
+
+PERIOD_COLUMNS = ["period_start", "period_end"]
+FLAG_COLUMNS = FILING_COLUMNS + PERIOD_COLUMNS + ["rule", "observed", "expected"]
+# Relative gap allowed between eps * diluted_shares and net_income, for
+# income attributable to other holders and share count rounding.
+EPS_RELATIVE_TOLERANCE = 0.05
+
+
+def gross_profit_exceeds_revenue(wide, tolerance=0.0):
+    """Gross profit can be at most revenue."""
+    observed, expected = wide["gross_profit"], wide["revenue"]
+    return observed, expected, observed > expected * (1 + tolerance)
+
+def operating_income_exceeds_gross_profit(wide, tolerance=0.0):
+    """Operating income is gross profit less non-negative operating expenses."""
+    observed, expected = wide["operating_income"], wide["gross_profit"]
+    return observed, expected, observed > expected + np.abs(expected) * tolerance
+
+def operating_income_exceeds_revenue(wide, tolerance=0.0):
+    """Operating income can be at most revenue."""
+    observed, expected = wide["operating_income"], wide["revenue"]
+    return observed, expected, observed > expected * (1 + tolerance)
+
+def eps_mismatches_net_income(wide, tolerance=EPS_RELATIVE_TOLERANCE):
+    """
+    eps * diluted_shares should be net income, within tolerance of it
+    plus half a cent per share of eps rounding.
+    """
+    observed = wide["eps"] * wide["diluted_shares"]
+    expected = wide["net_income"]
+    allowed = np.abs(expected) * tolerance + 0.005 * wide["diluted_shares"]
+    return observed, expected, np.abs(observed - expected) > allowed
+
+# rule name: (fact types it reads, check). A check takes the wide frame of
+# one column per fact type and returns (observed, expected, flagged).
+CONSISTENCY_RULES = {
+    "gross_profit_le_revenue": (
+        ("gross_profit", "revenue"), gross_profit_exceeds_revenue),
+    "operating_income_le_gross_profit": (
+        ("operating_income", "gross_profit"), operating_income_exceeds_gross_profit),
+    "operating_income_le_revenue": (
+        ("operating_income", "revenue"), operating_income_exceeds_revenue),
+    "eps_x_shares_eq_net_income": (
+        ("eps", "diluted_shares", "net_income"), eps_mismatches_net_income),
+}
+
+def wide_facts(facts_df):
+    """
+    One row per (accession_no, period_start, period_end) of duration facts
+    and one column per fact type, so rules only compare facts covering the
+    same period (a 10-Q's quarter and year-to-date figures stay apart).
+    Where a fact type has several rows for a period the undimensioned
+    (consolidated) one is used.
+    """
+    df = facts_df.loc[facts_df["period_type"] == "duration"]
+    if "is_dimensioned" in df.columns:
+        df = df.sort_values("is_dimensioned", kind="stable")
+    keys = ["accession_no"] + PERIOD_COLUMNS
+    df = df.drop_duplicates(keys + ["fact_type"])
+    wide = df.pivot(index=keys, columns="fact_type", values="value")
+    wide.columns.name = None
+    return wide.astype("float64")
+
+def check_consistency(facts_df, rules=None, tolerances=None):
+    """
+    Evaluate cross-fact rules over every filing in facts_df (rows shaped
+    like load_fact_store) at once.
+    tolerances: optional {rule name: tolerance} overriding each check's
+    default. Rules whose fact types are missing are not evaluated.
+    Returns the flag table: one FLAG_COLUMNS row per violated rule and
+    filing period, with the compared observed and expected values.
+    """
+    rules = CONSISTENCY_RULES if rules is None else rules
+    tolerances = tolerances or {}
+    if facts_df.empty:
+        return pd.DataFrame(columns=FLAG_COLUMNS)
+    wide = wide_facts(facts_df)
+    flags = []
+    for name, (fact_types, check) in rules.items():
+        if not set(fact_types) <= set(wide.columns):
+            continue
+        kwargs = {"tolerance": tolerances[name]} if name in tolerances else {}
+        observed, expected, flagged = check(wide, **kwargs)
+        flagged = flagged & wide[list(fact_types)].notna().all(axis=1)
+        if not flagged.any():
+            continue
+        flags.append(pd.DataFrame({
+            "rule": name,
+            "observed": observed[flagged],
+            "expected": expected[flagged],
+        }))
+    if not flags:
+        return pd.DataFrame(columns=FLAG_COLUMNS)
+    filings = facts_df[FILING_COLUMNS].drop_duplicates("accession_no")
+    flags_df = pd.concat(flags).reset_index()
+    flags_df = flags_df.merge(filings, on="accession_no", how="left")
+    return flags_df[FLAG_COLUMNS].sort_values(
+        ["cik", "accession_no", "period_end", "rule"], ignore_index=True)
+
+def check_store(facts_dir, **kwargs):
+    """check_consistency over every company file process_company wrote."""
+    return check_consistency(load_fact_store(facts_dir), **kwargs)
@@ -0,0 +1,152 @@
+from contextlib import nullcontext
+from pathlib import Path
+
+import pandas as pd
+from edgar import Company
+from edgar.xbrl.xbrl import XBRL
+
+from stock_lab.facts import FilingFacts, MissingFact, InvalidFact
+from stock_lab.throttle import route_edgar_requests
+from stock_lab.xbrl_instance import instance_document, parse_instance
+
+QUARTERLY_FORMS = ["10-K", "10-Q"]
+FILING_COLUMNS = ["cik", "accession_no", "form", "acceptance_datetime"]
+
+
+def with_amendments(forms, amendments=True):
+    """
+    forms plus their amended (/A) forms if amendments, the way edgartools'
+    get_filings(amendments=True) matches form types.
+    """
+    forms = list(forms)
+    return forms + [f"{form}/A" for form in forms] if amendments else forms
+
+def _stage(telemetry, name):
+    return telemetry.stage(name) if telemetry is not None else nullcontext()
+
+def company_quarterly_filings(cik):
+    """
+    All 10-K and 10-Q filings for a company.
+    """
+    route_edgar_requests()
+    return Company(cik).get_filings(form=QUARTERLY_FORMS)
+
+def xbrl_facts_df(filing):
+    """
+    Facts dataframe built through edgartools' full XBRL object model.
+    """
+    return XBRL.from_filing(filing).facts.to_dataframe()
+
+def filing_facts_df(filing):
+    """
+    Parse a filing's XBRL into the facts dataframe FilingFacts consumes.
+    The instance document is streamed for the configured concepts only;
+    filings without a separate instance fall back to xbrl_facts_df.
+    """
+    document = instance_document(filing)
+    if document is None:
+        return xbrl_facts_df(filing)
+    return parse_instance(document)
+
+def tag_filing_rows(rows_df, filing):
+    """
+    Prefix extracted rows with the identity of the filing they came from.
+    Filings without an acceptance time get NaT.
+    Returns a new dataframe; rows_df is left as is.
+    """
+    accepted = getattr(filing, "acceptance_datetime", None)
+    identity = {
+        "cik": int(filing.cik),
+        "accession_no": filing.accession_no,
+        "form": filing.form,
+        "acceptance_datetime": pd.Timestamp(accepted) if accepted else pd.NaT,
+    }
+    rows_df = rows_df.copy(deep=False)
+    for i, (column, value) in enumerate(identity.items()):
+        rows_df.insert(i, column, value)
+    return rows_df
+
+def extract_filing_facts(filing, telemetry=None, cache=None, parse=None, tag_stats=None):
+    """
+    Extract validated facts for one filing.
+    With a ResultCache, cached fact types are reused and the XBRL is only
+    parsed when some fact type is missing from the cache.
+    parse(filing) returns the facts dataframe (default filing_facts_df).
+    With a TagStats, the tag each fact type matched is recorded.
+    Returns the get_rows dataframe prefixed with FILING_COLUMNS.
+    """
+    parse = parse or filing_facts_df
+    route_edgar_requests()
+    if cache is not None:
+        parsed = []
+        def load_facts():
+            parsed.append(filing.accession_no)
+            with _stage(telemetry, "parse"):
+                return parse(filing)
+        with _stage(telemetry, "extract"):
+            rows_df = cache.get_rows(filing.accession_no, load_facts)
+        if telemetry is not None:
+            telemetry.record_cache(not parsed)
+    else:
+        with _stage(telemetry, "parse"):
+            facts_df = parse(filing)
+        with _stage(telemetry, "extract"):
+            rows_df = FilingFacts(facts_df).get_rows()
+    if tag_stats is not None:
+        tag_stats.record_rows(filing.cik, filing.accession_no, rows_df)
+    return tag_filing_rows(rows_df, filing)
+
+def process_company(cik, out_dir, telemetry=None, filings=None, cache=None,
+                    quarantine=None, parse=None, tag_stats=None):
+    """
+    Extract facts from every quarterly filing of a company and write them
+    to out_dir/<cik>.parquet. Filings that fail validation are skipped.
+    filings: the company's filings if already known (e.g. from an
+    AccessionCatalog); otherwise they are requested from EDGAR.
+    Stage latencies and filing counts go to telemetry when given, and
+    extraction results are memoized in cache (a ResultCache) when given.
+    With a QuarantineLedger, filings quarantined by earlier failures are
+    skipped and new failures are quarantined.
+    parse and tag_stats are passed on to extract_filing_facts, and fact
+    types no tag matched are recorded with tag_stats.
+    Returns (rows written, list of (accession_no, exception) failures).
+    """
+    frames = []
+    failures = []
+    if filings is None:
+        with _stage(telemetry, "fetch"):
+            filings = list(company_quarterly_filings(cik))
+    else:
+        filings = list(filings)
+    if quarantine is not None:
+        skip = quarantine.active(f.accession_no for f in filings)
+        filings = [f for f in filings if f.accession_no not in skip]
+    if telemetry is not None:
+        telemetry.set_queue_depth("filings", len(filings))
+    for i, filing in enumerate(filings):
+        try:
+            frames.append(extract_filing_facts(filing, telemetry, cache, parse, tag_stats))
+        except (MissingFact, InvalidFact) as e:
+            failures.append((filing.accession_no, e))
+            if quarantine is not None:
+                quarantine.record(filing.accession_no, cik, e)
+            fact_type = getattr(e, "fact_type", None)
+            if tag_stats is not None and isinstance(e, MissingFact) and fact_type:
+                tag_stats.record(cik, filing.accession_no, missing=[fact_type])
+        if telemetry is not None:
+            telemetry.record_filing()
+            telemetry.set_queue_depth("filings", len(filings) - i - 1)
+    if frames:
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        pd.concat(frames, ignore_index=True).to_parquet(out_dir/f"{cik}.parquet")
+    return sum(len(f) for f in frames), failures
+
+def load_fact_store(facts_dir):
+    """
+    Load every per-company parquet file written by process_company.
+    """
+    paths = sorted(Path(facts_dir).glob("*.parquet"))
+    if not paths:
+        return pd.DataFrame(columns=FILING_COLUMNS)
+    return pd.concat([pd.read_parquet(p) for p in paths], ignore_index=True)
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from stock_lab.crawl import load_fact_store
+from stock_lab.facts import with_columns
+
+DEDUP_KEY = ["cik", "fact_type", "period_start", "period_end", "period_instant"]
+DIMENSION_PREFIX = "dim_"
+
+
+def dedup_key_columns(facts):
+    """
+    DEDUP_KEY columns present in facts, plus is_dimensioned and any dim_
+    columns so segment rows are never merged into company totals.
+    """
+    columns = [c for c in DEDUP_KEY if c in facts.columns]
+    if "is_dimensioned" in facts.columns:
+        columns.append("is_dimensioned")
+    return columns + [c for c in facts.columns if c.startswith(DIMENSION_PREFIX)]
+
+def _accepted_ns(facts):
+    """Acceptance times as int64 ns; rows without one sort as the oldest."""
+    if "acceptance_datetime" not in facts.columns:
+        return np.zeros(len(facts), dtype=np.int64)
+    accepted = pd.to_datetime(facts["acceptance_datetime"], utc=True)
+    accepted = accepted.dt.tz_localize(None).to_numpy("datetime64[ns]")
+    accepted_ns = accepted.astype(np.int64)
+    accepted_ns[np.isnat(accepted)] = np.iinfo(np.int64).min
+    return accepted_ns
+
+def dedup_facts(facts):
+    """
+    Collapse the copies of each fact reported across filings (the original
+    10-Q, later comparative columns, amendments) to the latest accepted
+    one. Rows are grouped by a 64-bit hash of dedup_key_columns and
+    ordered by (hash, acceptance time, position) in one lexsort; the last
+    row of each group wins, so among rows accepted at the same time the
+    one loaded last is kept.
+    Returns (kept, superseded): kept holds the winning rows in their
+    original order, superseded every other row plus superseded_by (the
+    winner's accession_no) and restated (True where the winner's value
+    differs).
+    """
+    n = len(facts)
+    if not n:
+        return facts, with_columns(facts, superseded_by=pd.Series(dtype=object),
+                                   restated=pd.Series(dtype=bool))
+    keys = pd.util.hash_pandas_object(facts[dedup_key_columns(facts)], index=False)
+    keys = keys.to_numpy()
+    # lexsort is stable, so equal acceptance times keep their row order.
+    order = np.lexsort((_accepted_ns(facts), keys))
+    sorted_keys = keys[order]
+    last = np.ones(n, dtype=bool)
+    last[:-1] = sorted_keys[1:] != sorted_keys[:-1]
+    # Group number of each sorted row, counting from the first group.
+    group = np.cumsum(np.concatenate([[True], last[:-1]])) - 1
+    winners = order[last]
+
+    superseded = order[~last]
+    winner_of = winners[group[~last]]
+    by_position = np.argsort(superseded, kind="stable")
+    superseded, winner_of = superseded[by_position], winner_of[by_position]
+
+    values = facts["value"].to_numpy()
+    old, new = pd.Series(values[superseded]), pd.Series(values[winner_of])
+    restated = (old != new) & ~(old.isna() & new.isna())
+    superseded_df = with_columns(
+        facts.iloc[superseded].reset_index(drop=True),
+        superseded_by=facts["accession_no"].to_numpy()[winner_of],
+        restated=restated.to_numpy(),
+    )
+    return facts.iloc[np.sort(winners)].reset_index(drop=True), superseded_df
+
+def dedup_store(facts_dir):
+    """dedup_facts over every company file process_company wrote."""
+    return dedup_facts(load_fact_store(facts_dir))
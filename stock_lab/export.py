@@ -0,0 +1,235 @@
+import multiprocessing
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv
+import pyarrow.ipc
+import pyarrow.parquet
+
+from stock_lab.crawl import filing_facts_df
+from stock_lab.dedup import DIMENSION_PREFIX
+from stock_lab.throttle import route_edgar_requests
+from stock_lab.utils import load_filing_from_file
+
+FORMAT_SUFFIXES = {
+    ".csv": "csv",
+    ".gz": "csv",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+}
+DIMENSIONS_COLUMN = "dimensions"
+DEFAULT_COMPRESSION = {
+    "csv": "gzip",
+    "parquet": "zstd",
+    "arrow": "zstd",
+}
+
+
+class ExportStats():
+    """Running totals for an export, with throughput rates."""
+
+    def __init__(self):
+        self.filings = 0
+        self.rows = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.failures = []
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    @property
+    def bytes_per_second(self):
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    def __repr__(self):
+        return (
+            f"ExportStats(filings={self.filings}, rows={self.rows}, "
+            f"bytes={self.bytes}, seconds={self.seconds:.2f}, "
+            f"rows/s={self.rows_per_second:.0f}, bytes/s={self.bytes_per_second:.0f}, "
+            f"failures={len(self.failures)})"
+        )
+
+class FactsWriter():
+    """
+    Single writer that streams facts frames into one csv, parquet or Arrow
+    IPC file. Frames are buffered until row_group_size rows are available
+    and written as one row group / record batch.
+    The schema comes from the first flushed batch; later frames are
+    conformed to it: missing columns become null and extra columns are
+    dropped with a warning (fold_dimensions keeps per-filing dim_ columns
+    from being dropped).
+    """
+
+    def __init__(self, path, fmt, compression=None, row_group_size=100_000):
+        if fmt not in DEFAULT_COMPRESSION:
+            raise ValueError(f"Unknown export format: {fmt}")
+        self.path = Path(path)
+        self.fmt = fmt
+        self.compression = compression or DEFAULT_COMPRESSION[fmt]
+        self.row_group_size = row_group_size
+        self.schema = None
+        self.dropped = set()
+        self.buffer = []
+        self.buffered_rows = 0
+        self.rows = 0
+        self._sink = None
+        self._writer = None
+
+    def write(self, df):
+        self.buffer.append(df)
+        self.buffered_rows += len(df)
+        while self.buffered_rows >= self.row_group_size:
+            self._flush(self.row_group_size)
+
+    def close(self):
+        while self.buffered_rows:
+            self._flush(self.row_group_size)
+        if self._writer is not None:
+            self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _flush(self, n):
+        """Write the first n buffered rows as one batch."""
+        df = pd.concat(self.buffer, ignore_index=True)
+        batch, rest = df.iloc[:n], df.iloc[n:]
+        self.buffer = [rest] if len(rest) else []
+        self.buffered_rows = len(rest)
+        table = self._to_table(batch)
+        if self._writer is None:
+            self._open(table.schema)
+        self._writer.write_table(table)
+        self.rows += table.num_rows
+
+    def _to_table(self, df):
+        if self.schema is None:
+            schema = pa.Schema.from_pandas(df, preserve_index=False)
+            # An all-null column in the first batch would pin its type to null.
+            self.schema = pa.schema([
+                f.with_type(pa.string()) if pa.types.is_null(f.type) else f
+                for f in schema
+            ])
+        dropped = set(df.columns) - set(self.schema.names) - self.dropped
+        if dropped:
+            self.dropped |= dropped
+            warnings.warn(
+                f"Columns missing from the {self.path.name} schema are dropped: "
+                f"{sorted(dropped)}", stacklevel=2)
+        df = df.reindex(columns=self.schema.names)
+        return pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+
+    def _open(self, schema):
+        if self.fmt == "parquet":
+            self._writer = pyarrow.parquet.ParquetWriter(
+                self.path, schema, compression=self.compression)
+        elif self.fmt == "arrow":
+            self._sink = pa.OSFile(str(self.path), "wb")
+            options = pyarrow.ipc.IpcWriteOptions(compression=self.compression)
+            self._writer = pyarrow.ipc.new_file(self._sink, schema, options=options)
+        else:
+            self._sink = pa.CompressedOutputStream(str(self.path), self.compression)
+            self._writer = pyarrow.csv.CSVWriter(self._sink, schema)
+
+def fold_dimensions(df):
+    """
+    df with its dim_<axis> columns, which differ from filing to filing,
+    replaced by one DIMENSIONS_COLUMN of "axis=member" pairs joined by ";"
+    (null for undimensioned rows), so every filing has the same columns.
+    """
+    dims = sorted(c for c in df.columns if c.startswith(DIMENSION_PREFIX))
+    folded = pd.Series(pd.NA, index=df.index, dtype="string")
+    for column in dims:
+        pair = column[len(DIMENSION_PREFIX):] + "=" + df[column].astype("string")
+        folded = (folded + ";" + pair).fillna(folded).fillna(pair)
+    df = df.drop(columns=dims)
+    df[DIMENSIONS_COLUMN] = folded.astype(object).where(folded.notna(), None)
+    return df
+
+def _parse_one(parse, item):
+    """
+    Worker side: load (if given a saved .pkl path) and parse one filing.
+    Returns (accession_no, dataframe or exception).
+    """
+    try:
+        filing = load_filing_from_file(item) if isinstance(item, (str, Path)) else item
+        accession = filing.accession_no
+    except Exception as e:
+        return str(item), e
+    try:
+        route_edgar_requests()
+        df = fold_dimensions(parse(filing))
+        if "accession_no" not in df.columns:
+            df.insert(0, "accession_no", accession)
+        return accession, df
+    except Exception as e:
+        return accession, e
+
+def _filing_items(filings):
+    if isinstance(filings, (str, Path)):
+        return sorted(Path(filings).glob("*.pkl"))
+    return filings
+
+def export_facts(
+        filings,
+        out_path,
+        fmt=None,
+        parse=filing_facts_df,
+        workers=None,
+        compression=None,
+        row_group_size=100_000):
+    """
+    Parse many filings in parallel and stream their facts into one file.
+    filings: an iterable of Filing objects or a directory of saved .pkl files.
+    fmt: "csv" (compressed), "parquet" or "arrow"; inferred from out_path if None.
+    parse: function(filing) -> dataframe, must be picklable (workers are
+    spawned, not forked from this threaded process). Its dim_ columns
+    are folded into one dimensions column (fold_dimensions).
+    At most 2 * workers filings are in flight, so memory stays bounded.
+    Returns ExportStats; filings that fail to parse are listed in failures.
+    """
+    out_path = Path(out_path)
+    fmt = fmt or FORMAT_SUFFIXES.get(out_path.suffix)
+    workers = workers or os.cpu_count()
+    stats = ExportStats()
+    start = time.perf_counter()
+    items = iter(_filing_items(filings))
+    context = multiprocessing.get_context("spawn")
+    with FactsWriter(out_path, fmt, compression, row_group_size) as writer, \
+            ProcessPoolExecutor(workers, mp_context=context) as pool:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < 2 * workers:
+                item = next(items, None)
+                if item is None:
+                    exhausted = True
+                else:
+                    pending.add(pool.submit(_parse_one, parse, item))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                accession, result = future.result()
+                if isinstance(result, Exception):
+                    stats.failures.append((accession, repr(result)))
+                    continue
+                writer.write(result)
+                stats.filings += 1
+    stats.rows = writer.rows
+    stats.bytes = out_path.stat().st_size if out_path.exists() else 0
+    stats.seconds = time.perf_counter() - start
+    return stats
@@ -1,7 +1,17 @@
+import hashlib
+import inspect
+import json
+
+import numpy as np
 import pandas as pd
 
 # TODO: Add decorator to wrap error messages for validator pipeline funcs.
 
+# Validators are keyed by their source; bump this when shared row
+# selection logic or a helper they call changes behaviour, so results
+# cached under the previous version are no longer used.
+VALIDATOR_VERSION = 1
+
 class MissingFact(Exception):
     """Thrown when expected data is not present."""
     pass
@@ -10,6 +20,35 @@ class InvalidFact(Exception):
     """Thrown when a row's data does not conform to expectations."""
     pass
 
+def with_columns(df, **columns):
+    """
+    New dataframe with the given columns replaced or added, sharing every
+    other column with df. df itself is never modified.
+    """
+    result = df.copy(deep=False)
+    for name, values in columns.items():
+        result[name] = values
+    return result
+
+def concat_facts(frames):
+    """
+    pd.concat of fact type frames, ignore_index. A date column that is
+    all-NA in some frames (e.g. period_start of instant facts) takes the
+    dtype of the frames holding dates, so it concatenates as NaT rather
+    than relying on pandas' deprecated all-NA dtype exclusion.
+    """
+    dtypes = {}
+    for df in frames:
+        for column, series in df.items():
+            if series.dtype.kind in "mM" and series.notna().any():
+                dtypes.setdefault(column, series.dtype)
+    aligned = []
+    for df in frames:
+        casts = {c: dtypes[c] for c in df.columns
+                 if c in dtypes and df[c].dtype != dtypes[c] and df[c].isna().all()}
+        aligned.append(df.astype(casts) if casts else df)
+    return pd.concat(aligned, ignore_index=True)
+
 def err_if_none_in_column(column_name, df):
     """
     Raise a MissingFact exception if any value in the column is 'none-like':
@@ -31,10 +70,9 @@ def values_to_num(df):
     If any cannot be converted raise InvalidFact exception.
     """
     try:
-        df["value"] = pd.to_numeric(df["value"], errors='raise')
+        return with_columns(df, value=pd.to_numeric(df["value"], errors='raise'))
     except ValueError as e:
         raise InvalidFact(f"Failed to convert value to numeric: {e}")
-    return df
     
 def values_not_negative(df):
     """
@@ -65,11 +103,13 @@ def duration_to_date(df):
     err_if_none_in_column("period_start", df)
     err_if_none_in_column("period_end", df)
     try:
-        df["period_start"] = pd.to_datetime(df["period_start"], errors='raise')
-        df["period_end"] = pd.to_datetime(df["period_end"], errors='raise')
+        return with_columns(
+            df,
+            period_start=pd.to_datetime(df["period_start"], errors='raise'),
+            period_end=pd.to_datetime(df["period_end"], errors='raise'),
+        )
     except ValueError as e:
         raise InvalidFact(f"Failed to convert to date: {e}")
-    return df
 
 def instant_to_date(df):
     """
@@ -77,16 +117,69 @@ def instant_to_date(df):
     """
     err_if_none_in_column("period_instant", df)
     try:
-        df["period_instant"] = pd.to_datetime(df["period_instant"], errors='raise')
+        return with_columns(
+            df, period_instant=pd.to_datetime(df["period_instant"], errors='raise'))
     except ValueError as e:
         raise InvalidFact(f"Failed to convert to date: {e}")
-    return df
+
+# NumPy stand-ins used by FilingFacts.get_rows_fast: the date columns each
+# converter parses, and for each value check whether it would raise.
+FAST_DATE_COLUMNS = {
+    duration_to_date: ("period_start", "period_end"),
+    instant_to_date: ("period_instant",),
+}
+FAST_VALUE_CHECKS = {
+    values_not_negative: lambda values: (values < 0).any(),
+    values_positive: lambda values: (values <= 0).any(),
+    values_non_positive: lambda values: (values > 0).any(),
+}
+
+class _SlowPath(Exception):
+    """Raised inside get_rows_fast when only get_rows gives the exact result."""
+    pass
+
+def _iso_dates(raw):
+    """
+    datetime64[ns] array from YYYY-MM-DD strings, matching pd.to_datetime.
+    Anything else is left to pandas via _SlowPath.
+    """
+    for value in raw:
+        if not (isinstance(value, str) and len(value) == 10
+                and value[4] == "-" and value[7] == "-"):
+            raise _SlowPath()
+    try:
+        return np.array(raw.astype(str), dtype="datetime64[D]").astype("datetime64[ns]")
+    except ValueError:
+        raise _SlowPath()
+
+def _source_digest(func):
+    """Digest of a validator's source, so editing its body changes the key."""
+    return hashlib.sha256(inspect.getsource(func).encode()).hexdigest()[:16]
+
+def fact_type_hash(fact_type, gaap_dict):
+    """
+    Short digest of everything that decides a fact type's rows:
+    its period type, tag list, validator pipeline (names and source) and
+    VALIDATOR_VERSION.
+    """
+    spec = {
+        "fact_type": fact_type,
+        "period_type": gaap_dict["period_type"],
+        "tags": list(gaap_dict["tags"]),
+        "valid_type_pipe": [(func.__name__, _source_digest(func))
+                            for func in gaap_dict["valid_type_pipe"]],
+        "validator_version": VALIDATOR_VERSION,
+    }
+    encoded = json.dumps(spec, sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()[:16]
 
 class FilingFacts():
     """
     Raw data pulled from a single quarterly filing (10-Q, 10-K).
     Type conversion and filing validation is performed after data is pulled.
-    filing_df: a dataframe from a quarterly filing.
+    filing_df: a dataframe from a quarterly filing. It is only read, and
+    validators return new frames instead of converting rows in place, so
+    one frame or FilingFacts can be shared by extraction threads.
     """
 
     period_type_bi_dict = {
@@ -205,6 +298,8 @@ class FilingFacts():
 
     def __init__(self, filing_df):
         self.facts_df = filing_df
+        self._positions = None
+        self._concepts = None
 
     def get_rows(self):
         """
@@ -213,21 +308,155 @@ class FilingFacts():
         raise a MissingFact exception.
         Returns dataframe of found facts for latest period_end.
         """
+        return concat_facts([self.get_fact_type_rows(t) for t in self.gaap_tags])
+
+    def get_rows_fast(self):
+        """
+        Same result as get_rows for single-filing, low-latency use.
+        Facts are resolved on NumPy arrays and one result frame is built
+        at the end. Whatever the fast path cannot reproduce exactly
+        (any failure, non-ISO dates, validators without a NumPy stand-in)
+        is handed to get_rows, so results and exceptions are identical.
+        """
+        try:
+            return self._fast_rows()
+        except (_SlowPath, KeyError):
+            return self.get_rows()
+
+    def _concept_positions(self):
+        """Row positions of every configured tag present in facts_df."""
+        if self._positions is None:
+            wanted = [tag for d in self.gaap_tags.values() for tag in d["tags"]]
+            concepts = self.facts_df["concept"].to_numpy()
+            positions = {}
+            for i in np.flatnonzero(self.facts_df["concept"].isin(wanted).to_numpy()):
+                positions.setdefault(concepts[i], []).append(i)
+            self._positions = {c: np.array(p) for c, p in positions.items()}
+        return self._positions
+
+    def _fast_seek(self, gaap_dict, columns, missing):
+        """seek_tags_until_found on arrays; returns row positions."""
+        target_date = FilingFacts.period_type_bi_dict[gaap_dict["period_type"]]
+        dates = columns[target_date]
+        for tag in gaap_dict["tags"]:
+            pos = self._concept_positions().get(tag)
+            if pos is None:
+                continue
+            pos = pos[~missing[target_date][pos]]
+            if not len(pos):
+                continue
+            try:
+                latest = max(dates[pos])
+            except TypeError:
+                raise _SlowPath()
+            pos = pos[dates[pos] == latest]
+            if not (columns["period_type"][pos] == gaap_dict["period_type"]).all():
+                raise _SlowPath()
+            return pos
+        raise _SlowPath()
+
+    def _fast_rows(self):
         if self.facts_df.empty:
-            raise MissingFact(f"Input dataframe is empty.")
-        results_df = pd.DataFrame()
+            raise _SlowPath()
+        columns = {
+            c: self.facts_df[c].to_numpy()
+            for c in ["value", "period_type", "period_start", "period_end", "period_instant"]
+        }
+        missing = {c: pd.isna(values) for c, values in columns.items()}
+        fact_types, selected, pipes = [], [], []
         for fact_type, gaap_dict in self.gaap_tags.items():
+            pipe = gaap_dict["valid_type_pipe"]
+            if values_to_num not in pipe:
+                raise _SlowPath()
+            for i, func in enumerate(pipe):
+                if func in FAST_VALUE_CHECKS and i > pipe.index(values_to_num):
+                    continue
+                if func not in FAST_DATE_COLUMNS and func is not values_to_num:
+                    raise _SlowPath()
+            fact_types.append(fact_type)
+            selected.append(self._fast_seek(gaap_dict, columns, missing))
+            pipes.append(pipe)
+
+        lengths = [len(pos) for pos in selected]
+        bounds = np.cumsum([0] + lengths)
+        positions = np.concatenate(selected)
+        try:
+            values = pd.to_numeric(columns["value"][positions])
+        except (ValueError, TypeError):
+            raise _SlowPath()
+        if values.dtype.kind not in "if":
+            raise _SlowPath()
+        value_missing = np.isnan(values)
+
+        parsed = {}
+        for start, end, pipe in zip(bounds, bounds[1:], pipes):
+            if value_missing[start:end].all():
+                raise _SlowPath()
+            for func in pipe:
+                if func in FAST_VALUE_CHECKS and FAST_VALUE_CHECKS[func](values[start:end]):
+                    raise _SlowPath()
+                for column in FAST_DATE_COLUMNS.get(func, ()):
+                    if column not in parsed:
+                        parsed[column] = np.zeros(len(positions), dtype=bool)
+                    parsed[column][start:end] = True
+
+        dates = {}
+        for column, mask in parsed.items():
+            # Rows whose fact type does not parse this column keep their raw
+            # values in get_rows; they must be all-NA to concatenate as NaT.
+            if missing[column][positions[mask]].any() \
+                    or not missing[column][positions[~mask]].all():
+                raise _SlowPath()
+            converted = np.full(len(positions), np.datetime64("NaT", "ns"))
+            converted[mask] = _iso_dates(columns[column][positions[mask]])
+            dates[column] = converted
+
+        result = {"fact_type": np.repeat(np.array(fact_types, dtype=object), lengths)}
+        for column, series in self.facts_df.items():
+            if column == "value":
+                result[column] = values
+            elif column in dates:
+                result[column] = dates[column]
+            elif isinstance(series.dtype, np.dtype):
+                result[column] = series.to_numpy()[positions]
+            else:
+                result[column] = series.array.take(positions)
+        rows_df = pd.DataFrame(result, copy=False)
+        # The constructor infers datetimes in object columns; take would not.
+        kept = [c for c in self.facts_df.columns if c != "value" and c not in dates]
+        if not all(rows_df[c].dtype == self.facts_df[c].dtype for c in kept):
+            raise _SlowPath()
+        return rows_df
+
+    def get_fact_type_rows(self, fact_type):
+        """
+        Validated rows for a single fact type, with a leading fact_type column.
+        Raises MissingFact if none of its tags match. Raised MissingFact and
+        InvalidFact exceptions carry the failing fact_type as an attribute.
+        """
+        try:
+            if self.facts_df.empty:
+                raise MissingFact(f"Input dataframe is empty.")
+            gaap_dict = self.gaap_tags[fact_type]
             rows_df = self.seek_tags_until_found(gaap_dict)
             for func in gaap_dict["valid_type_pipe"]:
                 rows_df = func(rows_df)
             if FilingFacts.data_missing(rows_df):
                 raise MissingFact(f"Could not find a matching row for {fact_type}")
-            rows_df.insert(0, "fact_type", fact_type)
-            if results_df.empty:  
-                results_df = rows_df
-            else:
-                results_df = pd.concat([results_df, rows_df], ignore_index=True)
-        return results_df
+        except (MissingFact, InvalidFact) as e:
+            e.fact_type = fact_type
+            raise
+        rows_df = rows_df.copy(deep=False)
+        rows_df.insert(0, "fact_type", fact_type)
+        return rows_df
+
+    @classmethod
+    def schema_hashes(cls):
+        """fact_type_hash of every configured fact type."""
+        return {
+            fact_type: fact_type_hash(fact_type, gaap_dict)
+            for fact_type, gaap_dict in cls.gaap_tags.items()
+        }
     
     @staticmethod
     def data_missing(df):
@@ -249,15 +478,26 @@ class FilingFacts():
         """
         Search in order of gaap_data until at least one is found,
         short circuiting other tags when a tag finds a match.
+        Tags absent from the filing are skipped without a search, so
+        filers using a late tag only pay for the tags they actually report.
         Returns dataframe for ALL rows for that tag with the latest end date.
         """
-        rows = None
+        tags = gaap_dict["tags"]
         target_date = FilingFacts.period_type_bi_dict[gaap_dict["period_type"]]
-        for tag in gaap_dict["tags"]:
+        concepts = self.concepts()
+        for tag in tags:
+            if tag not in concepts:
+                continue
             rows = self.get_for_latest_date(tag, target_date)
             if not rows.empty:
                 return rows
-        return rows
+        return self.get_for_latest_date(tags[-1], target_date)
+
+    def concepts(self):
+        """Set of concepts in facts_df."""
+        if self._concepts is None:
+            self._concepts = set(self.facts_df["concept"].unique())
+        return self._concepts
 
     def get_for_latest_date(self, tag, target_date):
         """
@@ -267,7 +507,7 @@ class FilingFacts():
         """
         concept_rows = self.facts_df.loc[
             self.facts_df["concept"] == tag
-        ].copy()
+        ]
 
         concept_rows = concept_rows.dropna(subset=[target_date])
         if concept_rows.empty:
@@ -0,0 +1,234 @@
+import re
+import sqlite3
+import time
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from edgar import Filing
+
+from stock_lab.crawl import QUARTERLY_FORMS, extract_filing_facts, with_amendments
+from stock_lab.facts import InvalidFact, MissingFact
+from stock_lab.throttle import sec_get
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+TITLE_RE = re.compile(r"^(?P<form>\S+) - (?P<company>.*) \((?P<cik>\d{10})\) \(\w+\)$")
+ACCESSION_RE = re.compile(r"accession-number=(\d{10}-\d{2}-\d{6})")
+
+FeedEntry = namedtuple(
+    "FeedEntry", ["accession_no", "cik", "company", "form", "accepted", "link"])
+
+
+def current_feed_path(form, count=100):
+    """Path of EDGAR's latest filings Atom feed for one form type."""
+    return (
+        "/cgi-bin/browse-edgar?action=getcurrent"
+        f"&type={form}&company=&dateb=&owner=include&start=0&count={count}&output=atom"
+    )
+
+def fetch_current_feed(form):
+    """Download the latest filings feed for a form through the shared limiter."""
+    return sec_get(current_feed_path(form)).text
+
+def parse_current_feed(xml_text):
+    """
+    Parse a getcurrent Atom feed into FeedEntry tuples.
+    accepted is the tz-aware acceptance time from the entry's <updated>.
+    An accession listed once per role (Filer, Subject...) is kept once.
+    """
+    root = ET.fromstring(xml_text)
+    entries = {}
+    for entry in root.iter(f"{ATOM}entry"):
+        accession = ACCESSION_RE.search(entry.findtext(f"{ATOM}id", ""))
+        title = TITLE_RE.match(entry.findtext(f"{ATOM}title", "").strip())
+        if accession is None or title is None:
+            continue
+        link = entry.find(f"{ATOM}link")
+        entries.setdefault(accession.group(1), FeedEntry(
+            accession_no=accession.group(1),
+            cik=int(title.group("cik")),
+            company=title.group("company"),
+            form=title.group("form"),
+            accepted=pd.Timestamp(entry.findtext(f"{ATOM}updated")),
+            link=link.get("href") if link is not None else None,
+        ))
+    return list(entries.values())
+
+def latest_filed(forms=QUARTERLY_FORMS, fetch=fetch_current_feed, amendments=True):
+    """
+    Series of the latest acceptance time (UTC) per CIK in the current feed
+    of each of forms (and its /A amendments if amendments, which the feed
+    of a form type lists too): one request per form, a cheap stand-in for
+    a catalog's last_filed that only covers the newest filings.
+    """
+    accepted = {}
+    watched = with_amendments(forms, amendments)
+    for form in forms:
+        for entry in parse_current_feed(fetch(form)):
+            if entry.form in watched:
+                at = entry.accepted.tz_convert("UTC")
+                accepted[entry.cik] = max(at, accepted.get(entry.cik, at))
+    return pd.Series(accepted, dtype="datetime64[ns, UTC]")
+
+class ProcessedLedger():
+    """
+    SQLite record of accessions the watcher has already handled, with
+    acceptance time, when facts were stored and the end-to-end latency.
+    """
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, timeout=60)
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS processed ("
+                " accession TEXT PRIMARY KEY,"
+                " cik INTEGER,"
+                " form TEXT,"
+                " accepted REAL,"
+                " stored REAL,"
+                " latency_seconds REAL,"
+                " status TEXT NOT NULL)"
+            )
+
+    def close(self):
+        self.db.close()
+
+    def seen(self, accessions):
+        """The subset of accessions already in the ledger."""
+        accessions = list(accessions)
+        if not accessions:
+            return set()
+        marks = ",".join("?" * len(accessions))
+        rows = self.db.execute(
+            f"SELECT accession FROM processed WHERE accession IN ({marks})",
+            accessions
+        )
+        return {r[0] for r in rows}
+
+    def seed(self, accessions):
+        """Mark accessions processed by other means (e.g. a full crawl)."""
+        with self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO processed (accession, status) VALUES (?, 'seeded')",
+                ((a,) for a in accessions)
+            )
+
+    def record(self, entry, stored, status):
+        accepted = entry.accepted.timestamp()
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO processed VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (entry.accession_no, entry.cik, entry.form, accepted, stored,
+                 stored - accepted, status)
+            )
+
+    def latency_summary(self):
+        """p50/p95/max acceptance-to-stored latency in seconds of stored filings."""
+        latencies = np.array([r[0] for r in self.db.execute(
+            "SELECT latency_seconds FROM processed WHERE status = 'stored'")])
+        if not len(latencies):
+            return {"count": 0, "p50": None, "p95": None, "max": None}
+        return {
+            "count": len(latencies),
+            "p50": float(np.percentile(latencies, 50)),
+            "p95": float(np.percentile(latencies, 95)),
+            "max": float(latencies.max()),
+        }
+
+def entry_filing(entry):
+    """
+    edgar Filing for a feed entry, carrying its acceptance time in UTC
+    like crawled filings, so feed and crawl files share one dtype.
+    """
+    filing = Filing(
+        cik=entry.cik,
+        company=entry.company,
+        form=entry.form,
+        filing_date=entry.accepted.date().isoformat(),
+        accession_no=entry.accession_no,
+    )
+    filing.acceptance_datetime = entry.accepted.tz_convert("UTC")
+    return filing
+
+def store_filing(filing, out_dir):
+    """
+    Extract one filing's facts and write them to
+    out_dir/<cik>-<accession>.parquet, next to the crawl's fact store.
+    """
+    out_dir = Path(out_dir)
+    rows_df = extract_filing_facts(filing)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rows_df.to_parquet(out_dir/f"{int(filing.cik)}-{filing.accession_no}.parquet")
+    return rows_df
+
+def store_filing_facts(out_dir):
+    """Handler that store_filing()s each feed entry into out_dir."""
+    def handle(entry):
+        return store_filing(entry_filing(entry), out_dir)
+    return handle
+
+class FilingWatcher():
+    """
+    Polls the latest-filings feed and pushes only new 10-K/10-Q filings
+    (and their amendments, unless amendments is False) straight through
+    extraction, recording acceptance-to-stored latency.
+    fetch(form) returns feed XML and handler(entry) extracts and stores a
+    filing; both can be stubbed to run offline.
+    Filings whose facts are missing or invalid are recorded as failed and
+    not retried; any other error (throttling, server errors, XBRL not
+    posted yet) leaves the filing unprocessed so the next poll retries it.
+    """
+
+    def __init__(self, ledger, handler, fetch=fetch_current_feed,
+                 forms=QUARTERLY_FORMS, clock=time.time, amendments=True):
+        self.ledger = ledger
+        self.handler = handler
+        self.fetch = fetch
+        self.forms = forms
+        self.watched = with_amendments(forms, amendments)
+        self.clock = clock
+
+    def new_entries(self):
+        """Unseen entries of the watched forms, oldest acceptance first."""
+        entries = {}
+        for form in self.forms:
+            for entry in parse_current_feed(self.fetch(form)):
+                if entry.form in self.watched:
+                    entries.setdefault(entry.accession_no, entry)
+        seen = self.ledger.seen(entries)
+        fresh = [e for a, e in entries.items() if a not in seen]
+        return sorted(fresh, key=lambda e: e.accepted)
+
+    def poll_once(self):
+        """
+        Process every new filing once. Returns (entry, latency seconds,
+        error) for each; latency is None when the handler failed.
+        """
+        results = []
+        for entry in self.new_entries():
+            try:
+                self.handler(entry)
+            except (MissingFact, InvalidFact) as e:
+                self.ledger.record(entry, self.clock(), f"failed: {e!r}")
+                results.append((entry, None, e))
+                continue
+            except Exception as e:
+                results.append((entry, None, e))
+                continue
+            stored = self.clock()
+            self.ledger.record(entry, stored, "stored")
+            results.append((entry, stored - entry.accepted.timestamp(), None))
+        return results
+
+    def run(self, interval=60, stop=None):
+        """Poll every interval seconds until the stop Event is set."""
+        while stop is None or not stop.is_set():
+            started = self.clock()
+            self.poll_once()
+            wait = max(0.0, interval - (self.clock() - started))
+            if stop is not None:
+                stop.wait(wait)
+            else:
+                time.sleep(wait)
@@ -0,0 +1,191 @@
+import functools
+import gzip
+import hashlib
+import inspect
+import json
+import pickle
+import re
+import zlib
+from collections import namedtuple
+
+from stock_lab.crawl import filing_facts_df
+from stock_lab.store import FilingStore, XBRL_KIND
+from stock_lab.throttle import sec_get
+from stock_lab import xbrl_instance
+from stock_lab.xbrl_instance import configured_concepts, parse_instance
+
+IXBRL_KIND = "ixbrl"
+PARSED_KIND_PREFIX = "parsed"
+# EDGAR names standalone instances <prefix>-<yyyymmdd>.xml; linkbases,
+# FilingSummary.xml and the R<n>.xml report pages never match.
+INSTANCE_NAME = re.compile(r"^[a-z0-9][\w.-]*-\d{8}\.xml$", re.IGNORECASE)
+
+FetchResult = namedtuple("FetchResult", [
+    "accession_no", "document", "kind", "wire_bytes", "raw_bytes",
+    "package_bytes", "bytes_saved",
+])
+
+
+class InstanceNotFound(Exception):
+    """Thrown when a filing index lists no XBRL instance document."""
+    pass
+
+def filing_folder(cik, accession_no):
+    """Archive folder of a filing."""
+    return f"/Archives/edgar/data/{int(cik)}/{accession_no.replace('-', '')}"
+
+def get_decoded(path, get=sec_get):
+    """
+    GET path with gzip transfer encoding, decompressing it here so the
+    bytes that actually crossed the wire can be counted.
+    Returns (decoded bytes, wire bytes).
+    """
+    response = get(path, stream=True)
+    try:
+        wire = response.raw.read(decode_content=False)
+    finally:
+        response.close()
+    encoding = response.headers.get("Content-Encoding", "").lower()
+    if "gzip" in encoding:
+        return gzip.decompress(wire), len(wire)
+    if "deflate" in encoding:
+        return zlib.decompress(wire), len(wire)
+    return wire, len(wire)
+
+def _size(item):
+    try:
+        return int(item.get("size") or 0)
+    except ValueError:
+        return 0
+
+def package_bytes(items, accession_no):
+    """
+    Bytes a full download of the filing costs: the complete submission
+    text file when listed, otherwise every listed document.
+    """
+    for item in items:
+        if item["name"] == f"{accession_no}.txt":
+            return _size(item)
+    return sum(_size(item) for item in items)
+
+def choose_instance(items, primary_document=None):
+    """
+    (document name, kind) to fetch from a filing index listing.
+    Prefers the instance EDGAR extracts from inline XBRL (*_htm.xml), then a
+    standalone instance named like INSTANCE_NAME, then the inline XBRL
+    primary document.
+    """
+    names = [item["name"] for item in items]
+    for name in names:
+        if name.endswith("_htm.xml"):
+            return name, XBRL_KIND
+    for name in names:
+        if INSTANCE_NAME.match(name):
+            return name, XBRL_KIND
+    if primary_document and primary_document in names:
+        return primary_document, IXBRL_KIND
+    raise InstanceNotFound(f"No XBRL instance among {names}")
+
+def download_instance(filing, get=sec_get):
+    """
+    Download only the filing index and the XBRL instance of a filing.
+    Inline-only filings have no instance to parse here, so their primary
+    document is not downloaded and data is None.
+    Touches no store, so it can run in any thread.
+    Returns (FetchResult, document bytes).
+    """
+    folder = filing_folder(filing.cik, filing.accession_no)
+    index, index_wire = get_decoded(f"{folder}/index.json", get)
+    items = json.loads(index)["directory"]["item"]
+    name, kind = choose_instance(items, getattr(filing, "primary_document", None))
+    full = package_bytes(items, filing.accession_no)
+    if kind == IXBRL_KIND:
+        result = FetchResult(filing.accession_no, name, kind, index_wire, 0, full, 0)
+        return result, None
+    data, wire = get_decoded(f"{folder}/{name}", get)
+    result = FetchResult(
+        accession_no=filing.accession_no,
+        document=name,
+        kind=kind,
+        wire_bytes=index_wire + wire,
+        raw_bytes=len(data),
+        package_bytes=full,
+        bytes_saved=max(full - index_wire - wire, 0),
+    )
+    return result, data
+
+def store_instance(store, result, data):
+    """
+    Put a download_instance result into store and record its transfer.
+    For inline-only filings only the primary document's name is stored,
+    as a marker that spares refetching the index, and no transfer is
+    recorded since the filing is still read in full by filing_facts_df.
+    """
+    if result.kind == IXBRL_KIND:
+        store.put(result.accession_no, IXBRL_KIND, result.document.encode())
+        return
+    store.put(result.accession_no, result.kind, data)
+    store.record_transfer(result.accession_no, result.document, result.wire_bytes,
+                          result.raw_bytes, result.package_bytes)
+
+def fetch_instance(filing, store, get=sec_get):
+    """
+    Download only the filing index and the XBRL instance of a filing into
+    store, recording wire vs full-package bytes with the store.
+    Returns a FetchResult.
+    """
+    result, data = download_instance(filing, get)
+    store_instance(store, result, data)
+    return result
+
+@functools.lru_cache(maxsize=None)
+def parser_fingerprint():
+    """
+    Hash of the xbrl_instance module source, so any change to the parser
+    starts a new parse cache instead of serving stale output.
+    """
+    return hashlib.sha256(inspect.getsource(xbrl_instance).encode()).hexdigest()
+
+def parsed_kind(concepts=None):
+    """
+    FilingStore kind of parse_instance output for the configured concepts
+    (default: every FilingFacts tag) and the current parser_fingerprint.
+    """
+    concepts = configured_concepts() if concepts is None else concepts
+    key = "\n".join(sorted(concepts)) + f"\n{parser_fingerprint()}"
+    return f"{PARSED_KIND_PREFIX}/{hashlib.sha256(key.encode()).hexdigest()[:16]}"
+
+def parse_stored(store, accession):
+    """
+    Facts dataframe of the XBRL instance stored for accession, parsed once
+    and then read back from the store's parse cache.
+    Raises DocumentNotFound when no instance is stored.
+    """
+    kind = parsed_kind()
+    if (accession, kind) in store:
+        return pickle.loads(store.get(accession, kind))
+    facts_df = parse_instance(store.get_xbrl(accession))
+    store.put(accession, kind, pickle.dumps(facts_df))
+    return facts_df
+
+def instance_facts_parser(store, get=sec_get):
+    """
+    parse(filing) function for extract_filing_facts that fetches the
+    instance into store on first use and parses it through parse_stored,
+    so filings parsed before (e.g. by prefetch) are read back ready-made.
+    Filings with only an inline XBRL document fall back to filing_facts_df
+    (a full edgartools download, outside the rate limiter).
+    """
+    def parse(filing):
+        accession = filing.accession_no
+        if (accession, XBRL_KIND) not in store and (accession, IXBRL_KIND) not in store:
+            fetch_instance(filing, store, get)
+        if (accession, XBRL_KIND) in store:
+            return parse_stored(store, accession)
+        return filing_facts_df(filing)
+    return parse
+
+@functools.lru_cache(maxsize=None)
+def open_instance_parser(store_dir):
+    """One instance_facts_parser per process and store, for pool workers."""
+    return instance_facts_parser(FilingStore(store_dir))
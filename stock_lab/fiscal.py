@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+from stock_lab.facts import with_columns
+from stock_lab.tensor import DAYS_PER_QUARTER, CikIndex, period_months, quarter_labels
+
+CALENDAR_YEAR_END = 12
+ANNUAL_DAYS = (350, 380)
+INDEX_COLUMNS = ["cik", "fiscal_year_end_month", "annual_periods"]
+ALIGN_COLUMNS = ["fiscal_year", "fiscal_quarter", "calendar_quarter", "period_quarters"]
+
+
+def _period_dates(facts):
+    dates = facts["period_end"]
+    if "period_instant" in facts.columns:
+        dates = dates.fillna(facts["period_instant"])
+    return dates.to_numpy("datetime64[ns]")
+
+def fiscal_year_ends(facts):
+    """
+    Fiscal year-end month (1-12) of every CIK in a fact store frame, the
+    most common month end of its year-long 10-K periods.
+    CIKs without any year-long 10-K period are assumed to follow the
+    calendar year. Returns a frame of INDEX_COLUMNS.
+    """
+    start = facts["period_start"].to_numpy("datetime64[ns]")
+    end = facts["period_end"].to_numpy("datetime64[ns]")
+    days = (end - start) / np.timedelta64(1, "D")
+    annual = (days >= ANNUAL_DAYS[0]) & (days <= ANNUAL_DAYS[1])
+    if "form" in facts.columns:
+        annual &= facts["form"].to_numpy() == "10-K"
+    counts = pd.DataFrame({
+        "cik": facts["cik"].to_numpy(np.int64)[annual],
+        "fiscal_year_end_month": period_months(end[annual]) % 12 + 1,
+    }).value_counts().rename("annual_periods").reset_index()
+    # value_counts sorts by count, so the first row per CIK is its mode.
+    counts = counts.drop_duplicates("cik")
+    ciks = pd.DataFrame({"cik": np.unique(facts["cik"].to_numpy(np.int64))})
+    index = ciks.merge(counts, on="cik", how="left")
+    index = index.fillna({"fiscal_year_end_month": CALENDAR_YEAR_END, "annual_periods": 0})
+    return index.astype(np.int64)[INDEX_COLUMNS]
+
+def _masked(values, known):
+    return pd.arrays.IntegerArray(np.where(known, values, 0).astype(np.int64), ~known)
+
+class FiscalCalendar():
+    """
+    Per-CIK fiscal year-end months, applied to fact rows with one
+    vectorized lookup so periods of companies on different fiscal
+    calendars line up.
+
+    align() labels each row's period end (or instant) with:
+    - fiscal_year: the year in which its fiscal year ends (NVDA's year
+      ending January 2025 is fiscal 2025)
+    - fiscal_quarter: 1-4 within that fiscal year
+    - calendar_quarter: 'YYYYQn' of the calendar quarter holding most of
+      the fiscal quarter's months, so a quarter ending in January counts
+      as the previous calendar Q4
+    - period_quarters: quarters spanned by a duration (4 for annual
+      facts), 0 for instants
+    Rows of unknown CIKs are aligned to the calendar year.
+    """
+
+    def __init__(self, index):
+        index = index.sort_values("cik", ignore_index=True)
+        self.index = index
+        self.ciks = CikIndex(index["cik"], 0)
+        self.year_end_months = index["fiscal_year_end_month"].to_numpy(np.int64)
+
+    @classmethod
+    def from_facts(cls, facts, overrides=None):
+        """
+        Calendar inferred with fiscal_year_ends; overrides ({cik: month})
+        replace the inferred month, e.g. with fiscalYearEnd from EDGAR
+        submissions.
+        """
+        index = fiscal_year_ends(facts)
+        if overrides:
+            months = index["cik"].map(overrides)
+            index["fiscal_year_end_month"] = months.fillna(
+                index["fiscal_year_end_month"]).astype(np.int64)
+        return cls(index)
+
+    def to_parquet(self, path):
+        self.index.to_parquet(path, index=False)
+
+    @classmethod
+    def from_parquet(cls, path):
+        return cls(pd.read_parquet(path))
+
+    def year_end_month(self, ciks):
+        """Fiscal year-end month of each CIK (December for unknown CIKs)."""
+        ciks = np.asarray(ciks, dtype=np.int64)
+        if not len(self.ciks):
+            return np.full(len(ciks), CALENDAR_YEAR_END)
+        rows = self.ciks.get_indexer(ciks)
+        return np.where(rows >= 0, self.year_end_months[np.maximum(rows, 0)],
+                        CALENDAR_YEAR_END)
+
+    def align(self, facts):
+        """facts plus ALIGN_COLUMNS; rows without a period get nulls."""
+        dates = _period_dates(facts)
+        known = ~np.isnat(dates)
+        months = period_months(dates)
+        year_end = self.year_end_month(facts["cik"].to_numpy(np.int64))
+
+        month = months % 12 + 1
+        fiscal_year = months // 12 + 1970 + (month > year_end)
+        fiscal_quarter = (month - year_end - 1) % 12 // 3 + 1
+        calendar_quarter = np.full(len(facts), None, dtype=object)
+        calendar_quarter[known] = quarter_labels((months[known] - 1) // 3)
+
+        spans = np.zeros(len(facts))
+        if "period_start" in facts.columns:
+            start = facts["period_start"].to_numpy("datetime64[ns]")
+            end = facts["period_end"].to_numpy("datetime64[ns]")
+            days = (end - start) / np.timedelta64(1, "D")
+            spans = np.nan_to_num(np.round(days / DAYS_PER_QUARTER))
+        return with_columns(
+            facts,
+            fiscal_year=_masked(fiscal_year, known),
+            fiscal_quarter=_masked(fiscal_quarter, known),
+            calendar_quarter=calendar_quarter,
+            period_quarters=_masked(spans, known),
+        )
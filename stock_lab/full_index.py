@@ -0,0 +1,198 @@
+import datetime
+import io
+import re
+from pathlib import Path
+
+import pandas as pd
+from edgar import Filing
+
+from stock_lab.crawl import QUARTERLY_FORMS, with_amendments
+from stock_lab.throttle import sec_get
+
+CATALOG_COLUMNS = ["cik", "company", "form", "date_filed", "accession_no", "filename"]
+ACCESSION_RE = re.compile(r"(\d{10}-\d{2}-\d{6})")
+EDGAR_TZ = "America/New_York"
+
+
+def quarters_between(start, end):
+    """
+    (year, quarter) pairs of every EDGAR full-index quarter from start to end.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    return [
+        (period.year, period.quarter)
+        for period in pd.period_range(start, end, freq="Q")
+    ]
+
+def index_path(year, quarter, kind="form"):
+    """Archive path of a quarterly full-index file (kind: form or master)."""
+    return f"/Archives/edgar/full-index/{year}/QTR{quarter}/{kind}.idx"
+
+def filed_knowledge_time(date_filed):
+    """
+    Stand-in acceptance time of a filing known only by its filing date:
+    midnight after date_filed in New York, as UTC. EDGAR dates a filing
+    accepted after 5:30pm ET the next business day, so the real acceptance
+    is never later than this and as-of queries never see a fact early,
+    at the cost of up to a day's delay.
+    """
+    day = pd.Timestamp(date_filed).normalize() + pd.Timedelta(1, "D")
+    return day.tz_localize(EDGAR_TZ).tz_convert("UTC")
+
+def _accessions(filenames):
+    return filenames.str.extract(ACCESSION_RE, expand=False)
+
+def _finish(df):
+    """Common typing for a parsed index frame."""
+    df["cik"] = pd.to_numeric(df["cik"]).astype("int64")
+    df["date_filed"] = pd.to_datetime(df["date_filed"])
+    df["accession_no"] = _accessions(df["filename"])
+    return df[CATALOG_COLUMNS]
+
+def parse_form_idx(text):
+    """
+    Parse a fixed-width form.idx file.
+    Column offsets for form and company are taken from the header line,
+    and the right-hand CIK/date/filename fields are split on whitespace,
+    so year-to-year width changes and over-long company names are tolerated.
+    """
+    lines = text.splitlines()
+    header_at = next(i for i, line in enumerate(lines) if line.startswith("Form Type"))
+    company_start = lines[header_at].index("Company Name")
+    records = []
+    for line in lines[header_at + 2:]:
+        if not line.strip():
+            continue
+        left, cik, date_filed, filename = line.rsplit(None, 3)
+        records.append((
+            cik,
+            left[company_start:].strip(),
+            line[:company_start].strip(),
+            date_filed,
+            filename,
+        ))
+    df = pd.DataFrame(
+        records, columns=["cik", "company", "form", "date_filed", "filename"])
+    return _finish(df)
+
+def parse_master_idx(text):
+    """
+    Parse a pipe-delimited master.idx file.
+    """
+    body = text[text.index("\n", text.index("-----")) + 1:]
+    df = pd.read_csv(
+        io.StringIO(body),
+        sep="|",
+        header=None,
+        names=["cik", "company", "form", "date_filed", "filename"],
+        dtype=str,
+    )
+    return _finish(df)
+
+PARSERS = {
+    "form": parse_form_idx,
+    "master": parse_master_idx,
+}
+
+def fetch_index(year, quarter, kind="form"):
+    """Download one quarterly full-index file through the shared limiter."""
+    return sec_get(index_path(year, quarter, kind)).text
+
+def catalog_filing(cik, company, form, date_filed, accession_no):
+    """
+    edgar Filing for one catalog row, built without any request.
+    Index files list no acceptance times, so acceptance_datetime is
+    filed_knowledge_time of the filing date.
+    """
+    date_filed = pd.Timestamp(date_filed)
+    filing = Filing(
+        cik=int(cik),
+        company=company,
+        form=form,
+        filing_date=date_filed.date().isoformat(),
+        accession_no=accession_no,
+    )
+    filing.acceptance_datetime = filed_knowledge_time(date_filed)
+    return filing
+
+class AccessionCatalog():
+    """
+    Every filing listed in a range of EDGAR full-index files.
+    Rows are kept sorted by (cik, date_filed) and the CIK range of each
+    company is indexed, so per-company lookups are a binary search and
+    form/date filters are vectorized masks.
+    """
+
+    def __init__(self, df):
+        df = df.drop_duplicates("accession_no")
+        self.df = df.sort_values(["cik", "date_filed", "accession_no"],
+                                 ignore_index=True)
+        self.df["form"] = self.df["form"].astype("category")
+        self._ciks = self.df["cik"].to_numpy()
+
+    def __len__(self):
+        return len(self.df)
+
+    def for_cik(self, cik):
+        """All filings of one company via binary search on the sorted CIKs."""
+        lo = self._ciks.searchsorted(cik, side="left")
+        hi = self._ciks.searchsorted(cik, side="right")
+        return self.df.iloc[lo:hi]
+
+    def filter(self, forms=None, ciks=None, start=None, end=None):
+        """
+        Filings matching every given criterion; dates are inclusive.
+        Returns a new AccessionCatalog.
+        """
+        mask = pd.Series(True, index=self.df.index)
+        if forms is not None:
+            mask &= self.df["form"].isin(forms)
+        if ciks is not None:
+            mask &= self.df["cik"].isin(ciks)
+        if start is not None:
+            mask &= self.df["date_filed"] >= pd.Timestamp(start)
+        if end is not None:
+            mask &= self.df["date_filed"] <= pd.Timestamp(end)
+        return AccessionCatalog(self.df.loc[mask])
+
+    def filings(self):
+        """catalog_filing of every row."""
+        for row in self.df.itertuples(index=False):
+            yield catalog_filing(row.cik, row.company, row.form, row.date_filed,
+                                 row.accession_no)
+
+    def save(self, path):
+        self.df.to_parquet(path)
+
+    @classmethod
+    def load(cls, path):
+        return cls(pd.read_parquet(path))
+
+def build_catalog(start, end=None, forms=QUARTERLY_FORMS, kind="form", fetch=fetch_index,
+                  amendments=True):
+    """
+    Enumerate filings from start to end (default today) with one request
+    per quarter, keeping only forms (all forms if None) and, if
+    amendments, their /A amendments, as the edgartools crawl does.
+    fetch(year, quarter, kind) returns the index file text.
+    """
+    end = end or datetime.date.today()
+    if forms is not None:
+        forms = with_amendments(forms, amendments)
+    frames = []
+    for year, quarter in quarters_between(start, end):
+        df = PARSERS[kind](fetch(year, quarter, kind))
+        if forms is not None:
+            df = df.loc[df["form"].isin(forms)]
+        frames.append(df)
+    if not frames:
+        return AccessionCatalog(pd.DataFrame(columns=CATALOG_COLUMNS))
+    return AccessionCatalog(pd.concat(frames, ignore_index=True))
+
+def local_fetch(index_dir):
+    """
+    fetch function reading <index_dir>/<year>/QTR<q>/<kind>.idx from disk.
+    """
+    def fetch(year, quarter, kind="form"):
+        return (Path(index_dir)/str(year)/f"QTR{quarter}"/f"{kind}.idx").read_text()
+    return fetch
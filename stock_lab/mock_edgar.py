@@ -0,0 +1,281 @@
+import argparse
+import gzip
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from stock_lab.fetch import filing_folder
+from stock_lab.full_index import index_path
+from stock_lab.utils import REPO_ROOT, load_filings_from_dir
+
+FIXTURE_DIR = REPO_ROOT/"tests/data/nvda"
+INSTANCE_PATH = REPO_ROOT/"tests/data/xbrl/sample_instance.xml"
+FULL_INDEX_RE = re.compile(r"/Archives/edgar/full-index/(\d{4})/QTR([1-4])/form\.idx")
+FORM_IDX_HEADER = (
+    "Description:           Master Index of EDGAR Dissemination Feed by Form Type\n"
+    "Comments:              mock EDGAR\n"
+    "\n"
+    f"{'Form Type':<12}{'Company Name':<62}{'CIK':<12}{'Date Filed':<12}File Name\n"
+    f"{'-' * 137}\n"
+)
+
+
+def _instance_name(filing):
+    return filing.primary_document.replace(".htm", "_htm.xml")
+
+def _form_idx(filings):
+    lines = [
+        f"{f.form:<12}{f.company:<62}{f.cik:<12}{f.filing_date}  "
+        f"edgar/data/{f.cik}/{f.accession_no}.txt\n"
+        for f in filings
+    ]
+    return FORM_IDX_HEADER + "".join(lines)
+
+def _submissions(cik, filings, ticker):
+    filings = sorted(filings, key=lambda f: str(f.filing_date), reverse=True)
+    recent = {
+        "accessionNumber": [f.accession_no for f in filings],
+        "filingDate": [str(f.filing_date) for f in filings],
+        "reportDate": [str(getattr(f, "report_date", "") or "") for f in filings],
+        "acceptanceDateTime": [
+            pd.Timestamp(f.acceptance_datetime).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+            for f in filings
+        ],
+        "form": [f.form for f in filings],
+        "primaryDocument": [f.primary_document for f in filings],
+        "isXBRL": [1] * len(filings),
+        "isInlineXBRL": [1] * len(filings),
+    }
+    return {
+        "cik": str(cik),
+        "name": filings[0].company,
+        "tickers": [ticker],
+        "filings": {"recent": recent, "files": []},
+    }
+
+def build_documents(filings, instance, ticker="NVDA", package_size=10_000_000):
+    """
+    {path: bytes} of everything the crawler requests for filings: the
+    ticker map, submissions, each filing's index.json, instance and
+    complete submission text, and the quarterly form.idx files.
+    Every filing serves the same instance document.
+    """
+    documents = {}
+    by_cik = {}
+    for f in filings:
+        by_cik.setdefault(int(f.cik), []).append(f)
+    tickers = {
+        str(i): {"cik_str": cik, "ticker": ticker, "title": fs[0].company}
+        for i, (cik, fs) in enumerate(by_cik.items())
+    }
+    documents["/files/company_tickers.json"] = json.dumps(tickers).encode()
+    for cik, fs in by_cik.items():
+        documents[f"/submissions/CIK{cik:010d}.json"] = json.dumps(
+            _submissions(cik, fs, ticker)).encode()
+    for f in filings:
+        folder = filing_folder(f.cik, f.accession_no)
+        name = _instance_name(f)
+        items = [
+            {"name": f"{f.accession_no}.txt", "type": "text.gif", "size": str(package_size)},
+            {"name": f.primary_document, "type": "text.gif", "size": str(package_size // 2)},
+            {"name": name, "type": "text.gif", "size": str(len(instance))},
+        ]
+        documents[f"{folder}/index.json"] = json.dumps(
+            {"directory": {"name": folder, "item": items}}).encode()
+        documents[f"{folder}/{name}"] = instance
+        documents[f"{folder}/{f.accession_no}.txt"] = b"<SEC-DOCUMENT>\n" + instance
+    quarters = {}
+    for f in filings:
+        filed = pd.Timestamp(str(f.filing_date))
+        quarters.setdefault((filed.year, filed.quarter), []).append(f)
+    for (year, quarter), fs in quarters.items():
+        documents[index_path(year, quarter)] = _form_idx(fs).encode()
+    return documents
+
+def fixture_documents(fixture_dir=FIXTURE_DIR, instance_path=INSTANCE_PATH):
+    """build_documents for the saved filings in fixture_dir."""
+    return build_documents(load_filings_from_dir(fixture_dir), instance_path.read_bytes())
+
+class MockEdgarHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        started = time.perf_counter()
+        path = self.path.split("?", 1)[0]
+        status, headers, body = self.server.respond(path)
+        if "gzip" in self.headers.get("Accept-Encoding", "") and status == 200:
+            body = gzip.compress(body, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.log(path, status, time.perf_counter() - started)
+
+    def log_message(self, format, *args):
+        pass
+
+class MockEdgarServer(ThreadingHTTPServer):
+    """
+    Local stand-in for www.sec.gov / data.sec.gov serving documents
+    (default: fixture_documents), with injectable faults:
+    - latency: seconds added to every response, plus up to jitter more
+    - throttle_rate / failure_rate: share of requests answered 429 (with
+      Retry-After: retry_after) or 500
+    - max_rate: requests per second above which, like SEC, every request
+      in the trailing second is answered 429
+    Quarters without filings get an empty form.idx; other paths are 404.
+    Every request is logged for summary(). Use as a context manager to
+    serve from a background thread, with url pointing at it.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, documents=None, port=0, latency=0.0, jitter=0.0,
+                 throttle_rate=0.0, failure_rate=0.0, retry_after=1, max_rate=None,
+                 seed=0):
+        super().__init__(("127.0.0.1", port), MockEdgarHandler)
+        self.documents = fixture_documents() if documents is None else documents
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.failure_rate = failure_rate
+        self.retry_after = retry_after
+        self.max_rate = max_rate
+        self.requests = []
+        self._random = random.Random(seed)
+        self._arrivals = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _fault(self):
+        """(status, delay) drawn for the next request."""
+        now = time.monotonic()
+        with self._lock:
+            self._arrivals = [t for t in self._arrivals if t > now - 1] + [now]
+            over_limit = self.max_rate is not None and len(self._arrivals) > self.max_rate
+            draw = self._random.random()
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        if over_limit or draw < self.throttle_rate:
+            return 429, delay
+        if draw < self.throttle_rate + self.failure_rate:
+            return 500, delay
+        return 200, delay
+
+    def respond(self, path):
+        """(status, headers, body) for a GET of path."""
+        status, delay = self._fault()
+        time.sleep(delay)
+        if status == 429:
+            return 429, {"Retry-After": str(self.retry_after)}, b"Request Rate Threshold Exceeded"
+        if status == 500:
+            return 500, {}, b"Internal Server Error"
+        if path in self.documents:
+            return 200, {}, self.documents[path]
+        if FULL_INDEX_RE.fullmatch(path):
+            return 200, {}, FORM_IDX_HEADER.encode()
+        return 404, {}, b"Not Found"
+
+    def log(self, path, status, seconds):
+        with self._lock:
+            self.requests.append((time.monotonic(), path, status, seconds))
+
+    def summary(self):
+        """
+        Request count, count per status, served latency quantiles and the
+        most requests received in any one-second window.
+        """
+        with self._lock:
+            log = list(self.requests)
+        times = np.array([r[0] for r in log])
+        seconds = np.array([r[3] for r in log])
+        statuses = pd.Series([r[2] for r in log], dtype="int64")
+        peak = 0
+        if len(times):
+            times.sort()
+            peak = int((np.searchsorted(times, times + 1.0) - np.arange(len(times))).max())
+        return {
+            "requests": len(log),
+            "statuses": {int(k): int(v) for k, v in statuses.value_counts().items()},
+            "p50_seconds": float(np.percentile(seconds, 50)) if len(log) else 0.0,
+            "p99_seconds": float(np.percentile(seconds, 99)) if len(log) else 0.0,
+            "peak_requests_per_second": peak,
+        }
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self._thread.join()
+        self.server_close()
+
+@contextmanager
+def serving(server):
+    """
+    Serve server in the background and point EDGAR_BASE_URL at it, so
+    every throttle.sec_get goes to the stand-in instead of sec.gov.
+    """
+    previous = os.environ.get("EDGAR_BASE_URL")
+    with server:
+        os.environ["EDGAR_BASE_URL"] = server.url
+        try:
+            yield server
+        finally:
+            if previous is None:
+                os.environ.pop("EDGAR_BASE_URL", None)
+            else:
+                os.environ["EDGAR_BASE_URL"] = previous
+
+def fixture_quarters(fixture_dir=FIXTURE_DIR):
+    """(first, last) filing date of the saved filings, for a catalog range."""
+    dates = sorted(str(f.filing_date) for f in load_filings_from_dir(fixture_dir))
+    return dates[0], dates[-1]
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Serve the tests/data/nvda filings as a local EDGAR stand-in.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per response.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many more.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0,
+                        help="Share of requests answered 429.")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="Share of requests answered 500.")
+    parser.add_argument("--max-rate", type=float,
+                        help="Answer 429 above this many requests per second.")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    server = MockEdgarServer(port=args.port, latency=args.latency, jitter=args.jitter,
+                             throttle_rate=args.throttle_rate,
+                             failure_rate=args.failure_rate, max_rate=args.max_rate)
+    first, last = fixture_quarters()
+    print(f"Serving {len(server.documents)} documents at {server.url}")
+    print(f"  EDGAR_BASE_URL={server.url} python main.py catalog --path catalog.parquet "
+          f"--start {first} --end {last}")
+    print(f"  EDGAR_BASE_URL={server.url} python main.py crawl --catalog catalog.parquet "
+          f"--store store")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(server.summary(), indent=2))
@@ -0,0 +1,82 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from stock_lab.fetch import (
+    IXBRL_KIND, download_instance, parse_stored, parsed_kind, store_instance
+)
+from stock_lab.store import FilingStore, XBRL_KIND, open_filing_store
+from stock_lab.throttle import sec_get
+from stock_lab.utils import latest_quarters, load_filings_from_dir
+
+DEFAULT_FETCH_WORKERS = 8
+
+
+def _parse_into_store(store_dir, accession):
+    """Pool task: fill the parse cache for one stored instance."""
+    return len(parse_stored(open_filing_store(store_dir), accession))
+
+def prefetch(filings, store_dir, fetch_workers=DEFAULT_FETCH_WORKERS, parse_workers=None,
+             get=sec_get):
+    """
+    Warm a FilingStore so later extraction starts hot: download the XBRL
+    instance of every filing not stored yet on fetch_workers threads, and
+    as each arrives parse it into the store's parse cache (parse_stored)
+    on a pool of parse_workers processes, overlapping downloads with
+    parsing. Requests still go through get, so the SEC rate limit holds.
+    Filings already parsed are skipped; inline-only filings are only
+    marked in the store and left to filing_facts_df at extraction.
+    Returns counts plus a list of (accession_no, exception) failures.
+    """
+    summary = {"filings": 0, "cached": 0, "fetched": 0, "parsed": 0, "inline": 0,
+               "failures": []}
+    kind = parsed_kind()
+    # Spawned workers do not inherit the fetch threads' locks.
+    context = multiprocessing.get_context("spawn")
+    with FilingStore(store_dir) as store, \
+            ThreadPoolExecutor(fetch_workers) as fetch_pool, \
+            ProcessPoolExecutor(parse_workers, mp_context=context) as parse_pool:
+        downloads, parses = {}, {}
+
+        def parse(accession):
+            future = parse_pool.submit(_parse_into_store, str(store_dir), accession)
+            parses[future] = accession
+
+        for filing in filings:
+            summary["filings"] += 1
+            accession = filing.accession_no
+            if (accession, kind) in store:
+                summary["cached"] += 1
+            elif (accession, XBRL_KIND) in store:
+                parse(accession)
+            elif (accession, IXBRL_KIND) in store:
+                summary["inline"] += 1
+            else:
+                downloads[fetch_pool.submit(download_instance, filing, get)] = accession
+        for future in as_completed(downloads):
+            try:
+                result, data = future.result()
+            except Exception as e:
+                summary["failures"].append((downloads[future], e))
+                continue
+            store_instance(store, result, data)
+            summary["fetched"] += 1
+            if result.kind == XBRL_KIND:
+                parse(result.accession_no)
+            else:
+                summary["inline"] += 1
+        for future in as_completed(parses):
+            try:
+                future.result()
+                summary["parsed"] += 1
+            except Exception as e:
+                summary["failures"].append((parses[future], e))
+    return summary
+
+def prefetch_tickers(tickers, n, store_dir, **kwargs):
+    """prefetch of the n latest quarterly filings of each ticker."""
+    filings = [f for ticker in tickers for f in latest_quarters(ticker, n)]
+    return prefetch(filings, store_dir, **kwargs)
+
+def prefetch_dir(load_dir, store_dir, **kwargs):
+    """prefetch of the filings saved in load_dir by save_latest_quarters."""
+    return prefetch(load_filings_from_dir(load_dir), store_dir, **kwargs)
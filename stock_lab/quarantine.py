@@ -0,0 +1,137 @@
+import functools
+import sqlite3
+import time
+
+import pandas as pd
+
+from stock_lab.facts import FilingFacts, VALIDATOR_VERSION
+
+DEFAULT_TTL_SECONDS = 30 * 24 * 60 * 60
+QUARANTINE_COLUMNS = [
+    "accession", "cik", "fact_type", "error_class", "message",
+    "schema_hash", "validator_version", "failed_at", "attempts",
+]
+
+
+class QuarantineLedger():
+    """
+    Persistent negative cache of filings whose extraction failed with
+    MissingFact or InvalidFact.
+
+    A quarantined accession is skipped until its ttl expires or the
+    schema of the fact type it failed on changes (its fact_type_hash,
+    which covers the tags, validators and VALIDATOR_VERSION), so fixing
+    a tag list retries exactly the filings that failed on it.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL_SECONDS, facts_class=FilingFacts,
+                 clock=time.time):
+        self.ttl = ttl
+        self.clock = clock
+        self.hashes = facts_class.schema_hashes()
+        self.db = sqlite3.connect(path, timeout=60)
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS quarantine ("
+                " accession TEXT PRIMARY KEY,"
+                " cik INTEGER,"
+                " fact_type TEXT,"
+                " error_class TEXT NOT NULL,"
+                " message TEXT,"
+                " schema_hash TEXT,"
+                " validator_version INTEGER NOT NULL,"
+                " failed_at REAL NOT NULL,"
+                " attempts INTEGER NOT NULL DEFAULT 1)"
+            )
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, accession, cik, error):
+        """
+        Quarantine an accession after error, counting repeated failures.
+        """
+        fact_type = getattr(error, "fact_type", None)
+        with self.db:
+            self.db.execute(
+                "INSERT INTO quarantine VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)"
+                " ON CONFLICT(accession) DO UPDATE SET"
+                " cik = excluded.cik,"
+                " fact_type = excluded.fact_type,"
+                " error_class = excluded.error_class,"
+                " message = excluded.message,"
+                " schema_hash = excluded.schema_hash,"
+                " validator_version = excluded.validator_version,"
+                " failed_at = excluded.failed_at,"
+                " attempts = attempts + 1",
+                (accession, int(cik), fact_type, type(error).__name__,
+                 str(error)[:1000], self.hashes.get(fact_type), VALIDATOR_VERSION,
+                 self.clock())
+            )
+
+    def release(self, accession):
+        """Forget an accession, e.g. once it extracts cleanly."""
+        with self.db:
+            self.db.execute("DELETE FROM quarantine WHERE accession = ?", (accession,))
+
+    def _is_active(self, fact_type, schema_hash, validator_version, failed_at):
+        if failed_at + self.ttl <= self.clock():
+            return False
+        if validator_version != VALIDATOR_VERSION:
+            return False
+        if fact_type is None:
+            return True
+        return self.hashes.get(fact_type) == schema_hash
+
+    def active(self, accessions):
+        """The subset of accessions that should still be skipped."""
+        accessions = list(accessions)
+        if not accessions:
+            return set()
+        marks = ",".join("?" * len(accessions))
+        rows = self.db.execute(
+            "SELECT accession, fact_type, schema_hash, validator_version, failed_at"
+            f" FROM quarantine WHERE accession IN ({marks})",
+            accessions
+        )
+        return {r[0] for r in rows if self._is_active(*r[1:])}
+
+    def listing(self):
+        """
+        Every quarantined filing, newest failure first, with an active
+        column telling whether it is still being skipped.
+        """
+        df = pd.read_sql_query(
+            f"SELECT {', '.join(QUARANTINE_COLUMNS)} FROM quarantine"
+            " ORDER BY failed_at DESC",
+            self.db
+        )
+        df["active"] = [
+            self._is_active(*row)
+            for row in df[["fact_type", "schema_hash", "validator_version",
+                           "failed_at"]].itertuples(index=False)
+        ]
+        df["failed_at"] = pd.to_datetime(df["failed_at"], unit="s", utc=True)
+        return df
+
+    def summary(self):
+        """Quarantined filing counts per (fact_type, error_class) for bulk triage."""
+        df = self.listing()
+        return (
+            df.groupby(["fact_type", "error_class"], dropna=False)
+            .agg(filings=("accession", "size"), active=("active", "sum"),
+                 companies=("cik", "nunique"), last_failed=("failed_at", "max"))
+            .sort_values("filings", ascending=False)
+            .reset_index()
+        )
+
+@functools.lru_cache(maxsize=None)
+def open_quarantine(path):
+    """One QuarantineLedger per process and path, for pool workers."""
+    return QuarantineLedger(path)
@@ -0,0 +1,132 @@
+import heapq
+import itertools
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+WATCHLIST = "watchlist"
+RECENT = "recent"
+STALE = "stale"
+BACKFILL = "backfill"
+# Share of the request budget each class gets while it has work queued.
+DEFAULT_WEIGHTS = {
+    WATCHLIST: 4,
+    RECENT: 3,
+    STALE: 2,
+    BACKFILL: 1,
+}
+
+
+class PriorityScheduler():
+    """
+    Orders companies by class and priority while sharing the request
+    budget fairly among classes.
+
+    Each class keeps its own min-heap of (priority, cik). Classes are
+    served by weighted fair queueing: popping a company advances its
+    class's virtual clock by cost / weight, and the next pop comes from
+    the non-empty class with the earliest clock. With weights 4:1, the
+    watchlist gets four times the requests of backfill, yet backfill is
+    never starved. cost is the company's expected request count.
+    """
+
+    def __init__(self, weights=None):
+        self.weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+        self.heaps = {name: [] for name in self.weights}
+        self.vtime = {name: 0.0 for name in self.weights}
+        self.spent = {name: 0.0 for name in self.weights}
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return sum(len(heap) for heap in self.heaps.values())
+
+    def push(self, cik, klass, priority=0.0, cost=1.0):
+        """Queue a company; lower priority values are served first."""
+        heap = self.heaps[klass]
+        if not heap:
+            # A class that was idle starts at the current virtual time
+            # instead of cashing in the budget it did not use.
+            busy = [self.vtime[k] for k, h in self.heaps.items() if h]
+            self.vtime[klass] = max(self.vtime[klass], min(busy, default=0.0))
+        heapq.heappush(heap, (priority, next(self._counter), cik, cost))
+
+    def pop(self):
+        """Next (cik, class) to process. Raises IndexError when empty."""
+        ready = [k for k, heap in self.heaps.items() if heap]
+        if not ready:
+            raise IndexError("pop from an empty scheduler")
+        klass = min(ready, key=lambda k: (self.vtime[k], -self.weights[k]))
+        _, _, cik, cost = heapq.heappop(self.heaps[klass])
+        self.vtime[klass] += cost / self.weights[klass]
+        self.spent[klass] += cost
+        return cik, klass
+
+    def __iter__(self):
+        while len(self):
+            yield self.pop()
+
+def stored_at(out_dir):
+    """Series of last-written time per CIK from out_dir/<cik>.parquet files."""
+    times = {}
+    for p in Path(out_dir).glob("*.parquet"):
+        stem = p.stem.split("-", 1)[0]
+        if stem.isdigit():
+            mtime = pd.Timestamp(p.stat().st_mtime, unit="s", tz="UTC")
+            times[int(stem)] = max(mtime, times.get(int(stem), mtime))
+    return pd.Series(times, dtype="datetime64[ns, UTC]")
+
+def classify_companies(companies, watchlist=(), now=None, recent_days=7, stale_days=90):
+    """
+    Assign each company a class, a priority and a request cost.
+
+    companies: frame with a cik column and optionally last_filed (latest
+    acceptance/filing date), last_stored (when its facts were last
+    written; null if never) and filings (expected filings to extract).
+    Classes are, in order of precedence:
+    - watchlist: in watchlist, most stale first
+    - recent: filed something after it was last stored within recent_days,
+      newest filing first
+    - stale: stored more than stale_days ago or never, most stale first
+    - backfill: everything else, most stale first
+    Returns companies with klass, priority and cost columns added.
+    """
+    now = pd.Timestamp.now(tz="UTC") if now is None else pd.Timestamp(now)
+    df = companies.copy()
+    for column in ["last_filed", "last_stored"]:
+        if column not in df.columns:
+            df[column] = pd.NaT
+        df[column] = pd.to_datetime(df[column], utc=True)
+    if "filings" not in df.columns:
+        df["filings"] = 1
+
+    age = (now - df["last_stored"]).dt.total_seconds().to_numpy()
+    age = np.where(np.isnan(age), np.inf, age)
+    filed_age = (now - df["last_filed"]).dt.total_seconds().to_numpy()
+    unseen_filing = df["last_filed"].notna() & (
+        df["last_stored"].isna() | (df["last_filed"] > df["last_stored"]))
+
+    watched = df["cik"].isin(list(watchlist)).to_numpy()
+    recent = (unseen_filing.to_numpy()
+              & (filed_age <= recent_days * 86400) & ~watched)
+    stale = (age > stale_days * 86400) & ~watched & ~recent
+    df["klass"] = np.select([watched, recent, stale],
+                            [WATCHLIST, RECENT, STALE], BACKFILL)
+    # Heaps pop the smallest value: newest filing first for recent,
+    # oldest stored data first for everything else.
+    df["priority"] = np.where(recent, filed_age, -age)
+    # One submissions request per company plus one per filing.
+    df["cost"] = 1 + df["filings"].fillna(0).astype(float)
+    return df
+
+def schedule_companies(companies, watchlist=(), weights=None, now=None, **classify_kwargs):
+    """
+    PriorityScheduler loaded with classify_companies(companies, ...).
+    Iterate it for the processing order.
+    """
+    df = classify_companies(companies, watchlist, now, **classify_kwargs)
+    scheduler = PriorityScheduler(weights)
+    for cik, klass, priority, cost in df[["cik", "klass", "priority", "cost"]].itertuples(
+            index=False):
+        scheduler.push(int(cik), klass, priority, cost)
+    return scheduler
@@ -0,0 +1,280 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from stock_lab.asof import AsOfIndex
+from stock_lab.crawl import load_fact_store
+from stock_lab.facts import concat_facts
+from stock_lab.telemetry import Histogram
+
+SERVE_LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error"}
+MAX_HEADER_LINES = 100
+
+
+class QueryError(Exception):
+    """Thrown when a request's path or parameters are not understood."""
+    pass
+
+class NotFound(Exception):
+    """Thrown when a request names data the fact store does not have."""
+    pass
+
+def _frame_json(df):
+    return df.to_json(orient="records", date_format="iso").encode()
+
+def _timestamp(value):
+    """value as a Timestamp; unparseable dates are the client's error."""
+    try:
+        return pd.Timestamp(value)
+    except ValueError as e:
+        raise QueryError(f"Bad date: {value}") from e
+
+class FactService():
+    """
+    Read-only queries over a fact store directory (process_company output)
+    with an in-memory hot set.
+
+    Encoded responses are kept in an LRU of max_entries. Concurrent
+    identical queries are coalesced: the first computes in a worker
+    thread and the others await the same result. Company histories are
+    keyed by the mtimes of its files (the crawl's <cik>.parquet and the
+    feed's <cik>-<accession>.parquet), so new filings are served fresh.
+    Cross-sections use an AsOfIndex of the whole store, built by one
+    thread at a time and rebuilt when store_version() changes, which also
+    keys their cached responses. reload() drops the index and the cache.
+    """
+
+    def __init__(self, facts_dir, max_entries=1024):
+        self.facts_dir = Path(facts_dir)
+        self.max_entries = max_entries
+        self.cache = OrderedDict()
+        self.in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._index = None
+        self._index_version = None
+        self._index_lock = threading.Lock()
+
+    def reload(self):
+        self.cache.clear()
+        with self._index_lock:
+            self._index = None
+            self._index_version = None
+
+    def store_version(self):
+        """Hash of the name and mtime of every stored file."""
+        with os.scandir(self.facts_dir) as entries:
+            files = sorted((e.name, e.stat().st_mtime_ns) for e in entries
+                           if e.name.endswith(".parquet"))
+        return hash(tuple(files))
+
+    async def query(self, key, compute):
+        """Cached, coalesced result of compute() (run in a thread) for key."""
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return self.cache[key]
+        if key in self.in_flight:
+            self.coalesced += 1
+            return await asyncio.shield(self.in_flight[key])
+        self.misses += 1
+        task = asyncio.ensure_future(asyncio.to_thread(compute))
+        self.in_flight[key] = task
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            self.in_flight.pop(key, None)
+        self.cache[key] = result
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+        return result
+
+    def _build_index(self):
+        with self._index_lock:
+            version = self.store_version()
+            if self._index is None or self._index_version != version:
+                self._index = AsOfIndex(load_fact_store(self.facts_dir))
+                self._index_version = version
+            return self._index
+
+    def company_files(self, cik):
+        """The crawl's and the feed's stored files of a company."""
+        paths = sorted(self.facts_dir.glob(f"{cik}-*.parquet"))
+        path = self.facts_dir/f"{cik}.parquet"
+        return [path] + paths if path.exists() else paths
+
+    async def history(self, cik, fact_type=None, as_of=None):
+        """
+        Every stored fact of a company, optionally of one fact_type, or as
+        it was known at as_of.
+        """
+        as_of = None if as_of is None else _timestamp(as_of)
+        paths = self.company_files(cik)
+        try:
+            mtimes = tuple((p.name, p.stat().st_mtime_ns) for p in paths)
+        except FileNotFoundError:
+            mtimes = ()
+        if not mtimes:
+            raise NotFound(f"No facts stored for CIK {cik}")
+
+        def compute():
+            if as_of is not None:
+                index = self._build_index()
+                df = index.history_as_of(
+                    as_of, [cik], None if fact_type is None else [fact_type])
+            else:
+                df = concat_facts([pd.read_parquet(path) for path in paths])
+                if fact_type is not None:
+                    df = df.loc[df["fact_type"] == fact_type]
+            return _frame_json(df)
+        return await self.query(
+            ("history", cik, fact_type, as_of, mtimes), compute)
+
+    async def cross_section(self, fact_type, date=None):
+        """Latest known value of fact_type for every company at date (default now)."""
+        date = pd.Timestamp.now(tz="UTC").floor("D") if date is None else _timestamp(date)
+        version = self.store_version()
+
+        def compute():
+            df = self._build_index().as_of([date], fact_types=[fact_type])
+            return _frame_json(df.dropna(subset=["value"]).reset_index(drop=True))
+        return await self.query(("cross_section", fact_type, str(date), version), compute)
+
+    def stats(self):
+        return {
+            "entries": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "in_flight": len(self.in_flight),
+        }
+
+class FactServer():
+    """
+    Minimal asyncio HTTP/1.1 JSON API over a FactService:
+    - GET /companies/<cik>/facts[?fact_type=...&as_of=...]
+    - GET /cross_section?fact_type=...[&date=...]
+    - GET /metrics: cache stats and per-route latency p50/p95/p99
+    - GET /health
+    Everything is served from local files; nothing is fetched.
+    """
+
+    def __init__(self, service, host="127.0.0.1", port=8080):
+        self.service = service
+        self.host = host
+        self.port = port
+        self.latencies = {}
+        self.requests = 0
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def route(self, path, params):
+        """(route name, JSON body bytes) for a GET of path."""
+        parts = [p for p in path.split("/") if p]
+        if parts == ["health"]:
+            return "health", b'{"status": "ok"}'
+        if parts == ["metrics"]:
+            return "metrics", json.dumps(self.metrics()).encode()
+        if len(parts) == 3 and parts[0] == "companies" and parts[2] == "facts":
+            if not parts[1].isdigit():
+                raise QueryError(f"Bad CIK: {parts[1]}")
+            body = await self.service.history(
+                int(parts[1]), params.get("fact_type"), params.get("as_of"))
+            return "history", body
+        if parts == ["cross_section"]:
+            if "fact_type" not in params:
+                raise QueryError("fact_type is required")
+            body = await self.service.cross_section(params["fact_type"], params.get("date"))
+            return "cross_section", body
+        raise NotFound(f"No route for {path}")
+
+    async def _respond(self, method, target):
+        """(status, route name, body) for one request."""
+        if method != "GET":
+            return 405, "error", b'{"error": "GET only"}'
+        url = urlsplit(target)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            name, body = await self.route(url.path, params)
+            return 200, name, body
+        except QueryError as e:
+            return 400, "error", json.dumps({"error": str(e)}).encode()
+        except NotFound as e:
+            return 404, "error", json.dumps({"error": str(e)}).encode()
+        except Exception as e:
+            return 500, "error", json.dumps({"error": repr(e)}).encode()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                started = time.perf_counter()
+                method, target, version = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                for _ in range(MAX_HEADER_LINES):
+                    header = await reader.readline()
+                    if not header.strip():
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                status, name, body = await self._respond(method, target)
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version.strip() == "HTTP/1.1")
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                    "\r\n".encode() + body
+                )
+                await writer.drain()
+                self.requests += 1
+                self.latencies.setdefault(name, Histogram(SERVE_LATENCY_BUCKETS)).observe(
+                    time.perf_counter() - started)
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def metrics(self):
+        return {
+            "requests": self.requests,
+            "cache": self.service.stats(),
+            "latency": {name: h.snapshot() for name, h in self.latencies.items()},
+        }
+
+def serve(facts_dir, host="127.0.0.1", port=8080, max_entries=1024):
+    """Run a FactServer over facts_dir until interrupted."""
+    server = FactServer(FactService(facts_dir, max_entries), host, port)
+    asyncio.run(server.serve_forever())
@@ -0,0 +1,231 @@
+import fcntl
+import functools
+import hashlib
+import pickle
+import sqlite3
+from pathlib import Path
+
+import zstandard
+
+FILING_KIND = "filing"
+XBRL_KIND = "xbrl"
+
+
+class DocumentNotFound(KeyError):
+    """Thrown when the store holds no document for an accession and kind."""
+    pass
+
+class FilingStore():
+    """
+    Compressed, content-addressed store for raw filing documents.
+
+    Each document is zstd compressed on its own and appended to a pack file,
+    so millions of filings live in a handful of files while any single
+    document can still be read with one seek. Documents are deduplicated by
+    the sha256 of their uncompressed bytes and indexed by
+    (accession number, kind) in a SQLite index next to the packs.
+
+    Kinds used by stock_lab are "filing" (a pickled edgar Filing) and
+    "xbrl" (the XBRL instance document), but any kind string may be stored.
+    """
+
+    def __init__(self, root, level=10, max_pack_bytes=1 << 30):
+        self.root = Path(root)
+        self.pack_dir = self.root/"packs"
+        self.pack_dir.mkdir(parents=True, exist_ok=True)
+        self.lock_path = self.root/"store.lock"
+        self.lock_path.touch(exist_ok=True)
+        self.max_pack_bytes = max_pack_bytes
+        self.compressor = zstandard.ZstdCompressor(level=level)
+        self.decompressor = zstandard.ZstdDecompressor()
+        self.db = sqlite3.connect(self.root/"index.sqlite", timeout=60)
+        with self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                " digest TEXT PRIMARY KEY,"
+                " pack INTEGER NOT NULL,"
+                " offset INTEGER NOT NULL,"
+                " length INTEGER NOT NULL,"
+                " raw_length INTEGER NOT NULL)"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " accession TEXT NOT NULL,"
+                " kind TEXT NOT NULL,"
+                " digest TEXT NOT NULL REFERENCES blobs(digest),"
+                " PRIMARY KEY (accession, kind))"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS transfers ("
+                " accession TEXT PRIMARY KEY,"
+                " document TEXT NOT NULL,"
+                " wire_bytes INTEGER NOT NULL,"
+                " raw_bytes INTEGER NOT NULL,"
+                " package_bytes INTEGER NOT NULL)"
+            )
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, key):
+        accession, kind = key if isinstance(key, tuple) else (key, FILING_KIND)
+        row = self.db.execute(
+            "SELECT 1 FROM documents WHERE accession = ? AND kind = ?",
+            (accession, kind)
+        ).fetchone()
+        return row is not None
+
+    def _pack_path(self, pack):
+        return self.pack_dir/f"pack-{pack:05d}.zst"
+
+    def _current_pack(self):
+        """Newest pack number, rolling over once it reaches max_pack_bytes."""
+        row = self.db.execute("SELECT MAX(pack) FROM blobs").fetchone()
+        pack = row[0] or 0
+        path = self._pack_path(pack)
+        if path.exists() and path.stat().st_size >= self.max_pack_bytes:
+            pack += 1
+        return pack
+
+    def put(self, accession, kind, data):
+        """
+        Store data for (accession, kind), replacing any previous mapping.
+        Bytes already present under the same digest are not written again.
+        Returns the sha256 digest of data.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        with open(self.lock_path, "r+") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with self.db:
+                    known = self.db.execute(
+                        "SELECT 1 FROM blobs WHERE digest = ?", (digest,)
+                    ).fetchone()
+                    if known is None:
+                        self._append_blob(digest, data)
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO documents VALUES (?, ?, ?)",
+                        (accession, kind, digest)
+                    )
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return digest
+
+    def _append_blob(self, digest, data):
+        compressed = self.compressor.compress(data)
+        pack = self._current_pack()
+        with open(self._pack_path(pack), "ab") as f:
+            offset = f.tell()
+            f.write(compressed)
+        self.db.execute(
+            "INSERT INTO blobs VALUES (?, ?, ?, ?, ?)",
+            (digest, pack, offset, len(compressed), len(data))
+        )
+
+    def get(self, accession, kind):
+        """
+        Read back the document for (accession, kind) without touching any
+        other document in its pack.
+        """
+        row = self.db.execute(
+            "SELECT b.pack, b.offset, b.length, b.raw_length"
+            " FROM documents d JOIN blobs b ON d.digest = b.digest"
+            " WHERE d.accession = ? AND d.kind = ?",
+            (accession, kind)
+        ).fetchone()
+        if row is None:
+            raise DocumentNotFound(f"No {kind} document for {accession}")
+        pack, offset, length, raw_length = row
+        with open(self._pack_path(pack), "rb") as f:
+            f.seek(offset)
+            compressed = f.read(length)
+        return self.decompressor.decompress(compressed, max_output_size=raw_length)
+
+    def accessions(self, kind=FILING_KIND):
+        """Returns sorted accession numbers that have a document of kind."""
+        rows = self.db.execute(
+            "SELECT accession FROM documents WHERE kind = ? ORDER BY accession",
+            (kind,)
+        )
+        return [r[0] for r in rows]
+
+    def stats(self):
+        """Document count, unique blobs and raw vs stored byte totals."""
+        documents = self.db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        blobs, raw, stored = self.db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(raw_length), 0), COALESCE(SUM(length), 0)"
+            " FROM blobs"
+        ).fetchone()
+        return {
+            "documents": documents,
+            "blobs": blobs,
+            "raw_bytes": raw,
+            "stored_bytes": stored,
+        }
+
+    def record_transfer(self, accession, document, wire_bytes, raw_bytes, package_bytes):
+        """
+        Log what fetching a filing cost on the wire against the size of
+        its full package.
+        """
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO transfers VALUES (?, ?, ?, ?, ?)",
+                (accession, document, wire_bytes, raw_bytes, package_bytes)
+            )
+
+    def transfer_stats(self):
+        """Filings fetched and wire, raw and full-package byte totals."""
+        filings, wire, raw, package = self.db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(wire_bytes), 0),"
+            " COALESCE(SUM(raw_bytes), 0), COALESCE(SUM(package_bytes), 0)"
+            " FROM transfers"
+        ).fetchone()
+        return {
+            "filings": filings,
+            "wire_bytes": wire,
+            "raw_bytes": raw,
+            "package_bytes": package,
+            "bytes_saved": max(package - wire, 0),
+        }
+
+    def put_filing(self, filing):
+        """Store a pickled edgar Filing under its accession number."""
+        return self.put(filing.accession_no, FILING_KIND, pickle.dumps(filing))
+
+    def get_filing(self, accession):
+        """Load a single edgar Filing by accession number."""
+        return pickle.loads(self.get(accession, FILING_KIND))
+
+    def put_xbrl(self, accession, data):
+        """Store the XBRL instance document for an accession."""
+        return self.put(accession, XBRL_KIND, data)
+
+    def get_xbrl(self, accession):
+        """Read the XBRL instance document for an accession."""
+        return self.get(accession, XBRL_KIND)
+
+    def import_pickles(self, load_dir):
+        """
+        Migrate Filing .pkl files written by save_latest_quarters into the store.
+        Returns the accession numbers imported.
+        """
+        imported = []
+        for p in sorted(Path(load_dir).glob("*.pkl")):
+            data = p.read_bytes()
+            accession = pickle.loads(data).accession_no
+            self.put(accession, FILING_KIND, data)
+            imported.append(accession)
+        return imported
+
+@functools.lru_cache(maxsize=None)
+def open_filing_store(root):
+    """One FilingStore per process and root, for pool workers."""
+    return FilingStore(root)
@@ -0,0 +1,93 @@
+import functools
+import sqlite3
+import time
+
+import pandas as pd
+
+from stock_lab.facts import FilingFacts
+
+# Stored in place of a tag when no configured tag matched.
+NO_MATCH = ""
+
+
+class TagStats():
+    """
+    Persistent record of which configured tag matched, per fact type and
+    filer, summarized across the universe by coverage().
+    """
+
+    def __init__(self, path, facts_class=FilingFacts, clock=time.time):
+        self.facts_class = facts_class
+        self.clock = clock
+        self.db = sqlite3.connect(path, timeout=60)
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS tag_hits ("
+                " cik INTEGER NOT NULL,"
+                " fact_type TEXT NOT NULL,"
+                " tag TEXT NOT NULL,"
+                " hits INTEGER NOT NULL,"
+                " last_accession TEXT,"
+                " last_seen REAL NOT NULL,"
+                " PRIMARY KEY (cik, fact_type, tag))"
+            )
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, cik, accession, matched=None, missing=()):
+        """
+        Count one filing's outcome: matched is {fact_type: tag}, missing
+        the fact types no tag matched.
+        """
+        cik = int(cik)
+        matched = dict(matched or {})
+        outcomes = list(matched.items()) + [(f, NO_MATCH) for f in missing]
+        now = self.clock()
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO tag_hits VALUES (?, ?, ?, 1, ?, ?)"
+                " ON CONFLICT(cik, fact_type, tag) DO UPDATE SET"
+                " hits = hits + 1,"
+                " last_accession = excluded.last_accession,"
+                " last_seen = excluded.last_seen",
+                [(cik, fact_type, tag, accession, now) for fact_type, tag in outcomes]
+            )
+
+    def record_rows(self, cik, accession, rows_df):
+        """record the tags behind a get_rows result."""
+        self.record(cik, accession, dict(zip(rows_df["fact_type"], rows_df["concept"])))
+
+    def coverage(self):
+        """
+        Universe-wide tag coverage: per fact type and tag (NO_MATCH for
+        none), its configured priority, the filings and companies it
+        matched and its share of the fact type's filings.
+        """
+        df = pd.read_sql_query(
+            "SELECT fact_type, tag, SUM(hits) AS filings,"
+            " COUNT(DISTINCT cik) AS companies FROM tag_hits GROUP BY fact_type, tag",
+            self.db
+        )
+        priority = {
+            (fact_type, tag): i
+            for fact_type, gaap_dict in self.facts_class.gaap_tags.items()
+            for i, tag in enumerate(gaap_dict["tags"])
+        }
+        df["priority"] = pd.array(
+            [priority.get(key) for key in zip(df["fact_type"], df["tag"])], dtype="Int64")
+        df["share"] = df["filings"] / df.groupby("fact_type")["filings"].transform("sum")
+        df = df.sort_values(["fact_type", "filings"], ascending=[True, False],
+                            ignore_index=True)
+        return df[["fact_type", "tag", "priority", "filings", "companies", "share"]]
+
+@functools.lru_cache(maxsize=None)
+def open_tag_stats(path):
+    """One TagStats per process and path, for pool workers."""
+    return TagStats(path)
@@ -0,0 +1,273 @@
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+from tqdm import tqdm
+
+from stock_lab.throttle import SEC_MAX_REQUESTS_PER_SECOND, request_listeners
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+
+class Histogram():
+    """
+    Fixed-bucket latency histogram (seconds). Bucket i counts observations
+    <= LATENCY_BUCKETS[i]; the final bucket counts everything slower.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def merge(self, other):
+        """Add the observations of other, a Histogram with the same buckets."""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], self.counts)),
+        }
+
+class CrawlTelemetry():
+    """
+    Crawl-level progress and throughput metrics.
+
+    Tracks companies and filings done (with ETA), SEC request rate against
+    the rate-limit ceiling, cache hit ratio, per-stage queue depths and
+    latency histograms per stage (fetch/parse/extract). A live tqdm bar
+    shows progress, and a background thread rewrites metrics_path as JSON
+    every interval seconds for dashboards.
+    Requests made through throttle.sec_get are counted once attach() is called.
+    Worker processes keep their own CrawlTelemetry and send export() back
+    to the parent, which merge()s it.
+    """
+
+    def __init__(
+            self,
+            total=None,
+            metrics_path=None,
+            interval=10,
+            rate_ceiling=SEC_MAX_REQUESTS_PER_SECOND,
+            rate_window=60,
+            progress=True,
+            clock=time.monotonic):
+        self.total = total
+        self.metrics_path = Path(metrics_path) if metrics_path else None
+        self.interval = interval
+        self.rate_ceiling = rate_ceiling
+        self.rate_window = rate_window
+        self.clock = clock
+        self.started = clock()
+        self.done = 0
+        self.filings = 0
+        self.requests = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.queue_depths = {}
+        self.latencies = {}
+        self._request_times = deque()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.bar = tqdm(total=total, unit="company", disable=not progress)
+
+    def attach(self):
+        """Count every request made through throttle.sec_get."""
+        request_listeners.append(self._on_request)
+
+    def detach(self):
+        if self._on_request in request_listeners:
+            request_listeners.remove(self._on_request)
+
+    def _on_request(self, response):
+        self.record_request()
+
+    def record_request(self, n=1):
+        now = self.clock()
+        with self._lock:
+            self.requests += n
+            self._request_times.extend([now] * n)
+
+    def record_cache(self, hit):
+        with self._lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def record_filing(self, n=1):
+        with self._lock:
+            self.filings += n
+
+    def set_queue_depth(self, stage, depth):
+        with self._lock:
+            self.queue_depths[stage] = depth
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            self.latencies.setdefault(stage, Histogram()).observe(seconds)
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block into the latency histogram for name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def export(self):
+        """
+        Picklable counters and latency histograms recorded so far, for
+        merge() into another process's telemetry.
+        """
+        with self._lock:
+            return {
+                "filings": self.filings,
+                "requests": self.requests,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "latencies": {stage: hist for stage, hist in self.latencies.items()},
+            }
+
+    def merge(self, metrics):
+        """
+        Add an export() from another process. Its requests count towards
+        the request rate as of now.
+        """
+        self.record_request(metrics["requests"])
+        with self._lock:
+            self.filings += metrics["filings"]
+            self.cache_hits += metrics["cache_hits"]
+            self.cache_misses += metrics["cache_misses"]
+            for stage, hist in metrics["latencies"].items():
+                self.latencies.setdefault(stage, Histogram(hist.buckets)).merge(hist)
+
+    def advance(self, n=1):
+        """Mark n companies (units of total) done and refresh the bar."""
+        with self._lock:
+            self.done += n
+        self.bar.update(n)
+        self.bar.set_postfix(
+            filings_s=f"{self.filings_per_second():.2f}",
+            req_s=f"{self.request_rate():.1f}/{self.rate_ceiling}",
+            refresh=False,
+        )
+
+    def elapsed(self):
+        return self.clock() - self.started
+
+    def filings_per_second(self):
+        elapsed = self.elapsed()
+        return self.filings / elapsed if elapsed else 0.0
+
+    def request_rate(self):
+        """Requests per second over the trailing rate_window seconds."""
+        now = self.clock()
+        with self._lock:
+            while self._request_times and self._request_times[0] < now - self.rate_window:
+                self._request_times.popleft()
+            recent = len(self._request_times)
+        window = min(self.rate_window, max(now - self.started, 1e-9))
+        return recent / window
+
+    def eta_seconds(self):
+        """Seconds until done at the average rate so far, None if unknown."""
+        if not self.total or not self.done:
+            return None
+        return self.elapsed() / self.done * (self.total - self.done)
+
+    def snapshot(self):
+        request_rate = self.request_rate()
+        with self._lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                "timestamp": time.time(),
+                "elapsed_seconds": self.elapsed(),
+                "done": self.done,
+                "total": self.total,
+                "filings": self.filings,
+                "filings_per_second": self.filings_per_second(),
+                "eta_seconds": self.eta_seconds(),
+                "requests": self.requests,
+                "request_rate": request_rate,
+                "rate_ceiling": self.rate_ceiling,
+                "rate_utilization": request_rate / self.rate_ceiling,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "cache_hit_ratio": self.cache_hits / lookups if lookups else None,
+                "queue_depths": dict(self.queue_depths),
+                "latency": {
+                    stage: hist.snapshot() for stage, hist in self.latencies.items()
+                },
+            }
+
+    def write_metrics(self):
+        """Atomically replace metrics_path with the current snapshot."""
+        if self.metrics_path is None:
+            return
+        self.metrics_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.metrics_path.with_suffix(self.metrics_path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self.snapshot(), indent=2))
+        os.replace(tmp, self.metrics_path)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.write_metrics()
+
+    def start(self):
+        self.attach()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.detach()
+        self.write_metrics()
+        self.bar.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,260 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet
+
+from stock_lab.facts import FilingFacts
+
+TENSOR_FILE = "tensor.npy"
+MASK_FILE = "mask.npy"
+CIKS_FILE = "ciks.npy"
+QUARTERS_FILE = "quarters.npy"
+FACT_TYPES_FILE = "fact_types.npy"
+DAYS_PER_QUARTER = 365.25 / 4
+READ_COLUMNS = [
+    "cik", "fact_type", "value", "period_start", "period_end", "period_instant",
+    "acceptance_datetime", "is_dimensioned",
+]
+
+
+def period_months(dates):
+    """
+    Month of the month end nearest each datetime64, as months since
+    1970-01. 52/53-week fiscal periods end within days of a month end, so
+    NVDA's 2024-01-28 and 2025-01-26 both land on January.
+    """
+    dates = np.asarray(dates, dtype="datetime64[ns]")
+    shifted = (dates + np.timedelta64(15, "D")).astype("datetime64[M]")
+    months = shifted.astype(np.int64) - 1
+    return np.where(np.isnat(dates), np.iinfo(np.int64).min, months)
+
+def quarter_codes(dates):
+    """
+    Calendar quarter of the month end nearest each datetime64, as quarters
+    since 1970Q1, so a 52/53-week quarter ending 2023-07-01 counts as Q2.
+    """
+    return period_months(dates) // 3
+
+def quarter_labels(codes):
+    """'YYYYQn' labels of quarter_codes."""
+    return np.array([f"{1970 + c // 4}Q{c % 4 + 1}" for c in codes], dtype=str)
+
+def _period_dates(df):
+    """Period end of duration facts, else the instant."""
+    dates = df["period_end"]
+    if "period_instant" in df.columns:
+        dates = dates.fillna(df["period_instant"])
+    return dates.to_numpy("datetime64[ns]")
+
+def _accepted_ns(df):
+    """Acceptance times as int64 ns; rows without one count as the oldest."""
+    if "acceptance_datetime" not in df.columns:
+        return np.zeros(len(df), dtype=np.int64)
+    accepted = pd.to_datetime(df["acceptance_datetime"], utc=True)
+    accepted = accepted.dt.tz_localize(None).to_numpy("datetime64[ns]")
+    accepted_ns = accepted.astype(np.int64)
+    accepted_ns[np.isnat(accepted)] = np.iinfo(np.int64).min + 1
+    return accepted_ns
+
+def _quarter_rows(df):
+    """
+    Rows that each cover one quarter: instants, undimensioned durations of
+    about a quarter, and a fiscal fourth quarter derived as the annual
+    figure less the nine-month year-to-date figure with the same start,
+    since a 10-K reports no fourth quarter of its own.
+    Segment rows, half-year and nine-month figures, and annual figures
+    without their nine months are dropped. Derived fourth quarters of
+    per-share facts are only approximate.
+    Returns a frame of cik, fact_type, date, value, accepted_ns, derived.
+    """
+    rows = pd.DataFrame({
+        "cik": df["cik"].to_numpy(np.int64),
+        "fact_type": df["fact_type"].to_numpy(),
+        "date": _period_dates(df),
+        "value": pd.to_numeric(df["value"], errors="coerce").to_numpy(np.float64),
+        "accepted_ns": _accepted_ns(df),
+        "derived": False,
+    })
+    if "is_dimensioned" in df.columns:
+        rows = rows.loc[~df["is_dimensioned"].fillna(False).to_numpy(bool)]
+    if "period_start" not in df.columns:
+        return rows
+    start = df["period_start"].to_numpy("datetime64[ns]")[rows.index]
+    rows = rows.assign(start=start)
+    days = (rows["date"] - rows["start"]) / pd.Timedelta(1, "D")
+    spans = np.round(days / DAYS_PER_QUARTER)
+
+    keys = ["cik", "fact_type", "start"]
+    def latest(n_quarters):
+        latest = rows.loc[spans == n_quarters].sort_values("accepted_ns", kind="stable")
+        return latest.drop_duplicates(keys, keep="last")
+    year = latest(4).merge(latest(3), on=keys, suffixes=("", "_ytd"))
+    fourth = pd.DataFrame({
+        "cik": year["cik"],
+        "fact_type": year["fact_type"],
+        "date": year["date"],
+        "value": year["value"] - year["value_ytd"],
+        "accepted_ns": np.maximum(year["accepted_ns"], year["accepted_ns_ytd"]),
+        "derived": True,
+    })
+    quarters = rows.loc[rows["start"].isna() | (spans == 1)].drop(columns="start")
+    return pd.concat([quarters, fourth], ignore_index=True)
+
+def _cells(df, cik_index, q0, fact_index):
+    """
+    Flat tensor cell and value of the row chosen for each occupied cell,
+    among _quarter_rows. Where several rows land in one cell a reported
+    quarter beats a derived one, then the latest accepted row is kept.
+    """
+    rows = _quarter_rows(df)
+    dates = rows["date"].to_numpy("datetime64[ns]")
+    known = ~np.isnat(dates)
+    facts = rows["fact_type"].map(fact_index).to_numpy(np.float64)
+    known &= ~np.isnan(facts)
+    cik_rows = cik_index.get_indexer(rows["cik"].to_numpy())
+    known &= cik_rows >= 0
+    quarters = quarter_codes(dates) - q0
+    n_quarters, n_facts = cik_index.n_quarters, len(fact_index)
+    cell = (cik_rows * n_quarters + quarters) * n_facts + np.nan_to_num(facts).astype(np.int64)
+
+    # np.lexsort sorts by its last key first.
+    order = np.lexsort([-rows["accepted_ns"].to_numpy(), rows["derived"].to_numpy(), cell])
+    order = order[known[order]]
+    cell = cell[order]
+    first = np.ones(len(cell), dtype=bool)
+    first[1:] = cell[1:] != cell[:-1]
+    return cell[first], rows["value"].to_numpy()[order][first]
+
+class CikIndex():
+    """Row of each CIK in the tensor, by binary search on sorted CIKs."""
+
+    def __init__(self, ciks, n_quarters):
+        self.ciks = np.unique(np.asarray(ciks, dtype=np.int64))
+        self.n_quarters = n_quarters
+
+    def __len__(self):
+        return len(self.ciks)
+
+    def get_indexer(self, ciks):
+        ciks = np.asarray(ciks, dtype=np.int64)
+        rows = np.searchsorted(self.ciks, ciks)
+        rows[rows == len(self.ciks)] = 0
+        return np.where(self.ciks[rows] == ciks, rows, -1)
+
+def _fill(tensor, mask, df, cik_index, q0, fact_index):
+    cell, values = _cells(df, cik_index, q0, fact_index)
+    flat_tensor = tensor.reshape(-1)
+    flat_mask = mask.reshape(-1)
+    flat_tensor[cell] = values
+    flat_mask[cell] = ~np.isnan(values)
+
+def build_tensor(facts, fact_types=None, dtype=np.float64):
+    """
+    Dense (company x quarter x fact_type) array of a get_rows-style long
+    frame (cik, fact_type, value, period columns), built in one vectorized
+    scatter instead of a pivot.
+    Returns (tensor, mask, ciks, quarter labels, fact_types); mask is True
+    where a value is present, and absent cells are NaN.
+    """
+    fact_types = list(FilingFacts.gaap_tags) if fact_types is None else list(fact_types)
+    dates = _period_dates(facts)
+    quarters = quarter_codes(dates[~np.isnat(dates)])
+    q0 = quarters.min() if len(quarters) else 0
+    n_quarters = int(quarters.max() - q0 + 1) if len(quarters) else 0
+    cik_index = CikIndex(facts["cik"], n_quarters)
+    shape = (len(cik_index), n_quarters, len(fact_types))
+    tensor = np.full(shape, np.nan, dtype=dtype)
+    mask = np.zeros(shape, dtype=bool)
+    fact_index = {f: i for i, f in enumerate(fact_types)}
+    if len(quarters):
+        _fill(tensor, mask, facts, cik_index, q0, fact_index)
+    labels = quarter_labels(np.arange(q0, q0 + n_quarters))
+    return tensor, mask, cik_index.ciks, labels, np.array(fact_types, dtype=str)
+
+def _scan(paths):
+    """(CIKs, first quarter, last quarter) over company files, reading only dates."""
+    ciks, lo, hi = [], None, None
+    for path in paths:
+        schema = pyarrow.parquet.read_schema(path)
+        columns = [c for c in ["cik", "period_end", "period_instant"] if c in schema.names]
+        df = pd.read_parquet(path, columns=columns)
+        ciks.append(np.unique(df["cik"].to_numpy(np.int64)))
+        dates = _period_dates(df)
+        dates = dates[~np.isnat(dates)]
+        if len(dates):
+            codes = quarter_codes(dates)
+            lo = codes.min() if lo is None else min(lo, codes.min())
+            hi = codes.max() if hi is None else max(hi, codes.max())
+    ciks = np.concatenate(ciks) if ciks else np.array([], dtype=np.int64)
+    return ciks, lo, hi
+
+def _company_chunks(paths, chunk_companies):
+    """
+    Lists of paths covering chunk_companies companies each. A company's
+    files (<cik>.parquet and the feed's <cik>-<accession>.parquet) always
+    share a chunk, so its cells are chosen among all of its facts at once.
+    """
+    companies = {}
+    for path in paths:
+        companies.setdefault(path.stem.split("-", 1)[0], []).append(path)
+    groups = list(companies.values())
+    return [
+        [path for group in groups[start:start + chunk_companies] for path in group]
+        for start in range(0, len(groups), chunk_companies)
+    ]
+
+def export_tensor(facts_dir, out_dir, fact_types=None, dtype=np.float32,
+                  chunk_companies=500):
+    """
+    Write the dense tensor of every company file in facts_dir (as written
+    by process_company) into out_dir as memory-mapped .npy files:
+    tensor.npy (company x quarter x fact_type, NaN where absent),
+    mask.npy (True where present), and ciks.npy, quarters.npy and
+    fact_types.npy mapping each axis.
+    Companies are read chunk_companies at a time and scattered
+    straight into the memmap, so neither the long frame nor a pivot of
+    the whole universe is ever in memory.
+    Returns the tensor shape.
+    """
+    fact_types = list(FilingFacts.gaap_tags) if fact_types is None else list(fact_types)
+    paths = sorted(Path(facts_dir).glob("*.parquet"))
+    ciks, lo, hi = _scan(paths)
+    n_quarters = 0 if lo is None else int(hi - lo + 1)
+    q0 = 0 if lo is None else lo
+    cik_index = CikIndex(ciks, n_quarters)
+    shape = (len(cik_index), n_quarters, len(fact_types))
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tensor = np.lib.format.open_memmap(out_dir/TENSOR_FILE, "w+", dtype, shape)
+    mask = np.lib.format.open_memmap(out_dir/MASK_FILE, "w+", bool, shape)
+    tensor[:] = np.nan
+    mask[:] = False
+    fact_index = {f: i for i, f in enumerate(fact_types)}
+    for chunk in _company_chunks(paths, chunk_companies):
+        frames = []
+        for path in chunk:
+            schema = pyarrow.parquet.read_schema(path)
+            columns = [c for c in READ_COLUMNS if c in schema.names]
+            frames.append(pd.read_parquet(path, columns=columns))
+        _fill(tensor, mask, pd.concat(frames, ignore_index=True), cik_index, q0,
+              fact_index)
+    tensor.flush()
+    mask.flush()
+    del tensor, mask
+    np.save(out_dir/CIKS_FILE, cik_index.ciks)
+    np.save(out_dir/QUARTERS_FILE, quarter_labels(np.arange(q0, q0 + n_quarters)))
+    np.save(out_dir/FACT_TYPES_FILE, np.array(fact_types, dtype=str))
+    return shape
+
+def load_tensor(out_dir, mmap_mode="r"):
+    """(tensor, mask, ciks, quarters, fact_types) written by export_tensor."""
+    out_dir = Path(out_dir)
+    return (
+        np.load(out_dir/TENSOR_FILE, mmap_mode=mmap_mode),
+        np.load(out_dir/MASK_FILE, mmap_mode=mmap_mode),
+        np.load(out_dir/CIKS_FILE),
+        np.load(out_dir/QUARTERS_FILE),
+        np.load(out_dir/FACT_TYPES_FILE),
+    )
@@ -0,0 +1,261 @@
+import asyncio
+import fcntl
+import json
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+from edgar import httpclient
+
+SEC_MAX_REQUESTS_PER_SECOND = 10
+THROTTLE_STATUS_CODES = (429, 503)
+DEFAULT_STATE_PATH = Path(tempfile.gettempdir())/"stock_lab_sec_ratelimit.json"
+
+# Callables notified with every request sent to SEC (e.g. telemetry): sec_get
+# passes the response, requests made by edgartools pass None.
+request_listeners = []
+
+
+class ThrottledError(Exception):
+    """Thrown when SEC keeps throttling a request after all retries."""
+    pass
+
+class SharedRateLimiter():
+    """
+    Token bucket whose state lives in a file so that every process on the
+    host draws from the same request budget.
+    Access is serialized with an exclusive flock on the state file.
+
+    The refill rate adapts AIMD-style: a throttle response (429/503) cuts the
+    rate multiplicatively, pauses all processes and records a learned ceiling
+    just below the rate that got throttled. Successes add the rate back
+    linearly up to that ceiling, which itself relaxes slowly towards max_rate.
+    This keeps aggregate throughput just under the limit instead of
+    repeatedly overshooting it.
+    """
+
+    def __init__(
+            self,
+            state_path=DEFAULT_STATE_PATH,
+            max_rate=SEC_MAX_REQUESTS_PER_SECOND * 0.9,
+            min_rate=0.5,
+            burst=1,
+            decrease=0.5,
+            increase=0.05,
+            ceiling_margin=0.95,
+            ceiling_relax=0.01,
+            cooldown=1.0,
+            clock=time.time,
+            sleep=time.sleep):
+        self.state_path = Path(state_path)
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.burst = burst
+        self.decrease = decrease
+        self.increase = increase
+        self.ceiling_margin = ceiling_margin
+        self.ceiling_relax = ceiling_relax
+        self.cooldown = cooldown
+        self.clock = clock
+        self.sleep = sleep
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        self.state_path.touch(exist_ok=True)
+
+    def _initial_state(self, now):
+        return {
+            "tokens": float(self.burst),
+            "stamp": now,
+            "rate": self.max_rate,
+            "ceiling": self.max_rate,
+            "paused_until": 0.0,
+        }
+
+    def _update(self, func):
+        """
+        Lock the state file, refill the bucket, apply func(state, now)
+        and write the state back. Returns whatever func returns.
+        """
+        with open(self.state_path, "r+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                now = self.clock()
+                raw = f.read()
+                state = json.loads(raw) if raw.strip() else self._initial_state(now)
+                elapsed = max(0.0, now - state["stamp"])
+                state["tokens"] = min(
+                    float(self.burst), state["tokens"] + elapsed * state["rate"])
+                state["ceiling"] = min(
+                    self.max_rate, state["ceiling"] + elapsed * self.ceiling_relax)
+                state["stamp"] = now
+                result = func(state, now)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return result
+
+    def state(self):
+        """Returns a snapshot of the shared bucket state."""
+        return self._update(lambda state, now: dict(state))
+
+    def acquire(self):
+        """
+        Block until a request token is available and consume it.
+        Returns the total seconds spent waiting.
+        """
+        def take(state, now):
+            if now < state["paused_until"]:
+                return state["paused_until"] - now
+            if state["tokens"] >= 1:
+                state["tokens"] -= 1
+                return 0.0
+            return (1 - state["tokens"]) / state["rate"]
+
+        waited = 0.0
+        while True:
+            wait = self._update(take)
+            if wait <= 0:
+                return waited
+            self.sleep(wait)
+            waited += wait
+
+    def record_success(self):
+        """Additively raise the shared rate, up to the learned ceiling."""
+        def grow(state, now):
+            state["rate"] = min(state["ceiling"], state["rate"] + self.increase)
+        self._update(grow)
+
+    def record_throttle(self, retry_after=None):
+        """
+        Multiplicatively cut the shared rate, drop the learned ceiling just
+        below the rate that was throttled and pause every process for the
+        cooldown (or the server's Retry-After, if longer).
+        """
+        def shrink(state, now):
+            state["ceiling"] = max(
+                self.min_rate, state["rate"] * self.ceiling_margin)
+            state["rate"] = max(self.min_rate, state["rate"] * self.decrease)
+            state["tokens"] = 0.0
+            pause = max(self.cooldown, retry_after or 0)
+            state["paused_until"] = max(state["paused_until"], now + pause)
+        self._update(shrink)
+
+def backoff_delay(attempt, base=0.5, cap=30.0, retry_after=None):
+    """
+    Full-jitter exponential backoff for the given (0-based) retry attempt.
+    A server supplied Retry-After is treated as the minimum delay.
+    """
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after:
+        delay = max(delay, retry_after)
+    return delay
+
+def parse_retry_after(response):
+    """Returns the Retry-After header in seconds, or None if absent/unparseable."""
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+def sec_user_agent():
+    """
+    User-Agent SEC requires on every request, taken from the environment.
+    """
+    identity = os.getenv("EDGAR_IDENTITY")
+    if identity:
+        return identity
+    name = os.getenv("SEC_USER_AGENT_NAME", "")
+    email = os.getenv("SEC_USER_AGENT_EMAIL", "")
+    return f"{name} {email}".strip()
+
+def sec_url(path):
+    """
+    Absolute SEC url for path. Honors EDGAR_BASE_URL like edgartools does,
+    read on each call so a local stand-in server can be swapped in.
+    """
+    if path.startswith("http://") or path.startswith("https://"):
+        return path
+    base = os.getenv("EDGAR_BASE_URL", "https://www.sec.gov").rstrip("/")
+    return f"{base}/{path.lstrip('/')}"
+
+_default_limiter = None
+
+def default_limiter():
+    """Returns the host-wide limiter shared by every stock_lab process."""
+    global _default_limiter
+    if _default_limiter is None:
+        _default_limiter = SharedRateLimiter()
+    return _default_limiter
+
+class EdgarLimiter():
+    """
+    Stand-in for the pyrate_limiter Limiter edgartools' HTTP client takes
+    tokens from, drawing them from a SharedRateLimiter instead. Cached
+    responses never reach the limiter, so only real requests are counted.
+    """
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+
+    def try_acquire(self, name="", weight=1):
+        for _ in range(weight):
+            self.limiter.acquire()
+            for listener in request_listeners:
+                listener(None)
+        return True
+
+    async def try_acquire_async(self, name="", weight=1):
+        return await asyncio.to_thread(self.try_acquire, name, weight)
+
+def route_edgar_requests(limiter=None):
+    """
+    Make edgartools take its request tokens from limiter (the host-wide
+    default_limiter if None) instead of its own per-process bucket, which
+    would let N workers send N times the budget. Must run in every process
+    that calls edgartools; repeated calls are cheap no-ops.
+    edgartools still handles throttle responses to its own requests.
+    """
+    limiter = limiter or default_limiter()
+    manager = httpclient.HTTP_MGR
+    current = manager.rate_limiter
+    if isinstance(current, EdgarLimiter) and current.limiter is limiter:
+        return
+    manager.rate_limiter = EdgarLimiter(limiter)
+    manager.rate_limiter_enabled = True
+    # The client is built once with its transport, so rebuild it.
+    manager.close()
+
+def sec_get(path, limiter=None, session=None, max_retries=5, sleep=time.sleep, **kwargs):
+    """
+    GET an SEC url through the shared rate limiter.
+    Throttle responses (429/503) are reported to the limiter and retried
+    with jittered exponential backoff; raises ThrottledError when retries
+    are exhausted. Other HTTP errors are raised as usual.
+    """
+    limiter = limiter or default_limiter()
+    session = session or requests
+    headers = {"User-Agent": sec_user_agent(), "Accept-Encoding": "gzip, deflate"}
+    headers.update(kwargs.pop("headers", {}))
+    url = sec_url(path)
+    for attempt in range(max_retries + 1):
+        limiter.acquire()
+        response = session.get(url, headers=headers, **kwargs)
+        for listener in request_listeners:
+            listener(response)
+        if response.status_code not in THROTTLE_STATUS_CODES:
+            limiter.record_success()
+            response.raise_for_status()
+            return response
+        retry_after = parse_retry_after(response)
+        limiter.record_throttle(retry_after)
+        if attempt < max_retries:
+            sleep(backoff_delay(attempt, retry_after=retry_after))
+    raise ThrottledError(
+        f"Still throttled ({response.status_code}) after {max_retries} retries: {url}"
+    )
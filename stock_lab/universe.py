@@ -0,0 +1,178 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CURRENT = "CURRENT"
+MANIFEST = "manifest.json"
+DEFAULT_KEEP = 2
+
+
+class VersionNotFound(Exception):
+    """Thrown when a universe root has no (or not the requested) version."""
+    pass
+
+def _as_datetimes(series):
+    """
+    An object column holding only datetimes (e.g. mixed time zones) as
+    datetime64 UTC, or series unchanged when it holds anything else.
+    """
+    if pd.api.types.infer_dtype(series, skipna=True) not in ("datetime", "datetime64", "date"):
+        return series
+    try:
+        return pd.to_datetime(series, utc=True)
+    except (ValueError, TypeError):
+        return series
+
+def _columns(facts):
+    """
+    {name: (kind, arrays)} for publish: numeric, bool and datetime columns
+    (object columns of datetimes included) as one array, tz-aware
+    datetimes as naive UTC, everything else as categorical codes plus a
+    fixed-width string array of categories.
+    """
+    columns = {}
+    for name, series in facts.items():
+        if series.dtype == object:
+            series = _as_datetimes(series)
+        dtype = series.dtype
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            values = series.dt.tz_convert("UTC").dt.tz_localize(None)
+            columns[name] = ("array", {"values": values.to_numpy("datetime64[ns]")})
+        elif isinstance(dtype, np.dtype) and dtype.kind in "biufmM":
+            columns[name] = ("array", {"values": series.to_numpy()})
+        else:
+            cat = pd.Categorical(series)
+            categories = np.asarray(cat.categories.astype(str), dtype=str)
+            columns[name] = ("categorical", {"codes": cat.codes, "categories": categories})
+    return columns
+
+def _next_version(root):
+    """Create and return the next numbered version directory under root."""
+    existing = [int(p.name) for p in root.iterdir() if p.is_dir() and p.name.isdigit()]
+    number = max(existing, default=0) + 1
+    while True:
+        path = root/f"{number:08d}"
+        try:
+            path.mkdir()
+            return path
+        except FileExistsError:
+            number += 1
+
+def current_version(root):
+    """Name of the version CURRENT points at, or None before the first publish."""
+    try:
+        return (Path(root)/CURRENT).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+def publish_universe(facts, root, keep=DEFAULT_KEEP):
+    """
+    Write the columns of facts (e.g. load_fact_store) as .npy files into a
+    new version directory under root, then atomically point root/CURRENT
+    at it. Readers attached to an older version keep their mappings; all
+    but the newest keep versions are removed.
+    root may live on /dev/shm to keep the arrays in POSIX shared memory.
+    Returns the new version name.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    path = _next_version(root)
+    manifest = {"rows": len(facts), "columns": {}}
+    for name, (kind, arrays) in _columns(facts).items():
+        files = {}
+        for part, values in arrays.items():
+            files[part] = f"{len(manifest['columns']):03d}.{part}.npy"
+            np.save(path/files[part], values, allow_pickle=False)
+        manifest["columns"][name] = {"kind": kind, "files": files}
+    (path/MANIFEST).write_text(json.dumps(manifest))
+    tmp = root/f"{CURRENT}.{os.getpid()}.tmp"
+    tmp.write_text(path.name)
+    os.replace(tmp, root/CURRENT)
+
+    versions = sorted(p for p in root.iterdir() if p.is_dir() and p.name.isdigit())
+    for old in versions[:-keep] if keep else []:
+        if old.name != path.name:
+            shutil.rmtree(old, ignore_errors=True)
+    return path.name
+
+class Universe():
+    """
+    One published version of the fact set, memory-mapped read-only.
+    Every process attaching the same version shares the page cache (or
+    /dev/shm pages) instead of holding its own copy.
+    arrays: {column: ndarray} for plain columns and
+    {column: (codes, categories)} for categorical ones.
+    """
+
+    def __init__(self, root, version):
+        self.root = Path(root)
+        self.version = version
+        path = self.root/version
+        try:
+            self.manifest = json.loads((path/MANIFEST).read_text())
+        except FileNotFoundError:
+            raise VersionNotFound(f"No published version {version} in {self.root}")
+        self.arrays = {}
+        for name, spec in self.manifest["columns"].items():
+            # Plain ndarray views of the read-only maps, which pandas
+            # handles more predictably than np.memmap.
+            loaded = {
+                part: np.load(path/file, mmap_mode="r", allow_pickle=False).view(np.ndarray)
+                for part, file in spec["files"].items()
+            }
+            if spec["kind"] == "categorical":
+                self.arrays[name] = (loaded["codes"], loaded["categories"])
+            else:
+                self.arrays[name] = loaded["values"]
+
+    def __len__(self):
+        return self.manifest["rows"]
+
+    @property
+    def columns(self):
+        return list(self.arrays)
+
+    def column(self, name):
+        """A column as an ndarray or pd.Categorical, without copying."""
+        values = self.arrays[name]
+        if isinstance(values, tuple):
+            codes, categories = values
+            return pd.Categorical.from_codes(codes, categories=pd.Index(categories),
+                                             validate=False)
+        return values
+
+    def frame(self, columns=None):
+        """
+        Read-only DataFrame over the mapped arrays; string columns come
+        back as categoricals. Writing to it raises ValueError.
+        """
+        columns = self.columns if columns is None else columns
+        return pd.DataFrame({name: self.column(name) for name in columns}, copy=False)
+
+def attach_universe(root, version=None):
+    """Attach the given version, or the current one, of a published universe."""
+    version = version or current_version(root)
+    if version is None:
+        raise VersionNotFound(f"Nothing published in {root}")
+    return Universe(root, version)
+
+class UniverseReader():
+    """
+    Long-lived handle for worker processes: current() returns the attached
+    Universe, swapping in a newly published version on the next call
+    after CURRENT changes. Universes handed out earlier stay valid.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.universe = None
+
+    def current(self):
+        version = current_version(self.root)
+        if self.universe is None or self.universe.version != version:
+            self.universe = attach_universe(self.root, version)
+        return self.universe
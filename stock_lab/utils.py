@@ -4,16 +4,33 @@ from pathlib import Path
 from edgar import Filing, Company, get_filings
 from edgar.xbrl.xbrl import XBRL
 
+from stock_lab.fetch import fetch_instance
+
 REPO_ROOT = Path(__file__).parent.parent
 
-def save_latest_quarters(ticker, n, save_dir):
+def latest_quarters(ticker, n):
     """
-    Save n latest quarterly filings instances to disk as pkl files.
+    The n latest 10-K and 10-Q filings of a company, as a list.
     """
     company = Company(ticker)
-    quarterly_filings = company.get_filings().filter(form=["10-K", "10-Q"])
-    for quarter in quarterly_filings.latest(n):
-        quarter.save(save_dir)
+    latest = company.get_filings().filter(form=["10-K", "10-Q"]).latest(n)
+    # edgartools returns a lone Filing rather than a collection of one.
+    return [latest] if hasattr(latest, "accession_no") else list(latest)
+
+def save_latest_quarters(ticker, n, save_dir=None, store=None, instances_only=False):
+    """
+    Save n latest quarterly filings instances to disk as pkl files,
+    or into a FilingStore when store is given.
+    With instances_only, only each filing's XBRL instance document is
+    downloaded into store (see stock_lab.fetch.fetch_instance).
+    """
+    for quarter in latest_quarters(ticker, n):
+        if store is not None and instances_only:
+            fetch_instance(quarter, store)
+        elif store is not None:
+            store.put_filing(quarter)
+        else:
+            quarter.save(save_dir)
 
 def load_filing_from_file(pkl_file):
     """
@@ -34,6 +51,7 @@ def load_filings_from_dir(load_dir):
 def filings_facts_to_csv(filing, save_path=REPO_ROOT/".inspect"):
     """
     Export filing fact data to a csv file.
+    For many filings use stock_lab.export.export_facts instead.
     """
     facts_df = XBRL.from_filing(filing).facts.to_dataframe()
     if save_path.is_dir():
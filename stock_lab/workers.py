@@ -0,0 +1,291 @@
+import multiprocessing
+import os
+import resource
+import signal
+import sys
+import threading
+from multiprocessing.connection import wait
+from pathlib import Path
+
+import pandas as pd
+
+from stock_lab.crawl import extract_filing_facts
+
+MEMORY_EXIT_CODE = 75
+_END = object()
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class MemoryLimitExceeded(Exception):
+    """Thrown when a task's worker grows past the per-task RSS limit."""
+    pass
+
+class WorkerCrashed(Exception):
+    """Thrown when a worker process dies while running a task."""
+    pass
+
+def current_rss():
+    """
+    Resident set size of this process in bytes.
+    Reads /proc on Linux; elsewhere falls back to the peak RSS.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+class _Watchdog(threading.Thread):
+    """
+    Polls RSS while a task runs and hard-exits the worker once it passes
+    limit, after reporting the task as MemoryLimitExceeded.
+    """
+
+    def __init__(self, limit, interval, on_exceeded):
+        super().__init__(daemon=True)
+        self.limit = limit
+        self.interval = interval
+        self.on_exceeded = on_exceeded
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            rss = current_rss()
+            if rss > self.limit:
+                self.on_exceeded(rss)
+                os._exit(MEMORY_EXIT_CODE)
+
+def _worker_main(func, conn, max_tasks, recycle_rss, task_rss_limit, interval):
+    """
+    Worker loop: run func on each task sent over conn and reply with
+    ("done", index, result, error, retiring). Retires after max_tasks tasks
+    or when RSS ends a task above recycle_rss.
+    """
+    send_lock = threading.Lock()
+    for completed in range(1, max_tasks + 1):
+        message = conn.recv()
+        if message is None:
+            return
+        index, item = message
+        watchdog = None
+        if task_rss_limit:
+            def exceeded(rss, index=index):
+                error = MemoryLimitExceeded(
+                    f"Task RSS {rss} bytes exceeded limit {task_rss_limit}")
+                with send_lock:
+                    conn.send(("done", index, None, error, True))
+            watchdog = _Watchdog(task_rss_limit, interval, exceeded)
+            watchdog.start()
+        try:
+            result, error = func(item), None
+        except Exception as e:
+            result, error = None, e
+        if watchdog is not None:
+            watchdog.stopped.set()
+            watchdog.join()
+        retiring = completed == max_tasks or bool(
+            recycle_rss and current_rss() > recycle_rss)
+        with send_lock:
+            conn.send(("done", index, result, error, retiring))
+        if retiring:
+            return
+
+class _Worker():
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.task = None
+
+class GovernedPool():
+    """
+    Process pool for long extraction runs on fixed-size machines.
+
+    - Workers are recycled (replaced by a fresh process) after max_tasks
+      tasks, or as soon as a finished task leaves their RSS above
+      recycle_rss bytes, so leaked or fragmented memory is returned to the OS.
+    - A watchdog thread kills any task whose worker passes task_rss_limit
+      bytes; the task is reported as MemoryLimitExceeded and the worker is
+      replaced. Workers killed from outside (e.g. by the OOM killer) are
+      reported the same way.
+    Each worker has its own pipe, so the pool always knows which task a
+    dead worker was holding.
+    Workers are spawned unless another context is given: the parent runs
+    threads (pyarrow, telemetry), and forking a threaded process can
+    deadlock the child. func and items must therefore be picklable.
+    """
+
+    def __init__(
+            self,
+            func,
+            workers=None,
+            max_tasks=100,
+            recycle_rss=None,
+            task_rss_limit=None,
+            watchdog_interval=0.1,
+            context=None):
+        self.func = func
+        self.workers = workers or os.cpu_count()
+        self.max_tasks = max_tasks
+        self.recycle_rss = recycle_rss
+        self.task_rss_limit = task_rss_limit
+        self.watchdog_interval = watchdog_interval
+        self.context = context or multiprocessing.get_context("spawn")
+        self.spawned = 0
+
+    def _spawn(self):
+        parent_conn, child_conn = self.context.Pipe()
+        process = self.context.Process(
+            target=_worker_main,
+            args=(self.func, child_conn, self.max_tasks, self.recycle_rss,
+                  self.task_rss_limit, self.watchdog_interval),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        self.spawned += 1
+        return _Worker(process, parent_conn)
+
+    def _retire(self, worker, timeout=5):
+        """
+        Stop a worker. An idle one is asked to exit; one still holding a
+        task (the caller stopped iterating) may be blocked sending a large
+        result nobody will read, so it is terminated instead of joined.
+        """
+        if worker.task is None:
+            try:
+                worker.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        else:
+            worker.process.terminate()
+        worker.conn.close()
+        worker.process.join(timeout)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join()
+
+    def imap_unordered(self, items):
+        """
+        Run func over items, yielding (item, result, error) as tasks finish.
+        error is the exception raised by the task, MemoryLimitExceeded or
+        WorkerCrashed; result is None whenever error is set.
+        """
+        items = iter(items)
+        pending = {}
+        next_index = 0
+        workers = [self._spawn() for _ in range(self.workers)]
+        exhausted = False
+        try:
+            while workers:
+                for worker in workers:
+                    if worker.task is None and not exhausted:
+                        item = next(items, _END)
+                        if item is _END:
+                            exhausted = True
+                            break
+                        pending[next_index] = item
+                        worker.task = next_index
+                        worker.conn.send((next_index, item))
+                        next_index += 1
+                busy = [w for w in workers if w.task is not None]
+                if not busy:
+                    break
+                waitables = {}
+                for w in busy:
+                    waitables[w.conn] = w
+                    waitables[w.process.sentinel] = w
+                ready = wait(list(waitables))
+                handled = set()
+                for obj in ready:
+                    worker = waitables[obj]
+                    if id(worker) in handled:
+                        continue
+                    handled.add(id(worker))
+                    replace = False
+                    try:
+                        _, index, result, error, replace = worker.conn.recv()
+                        worker.task = None
+                        yield pending.pop(index), result, error
+                    except (EOFError, OSError):
+                        replace = True
+                    if worker.task is not None:
+                        worker.process.join()
+                        code = worker.process.exitcode
+                        if code in (MEMORY_EXIT_CODE, -signal.SIGKILL):
+                            error = MemoryLimitExceeded(
+                                f"Worker killed while over memory (exit {code})")
+                        else:
+                            error = WorkerCrashed(f"Worker exited with {code}")
+                        item = pending.pop(worker.task)
+                        worker.task = None
+                        yield item, None, error
+                    if replace:
+                        self._retire(worker)
+                        workers.remove(worker)
+                        if not exhausted:
+                            workers.append(self._spawn())
+        finally:
+            for worker in workers:
+                self._retire(worker)
+
+class SpillingCollector():
+    """
+    Accumulates result frames in memory and spills them to parquet part
+    files under spill_dir once they pass max_bytes, so a long run's output
+    never has to fit in RAM.
+    """
+
+    def __init__(self, spill_dir, max_bytes=256 * 1024 * 1024):
+        self.spill_dir = Path(spill_dir)
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.frames = []
+        self.buffered_bytes = 0
+        self.parts = []
+        self.rows = 0
+
+    def add(self, df):
+        self.frames.append(df)
+        self.buffered_bytes += int(df.memory_usage(deep=True).sum())
+        self.rows += len(df)
+        if self.buffered_bytes >= self.max_bytes:
+            self.spill()
+
+    def spill(self):
+        """Write buffered frames to a new part file and release them."""
+        if not self.frames:
+            return
+        path = self.spill_dir/f"part-{len(self.parts):05d}.parquet"
+        pd.concat(self.frames, ignore_index=True).to_parquet(path)
+        self.parts.append(path)
+        self.frames = []
+        self.buffered_bytes = 0
+
+    def iter_frames(self):
+        """Yield spilled parts, then whatever is still in memory."""
+        for path in self.parts:
+            yield pd.read_parquet(path)
+        yield from self.frames
+
+    def to_frame(self):
+        frames = list(self.iter_frames())
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+def extract_filings_governed(filings, spill_dir, **pool_kwargs):
+    """
+    Extract facts for many filings in a GovernedPool, spilling results.
+    Returns (SpillingCollector, list of (filing, error) failures).
+    """
+    collector = SpillingCollector(spill_dir)
+    failures = []
+    for filing, rows_df, error in GovernedPool(
+            extract_filing_facts, **pool_kwargs).imap_unordered(filings):
+        if error is not None:
+            failures.append((filing, error))
+        else:
+            collector.add(rows_df)
+    return collector, failures
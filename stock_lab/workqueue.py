@@ -0,0 +1,259 @@
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import namedtuple
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+Task = namedtuple("Task", ["task_id", "payload", "attempts"])
+
+
+class LeaseLost(Exception):
+    """Thrown when a worker touches a task it no longer holds the lease on."""
+    pass
+
+class WorkQueue(ABC):
+    """
+    Interface for a shared queue of leased tasks.
+
+    A worker leases tasks for a fixed time, renews the lease while it works
+    and completes or fails the task. A lease that expires (crashed or stuck
+    worker) makes the task available to other workers again, until
+    max_attempts is reached and the task is marked failed.
+    """
+
+    @abstractmethod
+    def enqueue(self, tasks):
+        """Add (task_id, payload) pairs; existing task ids are left untouched."""
+
+    @abstractmethod
+    def lease(self, worker_id, n=1):
+        """Lease up to n available tasks. Returns a list of Task."""
+
+    @abstractmethod
+    def renew(self, task_id, worker_id):
+        """Extend the lease on a task; raises LeaseLost if not held."""
+
+    @abstractmethod
+    def complete(self, task_id, worker_id):
+        """Mark a leased task done; raises LeaseLost if not held."""
+
+    @abstractmethod
+    def fail(self, task_id, worker_id, error, retry=True):
+        """Release a leased task with an error, for retry or permanently."""
+
+    @abstractmethod
+    def counts(self):
+        """Number of tasks in each status."""
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    WorkQueue stored in a SQLite database.
+    Leasing runs in an IMMEDIATE transaction, so any number of processes on
+    one host can pull from the same file without handing out a task twice.
+    Single host only: WAL mode coordinates readers through shared memory,
+    which processes on other nodes do not see, so a shared (network)
+    filesystem is not supported. Multi-node workers need another WorkQueue.
+    """
+
+    def __init__(self, path, lease_seconds=300, max_attempts=3, clock=time.time):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.db = sqlite3.connect(
+            path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " task_id TEXT PRIMARY KEY,"
+            " payload TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " owner TEXT,"
+            " lease_expires REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " error TEXT)"
+        )
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_expires)")
+
+    def close(self):
+        self.db.close()
+
+    def _transaction(self, func):
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(self.clock())
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+            self.db.execute("COMMIT")
+        return result
+
+    def enqueue(self, tasks):
+        def insert(now):
+            cur = self.db.executemany(
+                "INSERT OR IGNORE INTO tasks (task_id, payload, status)"
+                " VALUES (?, ?, ?)",
+                ((task_id, json.dumps(payload), PENDING) for task_id, payload in tasks)
+            )
+            return cur.rowcount
+        return self._transaction(insert)
+
+    def lease(self, worker_id, n=1):
+        def take(now):
+            # Expired leases that used up their attempts are not retried.
+            self.db.execute(
+                "UPDATE tasks SET status = ?, owner = NULL,"
+                " error = COALESCE(error, 'lease expired')"
+                " WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, LEASED, now, self.max_attempts)
+            )
+            rows = self.db.execute(
+                "SELECT task_id, payload, attempts FROM tasks"
+                " WHERE status = ? OR (status = ? AND lease_expires < ?)"
+                " ORDER BY attempts, rowid LIMIT ?",
+                (PENDING, LEASED, now, n)
+            ).fetchall()
+            self.db.executemany(
+                "UPDATE tasks SET status = ?, owner = ?, lease_expires = ?,"
+                " attempts = attempts + 1 WHERE task_id = ?",
+                ((LEASED, worker_id, now + self.lease_seconds, r[0]) for r in rows)
+            )
+            return [Task(r[0], json.loads(r[1]), r[2] + 1) for r in rows]
+        return self._transaction(take)
+
+    def _update_held(self, task_id, worker_id, sql, params):
+        def update(now):
+            cur = self.db.execute(
+                sql + " WHERE task_id = ? AND status = ? AND owner = ?"
+                " AND lease_expires >= ?",
+                (*params(now), task_id, LEASED, worker_id, now)
+            )
+            if cur.rowcount != 1:
+                raise LeaseLost(f"{worker_id} does not hold the lease on {task_id}")
+        self._transaction(update)
+
+    def renew(self, task_id, worker_id):
+        self._update_held(
+            task_id, worker_id,
+            "UPDATE tasks SET lease_expires = ?",
+            lambda now: (now + self.lease_seconds,)
+        )
+
+    def complete(self, task_id, worker_id):
+        self._update_held(
+            task_id, worker_id,
+            "UPDATE tasks SET status = ?, owner = NULL, error = NULL",
+            lambda now: (DONE,)
+        )
+
+    def fail(self, task_id, worker_id, error, retry=True):
+        # Out of attempts fails permanently even if a retry was requested.
+        self._update_held(
+            task_id, worker_id,
+            "UPDATE tasks SET status = CASE WHEN ? AND attempts < ?"
+            " THEN ? ELSE ? END, owner = NULL, lease_expires = NULL, error = ?",
+            lambda now: (retry, self.max_attempts, PENDING, FAILED, str(error))
+        )
+
+    def counts(self):
+        rows = self.db.execute(
+            "SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def failed(self):
+        """Returns (task_id, attempts, error) for permanently failed tasks."""
+        return self.db.execute(
+            "SELECT task_id, attempts, error FROM tasks WHERE status = ?"
+            " ORDER BY task_id", (FAILED,)
+        ).fetchall()
+
+def company_tasks(companies):
+    """
+    One task per CIK from a get_company_tickers() dataframe.
+    """
+    for row in companies.drop_duplicates("cik").itertuples(index=False):
+        payload = {"cik": int(row.cik), "ticker": row.ticker, "company": row.company}
+        yield f"cik:{int(row.cik)}", payload
+
+def accession_tasks(catalog):
+    """
+    One task per filing of an AccessionCatalog dataframe, carrying what
+    catalog_filing needs to rebuild the filing without a request.
+    """
+    for row in catalog.drop_duplicates("accession_no").itertuples(index=False):
+        payload = {
+            "cik": int(row.cik),
+            "company": row.company,
+            "form": row.form,
+            "date_filed": row.date_filed.date().isoformat(),
+            "accession_no": row.accession_no,
+        }
+        yield f"acc:{row.accession_no}", payload
+
+class _LeaseKeeper(threading.Thread):
+    """Background thread that renews a task lease while the handler runs."""
+
+    def __init__(self, queue, task_id, worker_id):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.task_id = task_id
+        self.worker_id = worker_id
+        self.stopped = threading.Event()
+        self.lost = False
+
+    def run(self):
+        interval = self.queue.lease_seconds / 3
+        while not self.stopped.wait(interval):
+            try:
+                self.queue.renew(self.task_id, self.worker_id)
+            except LeaseLost:
+                self.lost = True
+                return
+
+def run_worker(queue, handler, worker_id, poll_interval=5, stop_when_empty=True):
+    """
+    Lease tasks one at a time and run handler(payload) on each, renewing
+    the lease in the background. Exceptions fail the task for retry.
+    Returns the number of tasks completed by this worker.
+    """
+    completed = 0
+    while True:
+        tasks = queue.lease(worker_id)
+        if not tasks:
+            counts = queue.counts()
+            if stop_when_empty and counts[PENDING] == 0 and counts[LEASED] == 0:
+                return completed
+            time.sleep(poll_interval)
+            continue
+        task = tasks[0]
+        keeper = _LeaseKeeper(queue, task.task_id, worker_id)
+        keeper.start()
+        error = None
+        try:
+            handler(task.payload)
+        except Exception as e:
+            error = e
+        finally:
+            keeper.stopped.set()
+            keeper.join()
+        if keeper.lost:
+            continue
+        try:
+            if error is None:
+                queue.complete(task.task_id, worker_id)
+                completed += 1
+            else:
+                queue.fail(task.task_id, worker_id, repr(error))
+        except LeaseLost:
+            pass
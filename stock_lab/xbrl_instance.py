@@ -0,0 +1,160 @@
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+
+from stock_lab.facts import FilingFacts
+
+XBRLI = "{http://www.xbrl.org/2003/instance}"
+XBRLDI = "{http://xbrl.org/2006/xbrldi}"
+INSTANCE_DOCUMENT_TYPES = ("XML", "EX-101.INS")
+FACT_COLUMNS = [
+    "concept", "value", "numeric_value", "unit_ref", "currency", "decimals",
+    "context_ref", "period_type", "period_start", "period_end",
+    "period_instant", "is_dimensioned",
+]
+# Columns edgartools treats as the identity of a fact when dropping
+# the duplicate taggings filers repeat across statements and notes.
+DEDUP_COLUMNS = ["concept", "context_ref", "value", "decimals", "unit_ref"]
+CHUNK_BYTES = 1 << 16
+
+
+def configured_concepts(gaap_tags=None):
+    """Every concept named by a FilingFacts.gaap_tags-style mapping."""
+    gaap_tags = FilingFacts.gaap_tags if gaap_tags is None else gaap_tags
+    return {tag for gaap_dict in gaap_tags.values() for tag in gaap_dict["tags"]}
+
+def _chunks(source):
+    if isinstance(source, (str, bytes)):
+        for start in range(0, len(source), CHUNK_BYTES):
+            yield source[start:start + CHUNK_BYTES]
+        return
+    while chunk := source.read(CHUNK_BYTES):
+        yield chunk
+
+def _context(elem):
+    """(period, dimensions) of an xbrli:context element."""
+    period = {"period_type": None}
+    period_elem = elem.find(f"{XBRLI}period")
+    if period_elem is not None:
+        instant = period_elem.findtext(f"{XBRLI}instant")
+        start = period_elem.findtext(f"{XBRLI}startDate")
+        end = period_elem.findtext(f"{XBRLI}endDate")
+        if instant:
+            period = {"period_type": "instant", "period_instant": instant}
+        elif start and end:
+            period = {"period_type": "duration", "period_start": start, "period_end": end}
+        elif period_elem.find(f"{XBRLI}forever") is not None:
+            period = {"period_type": "forever"}
+    dimensions = {}
+    for member in elem.iter(f"{XBRLDI}explicitMember"):
+        if member.get("dimension") and member.text:
+            dimensions[member.get("dimension")] = member.text
+    for member in elem.iter(f"{XBRLDI}typedMember"):
+        child = next(iter(member), None)
+        if member.get("dimension") and child is not None:
+            text = (child.text or "").strip()
+            dimensions[member.get("dimension")] = text or child.tag
+    return period, dimensions
+
+def _currency(elem):
+    """ISO 4217 code of a single-measure unit, otherwise None."""
+    measures = [m.text.strip() for m in elem.iter(f"{XBRLI}measure") if m.text]
+    if len(measures) == 1 and measures[0].lower().startswith("iso4217:"):
+        return measures[0].split(":", 1)[1].upper()
+    return None
+
+def parse_instance(source, concepts=None):
+    """
+    Stream an XBRL instance document and return the facts of the given
+    concepts (default: every tag in FilingFacts.gaap_tags) in the column
+    schema of edgartools' facts.to_dataframe() that FilingFacts consumes:
+    string values and dates, dim_<axis> columns and is_dimensioned.
+
+    Every other fact is discarded as soon as it is read and only the
+    contexts and units the kept facts reference are turned into columns,
+    so no object model of the filing is ever built.
+    source: the document as bytes/str or a binary file object.
+    """
+    concepts = configured_concepts() if concepts is None else set(concepts)
+    parser = ET.XMLPullParser(events=("start-ns", "end"))
+    prefixes = {}
+    contexts = {}
+    currencies = {}
+    facts = []
+
+    def handle(event, item):
+        if event == "start-ns":
+            prefix, uri = item
+            prefixes.setdefault(uri, prefix)
+            return
+        tag = item.tag
+        if tag == f"{XBRLI}context":
+            contexts[item.get("id")] = _context(item)
+        elif tag == f"{XBRLI}unit":
+            currencies[item.get("id")] = _currency(item)
+        elif item.get("contextRef") is not None:
+            uri, _, name = tag[1:].partition("}")
+            prefix = prefixes.get(uri)
+            concept = f"{prefix}:{name}" if prefix else name
+            if concept in concepts:
+                facts.append((
+                    concept,
+                    (item.text or "").strip(),
+                    item.get("unitRef"),
+                    item.get("decimals"),
+                    item.get("contextRef"),
+                ))
+        else:
+            return
+        item.clear()
+
+    for chunk in _chunks(source):
+        parser.feed(chunk)
+        for event, item in parser.read_events():
+            handle(event, item)
+    parser.close()
+    for event, item in parser.read_events():
+        handle(event, item)
+
+    rows = []
+    for concept, value, unit_ref, decimals, context_ref in facts:
+        numeric_value = None
+        if value and unit_ref:
+            try:
+                numeric_value = float(value)
+            except ValueError:
+                pass
+        row = {
+            "concept": concept,
+            "value": value,
+            "numeric_value": numeric_value,
+            "unit_ref": unit_ref,
+            "currency": currencies.get(unit_ref),
+            "decimals": decimals,
+            "context_ref": context_ref,
+            "is_dimensioned": False,
+        }
+        if context_ref in contexts:
+            period, dimensions = contexts[context_ref]
+            row.update(period)
+            for dimension, member in dimensions.items():
+                row[f"dim_{dimension.replace(':', '_')}"] = member
+            row["is_dimensioned"] = bool(dimensions)
+        rows.append(row)
+
+    dims = sorted({c for row in rows for c in row if c.startswith("dim_")})
+    df = pd.DataFrame(rows).reindex(columns=FACT_COLUMNS + dims)
+    return df.drop_duplicates(DEDUP_COLUMNS, ignore_index=True)
+
+def instance_document(filing):
+    """
+    Text of the filing's XBRL instance document (the extracted _htm.xml
+    for inline XBRL filings), or None if it has none.
+    """
+    for attachment in filing.attachments.data_files or []:
+        if attachment.document_type in INSTANCE_DOCUMENT_TYPES \
+                and attachment.extension.lower() == ".xml":
+            content = attachment.content
+            if content and "<xbrl" in content[:2000]:
+                return content
+    return None
@@ -0,0 +1,160 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_lab.asof import AsOfIndex
+
+def fact(cik, fact_type, period_end, accepted, value, accession, period_instant=None):
+    return {
+        "cik": cik,
+        "accession_no": accession,
+        "acceptance_datetime": pd.Timestamp(accepted, tz="UTC") if accepted else pd.NaT,
+        "fact_type": fact_type,
+        "value": value,
+        "period_end": pd.Timestamp(period_end) if period_end else pd.NaT,
+        "period_instant": pd.Timestamp(period_instant) if period_instant else pd.NaT,
+    }
+
+@pytest.fixture
+def facts():
+    return pd.DataFrame([
+        fact(1, "revenue", "2024-03-31", "2024-05-01 21:00", 100.0, "q1"),
+        fact(1, "revenue", "2024-06-30", "2024-08-01 21:00", 110.0, "q2"),
+        # Amendment restating Q1 accepted after Q2 was filed
+        fact(1, "revenue", "2024-03-31", "2024-09-15 12:00", 95.0, "q1a"),
+        # Q2 restated in the Q3 filing's comparative column
+        fact(1, "revenue", "2024-06-30", "2024-11-01 21:00", 111.0, "q3"),
+        fact(1, "revenue", "2024-09-30", "2024-11-01 21:00", 120.0, "q3"),
+        fact(1, "cash_equivalents", None, "2024-05-01 21:00", 7.0, "q1",
+             period_instant="2024-03-31"),
+        fact(2, "revenue", "2024-06-30", "2024-07-20 13:00", 500.0, "b2"),
+        # No acceptance time: cannot be placed in time
+        fact(2, "revenue", "2024-09-30", None, 600.0, "b3"),
+    ])
+
+@pytest.fixture
+def index(facts):
+    return AsOfIndex(facts)
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+def test_versions_keep_restatements(index):
+    q2 = index.versions.loc[
+        (index.versions["cik"] == 1) & (index.versions["period"] == "2024-06-30")]
+    assert q2["value"].tolist() == [110.0, 111.0]
+    assert q2["version"].tolist() == [0, 1]
+    assert "b3" not in set(index.versions["accession_no"])
+
+@pytest.mark.parametrize("date, expected_value, expected_accession", [
+    # Nothing known before the first filing
+    ("2024-05-01", np.nan, None),
+    # A filing accepted on D is visible from D + 1 at midnight
+    ("2024-05-02", 100.0, "q1"),
+    ("2024-08-02", 110.0, "q2"),
+    # Q1 amendment must not displace the newer Q2 value
+    ("2024-09-16", 110.0, "q2"),
+    ("2024-11-02", 120.0, "q3"),
+])
+def test_as_of_latest_known(index, date, expected_value, expected_accession):
+    row = index.as_of([date], ciks=[1], fact_types=["revenue"]).iloc[0]
+    if expected_accession is None:
+        assert pd.isna(row["value"])
+        assert pd.isna(row["period"])
+    else:
+        assert row["value"] == expected_value
+        assert row["accession_no"] == expected_accession
+
+def test_as_of_intraday_time(index):
+    before = index.as_of([pd.Timestamp("2024-08-01 20:59", tz="UTC")],
+                         ciks=[1], fact_types=["revenue"])
+    after = index.as_of([pd.Timestamp("2024-08-01 21:00", tz="UTC")],
+                        ciks=[1], fact_types=["revenue"])
+    assert before["value"].iloc[0] == 100.0
+    assert after["value"].iloc[0] == 110.0
+
+def test_as_of_grid_shape(index):
+    dates = pd.date_range("2024-01-01", "2024-12-31", freq="D")
+    grid = index.as_of(dates)
+    assert len(grid) == len(dates) * 3
+    assert set(grid["fact_type"]) == {"revenue", "cash_equivalents"}
+    cash = grid.loc[grid["fact_type"] == "cash_equivalents"].set_index("date")
+    assert cash.loc["2024-05-02", "period"] == pd.Timestamp("2024-03-31")
+
+def test_no_future_leakage(index, facts):
+    dates = pd.date_range("2024-01-01", "2024-12-31", freq="D")
+    grid = index.as_of(dates).dropna(subset=["known_at"])
+    assert (grid["known_at"] <= grid["date"]).all()
+
+def test_lag_delays_knowledge(facts):
+    lagged = AsOfIndex(facts, lag="2D")
+    row = lagged.as_of(["2024-05-02"], ciks=[1], fact_types=["revenue"]).iloc[0]
+    assert pd.isna(row["value"])
+
+def test_panel(index):
+    panel = index.panel(["2024-07-21", "2024-08-02"], "revenue")
+    assert list(panel.columns) == [1, 2]
+    assert panel.loc["2024-07-21"].tolist() == [100.0, 500.0]
+    assert panel.loc["2024-08-02"].tolist() == [110.0, 500.0]
+
+def test_history_as_of_hides_later_restatements(index):
+    history = index.history_as_of("2024-10-01", ciks=[1], fact_types=["revenue"])
+    by_period = history.set_index("period")["value"]
+    assert by_period.loc["2024-03-31"] == 95.0
+    assert by_period.loc["2024-06-30"] == 110.0
+    assert pd.Timestamp("2024-09-30") not in by_period.index
+
+@pytest.fixture
+def quarter_facts():
+    """A 10-Q's total, segment and year-to-date rows sharing its period end."""
+    rows = [
+        fact(1, "revenue", "2024-06-30", "2024-08-01 21:00", 110.0, "q2"),
+        fact(1, "revenue", "2024-06-30", "2024-08-01 21:00", 40.0, "q2"),
+        fact(1, "revenue", "2024-06-30", "2024-08-01 21:00", 210.0, "q2"),
+        # Q3 filing restates the Q2 segment only
+        fact(1, "revenue", "2024-06-30", "2024-11-01 21:00", 45.0, "q3"),
+    ]
+    facts = pd.DataFrame(rows)
+    facts["period_start"] = pd.to_datetime(
+        ["2024-04-01", "2024-04-01", "2024-01-01", "2024-04-01"])
+    facts["is_dimensioned"] = [False, True, False, True]
+    facts["dim_srt_SegmentsAxis"] = [None, "Compute", None, "Compute"]
+    return facts
+
+def test_segment_and_ytd_rows_are_separate_series(quarter_facts):
+    index = AsOfIndex(quarter_facts)
+    assert index.versions["version"].tolist() == [0, 0, 0, 1]
+    row = index.as_of(["2024-11-02"], ciks=[1], fact_types=["revenue"]).iloc[0]
+    assert row["value"] == 110.0
+    assert row["accession_no"] == "q2"
+    history = index.history_as_of("2024-11-02")
+    assert sorted(history["value"]) == [45.0, 110.0, 210.0]
+
+# -----------------------------------------------------------------------------
+#                               Integration tests
+# -----------------------------------------------------------------------------
+
+@pytest.mark.slow
+def test_universe_daily_grid_is_fast():
+    rng = np.random.default_rng(0)
+    n_ciks, n_quarters = 3000, 20
+    fact_types = ["revenue", "eps", "net_income"]
+    ciks = np.repeat(np.arange(n_ciks), n_quarters * len(fact_types))
+    quarter = np.tile(np.repeat(np.arange(n_quarters), len(fact_types)), n_ciks)
+    period = pd.Timestamp("2020-03-31") + pd.to_timedelta(quarter * 91, unit="D")
+    accepted = period + pd.to_timedelta(rng.integers(20, 60, len(ciks)), unit="D")
+    facts = pd.DataFrame({
+        "cik": ciks,
+        "accession_no": [f"a{i}" for i in range(len(ciks))],
+        "acceptance_datetime": accepted,
+        "fact_type": np.tile(fact_types, n_ciks * n_quarters),
+        "value": rng.normal(size=len(ciks)),
+        "period_end": period,
+    })
+    start = time.perf_counter()
+    panel = AsOfIndex(facts).as_of(pd.date_range("2020-01-01", "2024-12-31"))
+    assert time.perf_counter() - start < 10
+    assert len(panel) == n_ciks * len(fact_types) * 1827
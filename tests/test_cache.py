@@ -0,0 +1,120 @@
+import pandas as pd
+import pytest
+
+from stock_lab.cache import ResultCache
+from stock_lab.facts import FilingFacts, MissingFact, fact_type_hash
+
+from tests.test_data import (
+    first_concepts, acceptable_values, period_ends, period_starts,
+    period_instants, period_types
+)
+
+ACCESSION = "0000000001-24-000001"
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+def facts_df():
+    return pd.DataFrame({
+        "concept": first_concepts,
+        "value": acceptable_values,
+        "period_end": period_ends,
+        "period_start": period_starts,
+        "period_instant": period_instants,
+        "period_type": period_types,
+    })
+
+class CountingLoader():
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return facts_df()
+
+@pytest.fixture
+def cache(tmp_path):
+    with ResultCache(tmp_path/"cache") as c:
+        yield c
+
+def test_cached_rows_match_get_rows(cache):
+    load = CountingLoader()
+    expected = FilingFacts(facts_df()).get_rows()
+    pd.testing.assert_frame_equal(cache.get_rows(ACCESSION, load), expected)
+    pd.testing.assert_frame_equal(cache.get_rows(ACCESSION, load), expected)
+    assert load.calls == 1
+    assert cache.misses == len(FilingFacts.gaap_tags)
+    assert cache.memory_hits == len(FilingFacts.gaap_tags)
+
+def test_disk_tier_survives_reopen(tmp_path):
+    with ResultCache(tmp_path/"cache") as first:
+        first.get_rows(ACCESSION, CountingLoader())
+    load = CountingLoader()
+    with ResultCache(tmp_path/"cache") as second:
+        second.get_rows(ACCESSION, load)
+        assert second.disk_hits == len(FilingFacts.gaap_tags)
+    assert load.calls == 0
+
+def test_lru_evicts_oldest(tmp_path):
+    with ResultCache(tmp_path/"cache", max_entries=2) as c:
+        c.get_rows(ACCESSION, CountingLoader())
+        assert len(c.memory) == 2
+        assert list(c.memory)[-1][1].startswith("rows/cash_equivalents/")
+
+def test_cached_rows_are_copies(cache):
+    cache.get_rows(ACCESSION, CountingLoader())["value"] = 0
+    rows = cache.get_rows(ACCESSION, CountingLoader())
+    assert rows["value"].tolist() == [float(v) for v in acceptable_values]
+
+def test_failures_not_cached(cache):
+    load = CountingLoader()
+    load_empty = lambda: facts_df().iloc[:0]
+    with pytest.raises(MissingFact):
+        cache.get_rows(ACCESSION, load_empty)
+    cache.get_rows(ACCESSION, load)
+    assert load.calls == 1
+
+def test_tag_change_invalidates_only_that_fact_type(tmp_path, monkeypatch):
+    with ResultCache(tmp_path/"cache") as c:
+        c.get_rows(ACCESSION, CountingLoader())
+
+    gaap_tags = dict(FilingFacts.gaap_tags)
+    gaap_tags["revenue"] = dict(gaap_tags["revenue"])
+    gaap_tags["revenue"]["tags"] = gaap_tags["revenue"]["tags"] + ("us-gaap:NewRevenueTag",)
+    monkeypatch.setattr(FilingFacts, "gaap_tags", gaap_tags)
+
+    load = CountingLoader()
+    with ResultCache(tmp_path/"cache") as c:
+        c.get_rows(ACCESSION, load)
+        assert c.misses == 1
+        assert c.disk_hits == len(gaap_tags) - 1
+    assert load.calls == 1
+
+@pytest.mark.parametrize("change", [
+    {"tags": ("us-gaap:Revenues",)},
+    {"period_type": "instant"},
+    {"valid_type_pipe": []},
+])
+def test_fact_type_hash_changes(change):
+    gaap_dict = FilingFacts.gaap_tags["revenue"]
+    assert fact_type_hash("revenue", gaap_dict) != \
+        fact_type_hash("revenue", {**gaap_dict, **change})
+
+def test_fact_type_hash_follows_validator_source():
+    gaap_dict = FilingFacts.gaap_tags["revenue"]
+    first = gaap_dict["valid_type_pipe"][0]
+
+    def edited(df):
+        return first(df).head(0)
+    edited.__name__ = first.__name__
+    pipe = [edited] + list(gaap_dict["valid_type_pipe"][1:])
+    assert fact_type_hash("revenue", gaap_dict) != \
+        fact_type_hash("revenue", {**gaap_dict, "valid_type_pipe": pipe})
+
+def test_fact_type_hash_follows_validator_version(monkeypatch):
+    gaap_dict = FilingFacts.gaap_tags["revenue"]
+    before = fact_type_hash("revenue", gaap_dict)
+    monkeypatch.setattr("stock_lab.facts.VALIDATOR_VERSION", 2)
+    assert fact_type_hash("revenue", gaap_dict) != before
@@ -0,0 +1,135 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_lab.consistency import (
+    FLAG_COLUMNS, check_consistency, check_store, wide_facts
+)
+from stock_lab.crawl import tag_filing_rows
+from stock_lab.facts import FilingFacts
+from stock_lab.utils import REPO_ROOT
+from stock_lab.xbrl_instance import parse_instance
+
+QUARTER = ("2024-07-29", "2024-10-27")
+YEAR_TO_DATE = ("2024-01-29", "2024-10-27")
+CONSISTENT = {
+    "revenue": 35_082e6,
+    "gross_profit": 26_156e6,
+    "operating_income": 21_869e6,
+    "net_income": 19_309e6,
+    "eps": 0.78,
+    "diluted_shares": 24_774e6,
+}
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+def facts_frame(filings):
+    """Store-shaped rows from {accession: {period: {fact_type: value}}}."""
+    rows = []
+    for i, (accession, periods) in enumerate(filings.items()):
+        for (start, end), values in periods.items():
+            for fact_type, value in values.items():
+                rows.append({
+                    "cik": 1000 + i,
+                    "accession_no": accession,
+                    "form": "10-Q",
+                    "acceptance_datetime": pd.Timestamp("2024-11-20"),
+                    "fact_type": fact_type,
+                    "value": value,
+                    "period_start": pd.Timestamp(start),
+                    "period_end": pd.Timestamp(end),
+                    "period_instant": pd.NaT,
+                    "period_type": "duration",
+                    "is_dimensioned": False,
+                })
+    return pd.DataFrame(rows)
+
+def test_consistent_filing_not_flagged():
+    flags = check_consistency(facts_frame({"a": {QUARTER: CONSISTENT}}))
+    assert flags.empty
+    assert list(flags.columns) == FLAG_COLUMNS
+
+@pytest.mark.parametrize("changes, rule", [
+    ({"gross_profit": 40_000e6}, "gross_profit_le_revenue"),
+    ({"operating_income": 30_000e6}, "operating_income_le_gross_profit"),
+    ({"eps": 7.8}, "eps_x_shares_eq_net_income"),
+    ({"diluted_shares": 2_477e6}, "eps_x_shares_eq_net_income"),
+    ({"eps": -0.78}, "eps_x_shares_eq_net_income"),
+])
+def test_violation_flagged(changes, rule):
+    flags = check_consistency(facts_frame({
+        "good": {QUARTER: CONSISTENT},
+        "bad": {QUARTER: {**CONSISTENT, **changes}},
+    }))
+    assert set(flags["accession_no"]) == {"bad"}
+    assert rule in set(flags["rule"])
+    row = flags.loc[flags["rule"] == rule].iloc[0]
+    assert row["cik"] == 1001
+    assert row["period_end"] == pd.Timestamp(QUARTER[1])
+
+def test_eps_rounding_tolerated():
+    # 0.78 is NVIDIA's 19,309 / 24,774 = 0.7794 rounded to the cent.
+    values = {**CONSISTENT, "net_income": 19_309e6 * 0.96}
+    assert check_consistency(facts_frame({"a": {QUARTER: values}})).empty
+    flags = check_consistency(facts_frame({"a": {QUARTER: values}}),
+                              tolerances={"eps_x_shares_eq_net_income": 0.01})
+    assert list(flags["rule"]) == ["eps_x_shares_eq_net_income"]
+
+def test_periods_compared_separately():
+    # Year-to-date gross profit above the quarter's revenue is fine.
+    ytd = {k: v * 3 for k, v in CONSISTENT.items() if k != "eps"}
+    flags = check_consistency(facts_frame({"a": {QUARTER: CONSISTENT, YEAR_TO_DATE: ytd}}))
+    assert flags.empty
+    wide = wide_facts(facts_frame({"a": {QUARTER: CONSISTENT, YEAR_TO_DATE: ytd}}))
+    assert len(wide) == 2
+
+def test_missing_fact_types_skip_rule():
+    values = {"revenue": 1.0, "gross_profit": 2.0}
+    flags = check_consistency(facts_frame({"a": {QUARTER: values}}))
+    assert list(flags["rule"]) == ["gross_profit_le_revenue"]
+
+def test_dimensioned_rows_ignored():
+    df = facts_frame({"a": {QUARTER: CONSISTENT}})
+    segment = df.loc[df["fact_type"] == "revenue"].assign(
+        value=1.0, is_dimensioned=True)
+    df = pd.concat([segment, df], ignore_index=True)
+    assert check_consistency(df).empty
+
+def test_check_store(tmp_path):
+    instance = (REPO_ROOT/"tests/data/xbrl/sample_instance.xml").read_bytes()
+    rows = FilingFacts(parse_instance(instance)).get_rows()
+    filing = type("Filing", (), {
+        "cik": 1045810, "accession_no": "0001045810-24-000316", "form": "10-Q",
+        "acceptance_datetime": "2024-11-20 21:31:22"})
+    tag_filing_rows(rows, filing).to_parquet(tmp_path/"1045810.parquet")
+    assert check_store(tmp_path).empty
+    assert check_store(tmp_path/"empty").empty
+
+@pytest.mark.slow
+def test_whole_store_is_fast():
+    rng = np.random.default_rng(0)
+    n_filings = 100_000
+    fact_types = list(CONSISTENT)
+    n = n_filings * len(fact_types)
+    values = np.tile(list(CONSISTENT.values()), n_filings)
+    bad = rng.random(n_filings) < 0.01
+    values[np.flatnonzero(bad) * len(fact_types) + 1] *= 2
+    df = pd.DataFrame({
+        "cik": np.repeat(np.arange(n_filings), len(fact_types)),
+        "accession_no": np.repeat([f"a{i}" for i in range(n_filings)], len(fact_types)),
+        "form": "10-Q",
+        "acceptance_datetime": pd.Timestamp("2024-11-20"),
+        "fact_type": np.tile(fact_types, n_filings),
+        "value": values,
+        "period_start": pd.Timestamp(QUARTER[0]),
+        "period_end": pd.Timestamp(QUARTER[1]),
+        "period_type": "duration",
+    })
+    start = time.perf_counter()
+    flags = check_consistency(df)
+    assert time.perf_counter() - start < 10
+    assert set(flags["cik"]) == set(np.flatnonzero(bad))
@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+from edgar import Filing
+
+import stock_lab.utils
+from stock_lab.crawl import (
+    FILING_COLUMNS, tag_filing_rows, load_fact_store, extract_filing_facts
+)
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+@pytest.fixture
+def nvda_ten_q():
+    return stock_lab.utils.load_filing_from_file(
+        stock_lab.utils.REPO_ROOT/"tests/data/nvda/0001045810-24-000316.pkl"
+    )
+
+def test_tag_filing_rows(nvda_ten_q):
+    rows = pd.DataFrame({"fact_type": ["revenue", "eps"], "value": [1.0, 2.0]})
+    tagged = tag_filing_rows(rows, nvda_ten_q)
+    assert list(tagged.columns) == FILING_COLUMNS + ["fact_type", "value"]
+    assert (tagged["cik"] == 1045810).all()
+    assert (tagged["accession_no"] == "0001045810-24-000316").all()
+    assert (tagged["form"] == "10-Q").all()
+    assert tagged["acceptance_datetime"].iloc[0] == \
+        pd.Timestamp("2024-11-20 21:31:22", tz="UTC")
+
+def test_tag_filing_rows_without_acceptance():
+    filing = Filing(cik=1045810, company="NVIDIA CORP", form="10-Q",
+                    filing_date="2024-11-20", accession_no="0001045810-24-000316")
+    tagged = tag_filing_rows(pd.DataFrame({"value": [1.0]}), filing)
+    assert pd.isna(tagged["acceptance_datetime"].iloc[0])
+
+def test_load_fact_store(tmp_path):
+    pd.DataFrame({"cik": [1], "value": [1.0]}).to_parquet(tmp_path/"1.parquet")
+    pd.DataFrame({"cik": [2], "value": [2.0]}).to_parquet(tmp_path/"2.parquet")
+    facts = load_fact_store(tmp_path)
+    assert facts["cik"].tolist() == [1, 2]
+
+def test_load_empty_fact_store(tmp_path):
+    assert load_fact_store(tmp_path).empty
+
+# -----------------------------------------------------------------------------
+#                               Integration tests
+# -----------------------------------------------------------------------------
+
+@pytest.mark.integration
+def test_extract_filing_facts(nvda_ten_q):
+    rows = extract_filing_facts(nvda_ten_q)
+    assert set(rows["cik"]) == {1045810}
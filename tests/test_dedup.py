@@ -0,0 +1,104 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_lab.dedup import dedup_facts, dedup_key_columns, dedup_store
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+def fact(cik, accession, accepted, period_end, value, fact_type="revenue",
+         period_start="2024-01-01", segment=None):
+    return {
+        "cik": cik,
+        "accession_no": accession,
+        "acceptance_datetime": pd.Timestamp(accepted, tz="UTC") if accepted else pd.NaT,
+        "fact_type": fact_type,
+        "value": value,
+        "period_start": pd.Timestamp(period_start),
+        "period_end": pd.Timestamp(period_end),
+        "period_instant": pd.NaT,
+        "is_dimensioned": segment is not None,
+        "dim_srt_SegmentAxis": segment,
+    }
+
+@pytest.fixture
+def facts():
+    return pd.DataFrame([
+        fact(1, "q1", "2024-05-01", "2024-03-31", 100.0),
+        # Same period in the next year's comparative column, unchanged
+        fact(1, "q1-next", "2025-05-01", "2024-03-31", 100.0),
+        # Amendment restating it, accepted in between
+        fact(1, "q1a", "2024-09-15", "2024-03-31", 95.0),
+        fact(1, "q1", "2024-05-01", "2024-03-31", 60.0, segment="us-gaap:ProductMember"),
+        fact(1, "q1", "2024-05-01", "2024-03-31", 2.0, fact_type="eps"),
+        fact(2, "b1", None, "2024-03-31", 7.0),
+        fact(2, "b2", "2024-06-01", "2024-03-31", 8.0),
+    ])
+
+def test_key_columns(facts):
+    assert dedup_key_columns(facts) == [
+        "cik", "fact_type", "period_start", "period_end", "period_instant",
+        "is_dimensioned", "dim_srt_SegmentAxis"]
+
+def test_dedup(facts):
+    kept, superseded = dedup_facts(facts)
+    assert kept["accession_no"].tolist() == ["q1-next", "q1", "q1", "b2"]
+    assert kept["value"].tolist() == [100.0, 60.0, 2.0, 8.0]
+    assert superseded["accession_no"].tolist() == ["q1", "q1a", "b1"]
+    assert superseded["superseded_by"].tolist() == ["q1-next", "q1-next", "b2"]
+    assert superseded["restated"].tolist() == [False, True, True]
+    assert len(kept) + len(superseded) == len(facts)
+    assert "superseded_by" not in facts.columns
+
+def test_dedup_same_acceptance_keeps_last_loaded():
+    facts = pd.DataFrame([
+        fact(1, "a", "2024-05-01", "2024-03-31", 1.0),
+        fact(1, "b", "2024-05-01", "2024-03-31", 2.0),
+    ])
+    kept, superseded = dedup_facts(facts)
+    assert kept["value"].tolist() == [2.0]
+    assert superseded["superseded_by"].tolist() == ["b"]
+
+def test_dedup_without_duplicates(facts):
+    unique = facts.iloc[[0, 3, 4, 6]].reset_index(drop=True)
+    kept, superseded = dedup_facts(unique)
+    pd.testing.assert_frame_equal(kept, unique)
+    assert superseded.empty
+
+def test_dedup_empty(facts):
+    kept, superseded = dedup_facts(facts.head(0))
+    assert kept.empty and superseded.empty
+    assert "superseded_by" in superseded.columns
+
+def test_dedup_store(tmp_path, facts):
+    for cik, company_df in facts.groupby("cik"):
+        company_df.to_parquet(tmp_path/f"{cik}.parquet", index=False)
+    kept, superseded = dedup_store(tmp_path)
+    assert len(kept) == 4 and len(superseded) == 3
+
+@pytest.mark.slow
+def test_dedup_millions_of_rows():
+    n = 3_000_000
+    rng = np.random.default_rng(0)
+    ends = pd.Timestamp("2010-03-31") + pd.to_timedelta(rng.integers(0, 60, n) * 91, "D")
+    facts = pd.DataFrame({
+        "cik": rng.integers(0, 5000, n),
+        "accession_no": rng.integers(0, 10**6, n),
+        "acceptance_datetime": pd.Timestamp("2010-01-01", tz="UTC")
+            + pd.to_timedelta(rng.integers(0, 10**8, n), "s"),
+        "fact_type": rng.choice(["revenue", "eps", "net_income"], n),
+        "value": rng.random(n),
+        "period_start": ends - pd.Timedelta(90, "D"),
+        "period_end": ends,
+        "period_instant": pd.NaT,
+    })
+    started = time.perf_counter()
+    kept, superseded = dedup_facts(facts)
+    assert time.perf_counter() - started < 20
+    expected = facts.drop_duplicates(["cik", "fact_type", "period_end"])
+    assert len(kept) == len(expected)
+    assert len(kept) + len(superseded) == n
@@ -0,0 +1,111 @@
+from collections import namedtuple
+
+import pandas as pd
+import pyarrow.ipc
+import pyarrow.parquet
+import pytest
+
+import stock_lab.utils
+from stock_lab.export import export_facts, fold_dimensions, FactsWriter
+
+NVDA_DIR = stock_lab.utils.REPO_ROOT/"tests/data/nvda"
+
+FakeFiling = namedtuple("FakeFiling", ["accession_no", "n_rows"])
+
+def fake_parse(filing):
+    """Stand-in for XBRL parsing; must be module level to pickle."""
+    if getattr(filing, "n_rows", 1) < 0:
+        raise ValueError("unparseable")
+    n = getattr(filing, "n_rows", 3)
+    return pd.DataFrame({
+        "concept": ["us-gaap:Revenues"] * n,
+        "value": [str(i) for i in range(n)],
+        "period_end": ["2024-10-27"] * n,
+        "decimals": [None] * n,
+    })
+
+def segment_parse(filing):
+    """Facts whose dimension axes differ from filing to filing."""
+    df = fake_parse(filing)
+    df[f"dim_{filing.accession_no}_Axis"] = ["Compute"] + [None] * (len(df) - 1)
+    return df
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+@pytest.fixture
+def filings():
+    return [FakeFiling(f"acc-{i}", 5) for i in range(8)]
+
+def test_writer_batches_row_groups(tmp_path):
+    path = tmp_path/"facts.parquet"
+    with FactsWriter(path, "parquet", row_group_size=4) as writer:
+        for _ in range(5):
+            writer.write(fake_parse(FakeFiling("a", 3)))
+    meta = pyarrow.parquet.ParquetFile(path).metadata
+    assert meta.num_rows == 15
+    assert meta.num_row_groups == 4
+
+def test_writer_conforms_later_frames(tmp_path):
+    path = tmp_path/"facts.parquet"
+    with FactsWriter(path, "parquet", row_group_size=1) as writer:
+        writer.write(pd.DataFrame({"a": ["x"], "b": [None]}))
+        with pytest.warns(UserWarning, match=r"\['c'\]"):
+            writer.write(pd.DataFrame({"b": ["y"], "c": [1]}))
+    df = pd.read_parquet(path)
+    assert list(df.columns) == ["a", "b"]
+    assert df["b"].tolist() == [None, "y"]
+
+def test_fold_dimensions():
+    df = pd.DataFrame({
+        "value": [1.0, 2.0, 3.0],
+        "dim_srt_SegmentsAxis": [None, "Compute", "Compute"],
+        "dim_srt_GeographyAxis": [None, None, "US"],
+    })
+    folded = fold_dimensions(df)
+    assert list(folded.columns) == ["value", "dimensions"]
+    assert folded["dimensions"].tolist() == [
+        None, "srt_SegmentsAxis=Compute", "srt_GeographyAxis=US;srt_SegmentsAxis=Compute"]
+
+def test_writer_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        FactsWriter(tmp_path/"facts.xlsx", "xlsx")
+
+@pytest.mark.parametrize("name, read", [
+    ("facts.parquet", pd.read_parquet),
+    ("facts.csv.gz", pd.read_csv),
+    ("facts.arrow", lambda p: pyarrow.ipc.open_file(p).read_pandas()),
+])
+def test_export_formats(tmp_path, filings, name, read):
+    path = tmp_path/name
+    stats = export_facts(filings, path, parse=fake_parse, workers=2,
+                         row_group_size=7)
+    assert stats.filings == 8
+    assert stats.rows == 40
+    assert stats.bytes == path.stat().st_size
+    assert stats.rows_per_second > 0
+    df = read(path)
+    assert len(df) == 40
+    assert sorted(df["accession_no"].unique()) == [f"acc-{i}" for i in range(8)]
+
+def test_export_keeps_dimensions_of_every_filing(tmp_path, filings):
+    path = tmp_path/"facts.parquet"
+    stats = export_facts(filings, path, parse=segment_parse, workers=2, row_group_size=7)
+    assert stats.rows == 40
+    df = pd.read_parquet(path)
+    assert sorted(df["dimensions"].dropna()) == [f"acc-{i}_Axis=Compute" for i in range(8)]
+
+def test_export_records_failures(tmp_path):
+    filings = [FakeFiling("good", 2), FakeFiling("bad", -1)]
+    stats = export_facts(filings, tmp_path/"facts.parquet", parse=fake_parse,
+                         workers=1)
+    assert stats.rows == 2
+    assert [acc for acc, _ in stats.failures] == ["bad"]
+
+def test_export_from_saved_dir(tmp_path):
+    stats = export_facts(NVDA_DIR, tmp_path/"facts.parquet", parse=fake_parse,
+                         workers=2)
+    assert stats.filings == 12
+    df = pd.read_parquet(tmp_path/"facts.parquet")
+    assert "0001045810-24-000316" in set(df["accession_no"])
@@ -591,6 +591,58 @@ def test_seek_tags_until_found(gaap_dict, df_in, df_expected):
         df_expected.reset_index(drop=True)
     )
 
+CAP_EX = FilingFacts.gaap_tags["cap_ex"]
+
+@pytest.mark.parametrize("concepts, expected_concept, searched", [
+    # Absent tags are skipped without a search
+    (
+        [CAP_EX["tags"][3], CAP_EX["tags"][4]],
+        CAP_EX["tags"][3],
+        [CAP_EX["tags"][3]],
+    ),
+
+    # A present higher-priority tag wins
+    (
+        [CAP_EX["tags"][0], CAP_EX["tags"][3]],
+        CAP_EX["tags"][0],
+        [CAP_EX["tags"][0]],
+    ),
+
+    (
+        [CAP_EX["tags"][4]],
+        CAP_EX["tags"][4],
+        [CAP_EX["tags"][4]],
+    ),
+])
+def test_seek_tags_skips_absent(concepts, expected_concept, searched, monkeypatch):
+    df = pd.DataFrame({
+        "concept": concepts,
+        "value": ["-1"] * len(concepts),
+        "period_end": ["2024-10-27"] * len(concepts),
+        "period_type": ["duration"] * len(concepts),
+    })
+    ff = FilingFacts(df)
+    calls = []
+    get_for_latest_date = ff.get_for_latest_date
+    def spy(tag, target_date):
+        calls.append(tag)
+        return get_for_latest_date(tag, target_date)
+    monkeypatch.setattr(ff, "get_for_latest_date", spy)
+    rows = ff.seek_tags_until_found(CAP_EX)
+    assert set(rows["concept"]) == {expected_concept}
+    assert calls == searched
+
+def test_seek_tags_present_without_dates():
+    # A present but undated tag falls through to the next one.
+    df = pd.DataFrame({
+        "concept": [CAP_EX["tags"][3], CAP_EX["tags"][4]],
+        "value": ["-1", "-2"],
+        "period_end": [None, "2024-10-27"],
+        "period_type": ["duration", "duration"],
+    })
+    rows = FilingFacts(df).seek_tags_until_found(CAP_EX)
+    assert list(rows["value"]) == ["-2"]
+
 @pytest.mark.parametrize("filing_df, expected_df", [
     # Ideal case: single first-matches for each tag
     (
@@ -705,6 +757,113 @@ def test_get_rows_invalid(filing_df):
     with pytest.raises(InvalidFact):
         ff.get_rows()
 
+@pytest.mark.parametrize("filing_df", [
+    pd.DataFrame({
+        "concept": concepts,
+        "value": acceptable_values,
+        "period_start": period_starts,
+        "period_end": period_ends,
+        "period_instant": period_instants,
+        "period_type": period_types
+    })
+    for concepts in [first_concepts, last_concepts]
+])
+def test_get_rows_fast(filing_df):
+    pd.testing.assert_frame_equal(
+        FilingFacts(filing_df).get_rows_fast(),
+        FilingFacts(filing_df).get_rows()
+    )
+
+@pytest.mark.parametrize("filing_df, exception", [
+    (pd.DataFrame(), MissingFact),
+    (pd.DataFrame({
+        "concept": first_concepts[1:],
+        "value": acceptable_values[1:],
+        "period_start": period_starts[1:],
+        "period_end": period_ends[1:],
+        "period_instant": period_instants[1:],
+        "period_type": period_types[1:]
+    }), MissingFact),
+    (pd.DataFrame({
+        "concept": first_concepts,
+        "value": [float('nan')] * len(first_concepts),
+        "period_start": period_starts,
+        "period_end": period_ends,
+        "period_instant": period_instants,
+        "period_type": period_types
+    }), MissingFact),
+    (negative_revenue, InvalidFact),
+    (eps_non_number, InvalidFact),
+    (zero_shares, InvalidFact),
+    (income_non_numeric, InvalidFact),
+    (cap_ex_positive, InvalidFact),
+    (negative_cash_eq, InvalidFact),
+])
+def test_get_rows_fast_raises(filing_df, exception):
+    # Failures are re-run through get_rows so the error is the same one.
+    with pytest.raises(exception) as slow:
+        FilingFacts(filing_df).get_rows()
+    with pytest.raises(exception) as fast:
+        FilingFacts(filing_df).get_rows_fast()
+    assert str(fast.value) == str(slow.value)
+    assert fast.value.fact_type == slow.value.fact_type
+
+@pytest.fixture
+def sample_instance_df():
+    from stock_lab.xbrl_instance import parse_instance
+    path = stock_lab.utils.REPO_ROOT/"tests/data/xbrl/sample_instance.xml"
+    return parse_instance(path.read_bytes())
+
+def test_get_rows_fast_instance(sample_instance_df):
+    ff = FilingFacts(sample_instance_df)
+    # Resolved without falling back to get_rows.
+    fast = ff._fast_rows()
+    pd.testing.assert_frame_equal(fast, FilingFacts(sample_instance_df).get_rows())
+
+def test_get_rows_fast_mixed_dates(sample_instance_df):
+    # Non-ISO dates are left to pd.to_datetime.
+    df = sample_instance_df.copy()
+    df["period_end"] = df["period_end"].str.replace(
+        r"(\d{4})-(\d{2})-(\d{2})", r"\2/\3/\1", regex=True)
+    pd.testing.assert_frame_equal(
+        FilingFacts(df).get_rows_fast(), FilingFacts(df).get_rows())
+
+@pytest.mark.slow
+def test_get_rows_fast_latency(sample_instance_df):
+    import timeit
+    fast = min(timeit.repeat(
+        lambda: FilingFacts(sample_instance_df).get_rows_fast(), number=20, repeat=5))
+    slow = min(timeit.repeat(
+        lambda: FilingFacts(sample_instance_df).get_rows(), number=20, repeat=5))
+    assert fast * 5 < slow
+
+@pytest.mark.parametrize("validator, df", [
+    (values_to_num, pd.DataFrame({"value": ["1", "2.5"]})),
+    (values_not_negative, pd.DataFrame({"value": [1, 2]})),
+    (duration_to_date, pd.DataFrame({
+        "period_start": ["2024-07-29"], "period_end": ["2024-10-27"]})),
+    (instant_to_date, pd.DataFrame({"period_instant": ["2024-10-27"]})),
+])
+def test_validators_leave_input_unchanged(validator, df):
+    before = df.copy()
+    validator(df)
+    pd.testing.assert_frame_equal(df, before)
+
+def test_get_rows_leaves_facts_unchanged(sample_instance_df):
+    before = sample_instance_df.copy()
+    FilingFacts(sample_instance_df).get_rows()
+    FilingFacts(sample_instance_df).get_rows_fast()
+    pd.testing.assert_frame_equal(sample_instance_df, before)
+
+def test_get_rows_threads_share_facts(sample_instance_df):
+    from concurrent.futures import ThreadPoolExecutor
+    ff = FilingFacts(sample_instance_df)
+    expected = FilingFacts(sample_instance_df.copy()).get_rows()
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: ff.get_rows(), range(32)))
+    for rows in results:
+        pd.testing.assert_frame_equal(rows, expected)
+
 # -----------------------------------------------------------------------------
 #                               Integration tests
 # -----------------------------------------------------------------------------
@@ -0,0 +1,131 @@
+import pandas as pd
+import pytest
+import requests
+
+import stock_lab.utils
+from stock_lab.facts import MissingFact
+from stock_lab.fetch import InstanceNotFound
+from stock_lab.feed import (
+    FilingWatcher, ProcessedLedger, parse_current_feed, entry_filing,
+    current_feed_path, latest_filed
+)
+from stock_lab.throttle import ThrottledError
+
+FEED_XML = (stock_lab.utils.REPO_ROOT/"tests/data/feed/getcurrent.atom").read_text()
+NVDA_ACCEPTED = pd.Timestamp("2024-11-20T16:31:22-05:00")
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+def test_current_feed_path():
+    path = current_feed_path("10-Q")
+    assert "type=10-Q" in path
+    assert path.endswith("output=atom")
+
+def test_parse_current_feed():
+    entries = parse_current_feed(FEED_XML)
+    assert [e.accession_no for e in entries] == [
+        "0001045810-24-000316",
+        "0001999999-24-000004",
+        "0001327567-24-000052",
+        "0000950170-24-000001",
+    ]
+    nvda = entries[0]
+    assert nvda.cik == 1045810
+    assert nvda.company == "NVIDIA CORP"
+    assert nvda.form == "10-Q"
+    assert nvda.accepted == NVDA_ACCEPTED
+    assert nvda.link.endswith("0001045810-24-000316-index.htm")
+
+def test_entry_filing_keeps_acceptance():
+    filing = entry_filing(parse_current_feed(FEED_XML)[0])
+    assert filing.accession_no == "0001045810-24-000316"
+    assert filing.filing_date == "2024-11-20"
+    assert filing.acceptance_datetime == NVDA_ACCEPTED
+    assert str(filing.acceptance_datetime.tz) == "UTC"
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = ProcessedLedger(tmp_path/"ledger.sqlite")
+    yield ledger
+    ledger.close()
+
+def fake_fetch(form):
+    return FEED_XML
+
+@pytest.mark.parametrize("amendments, filers", [
+    (True, 4),
+    # Without amendments the 10-Q/A filer is left out.
+    (False, 3),
+])
+def test_latest_filed(amendments, filers):
+    fetched = []
+
+    def fetch(form):
+        fetched.append(form)
+        return FEED_XML
+    filed = latest_filed(fetch=fetch, amendments=amendments)
+    assert fetched == ["10-K", "10-Q"]
+    assert filed[1045810] == NVDA_ACCEPTED
+    assert str(filed.dtype) == "datetime64[ns, UTC]"
+    assert len(filed) == filers
+
+@pytest.mark.parametrize("amendments, expected", [
+    (True, ["0000950170-24-000001", "0001327567-24-000052", "0001999999-24-000004",
+            "0001045810-24-000316"]),
+    (False, ["0000950170-24-000001", "0001327567-24-000052", "0001045810-24-000316"]),
+])
+def test_poll_processes_only_new_quarterly_filings(ledger, amendments, expected):
+    handled = []
+    clock = lambda: NVDA_ACCEPTED.timestamp() + 90
+    watcher = FilingWatcher(ledger, handled.append, fetch=fake_fetch, clock=clock,
+                            amendments=amendments)
+    results = watcher.poll_once()
+    # Oldest acceptance is processed first.
+    assert [e.accession_no for e in handled] == expected
+    assert results[-1][1] == pytest.approx(90)
+    assert watcher.poll_once() == []
+
+def test_poll_skips_seeded_accessions(ledger):
+    ledger.seed(["0001045810-24-000316"])
+    handled = []
+    FilingWatcher(ledger, handled.append, fetch=fake_fetch).poll_once()
+    assert "0001045810-24-000316" not in [e.accession_no for e in handled]
+
+def test_invalid_filings_recorded_not_retried(ledger):
+    def handler(entry):
+        if entry.cik == 1045810:
+            raise MissingFact("no revenue")
+    watcher = FilingWatcher(ledger, handler, fetch=fake_fetch)
+    errors = [e for _, _, e in watcher.poll_once() if e is not None]
+    assert len(errors) == 1
+    assert watcher.poll_once() == []
+    assert ledger.latency_summary()["count"] == 3
+
+@pytest.mark.parametrize("error", [
+    ThrottledError("429"),
+    requests.HTTPError("503 Server Error"),
+    InstanceNotFound("not posted yet"),
+])
+def test_transient_errors_retried(ledger, error):
+    attempts = []
+    def handler(entry):
+        attempts.append(entry.accession_no)
+        if entry.cik == 1045810 and attempts.count(entry.accession_no) == 1:
+            raise error
+    watcher = FilingWatcher(ledger, handler, fetch=fake_fetch)
+    assert [e for _, _, e in watcher.poll_once() if e is not None] == [error]
+    retried = watcher.poll_once()
+    assert [(entry.cik, e) for entry, _, e in retried] == [(1045810, None)]
+    assert ledger.latency_summary()["count"] == 4
+
+def test_latency_summary(ledger):
+    assert ledger.latency_summary()["count"] == 0
+    clock = lambda: NVDA_ACCEPTED.timestamp() + 60
+    FilingWatcher(ledger, lambda e: None, fetch=fake_fetch, clock=clock).poll_once()
+    summary = ledger.latency_summary()
+    assert summary["count"] == 4
+    # Median of the 10-Q/A and Palo Alto latencies
+    assert summary["p50"] == pytest.approx(60 + (19 * 60 + 17 + 25 * 60 + 42) / 2)
+    assert summary["max"] > summary["p50"]
@@ -0,0 +1,165 @@
+import gzip
+import inspect
+import json
+
+import pytest
+from edgar import Filing
+
+import stock_lab.fetch
+import stock_lab.utils
+import stock_lab.xbrl_instance
+from stock_lab.fetch import (
+    IXBRL_KIND, InstanceNotFound, choose_instance, fetch_instance, get_decoded,
+    instance_facts_parser, package_bytes, parse_stored, parsed_kind
+)
+from stock_lab.store import FilingStore
+
+ACCESSION = "0001045810-24-000316"
+FOLDER = "/Archives/edgar/data/1045810/000104581024000316"
+INSTANCE = (stock_lab.utils.REPO_ROOT/"tests/data/xbrl/sample_instance.xml").read_bytes()
+INDEX_ITEMS = [
+    {"name": f"{ACCESSION}.txt", "type": "text.gif", "size": "9874321"},
+    {"name": f"{ACCESSION}-index.html", "type": "text.gif", "size": ""},
+    {"name": "FilingSummary.xml", "type": "text.gif", "size": "30211"},
+    {"name": "nvda-20241027.htm", "type": "text.gif", "size": "2456789"},
+    {"name": "nvda-20241027.xsd", "type": "text.gif", "size": "61234"},
+    {"name": "nvda-20241027_cal.xml", "type": "text.gif", "size": "81234"},
+    {"name": "nvda-20241027_htm.xml", "type": "text.gif", "size": "812345"},
+    {"name": "image001.jpg", "type": "image2.gif", "size": "123456"},
+]
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+class FakeRaw():
+
+    def __init__(self, data):
+        self.data = data
+
+    def read(self, decode_content=True):
+        assert decode_content is False
+        return self.data
+
+class FakeResponse():
+
+    def __init__(self, data, encoding="gzip"):
+        self.raw = FakeRaw(gzip.compress(data) if encoding == "gzip" else data)
+        self.headers = {"Content-Encoding": encoding} if encoding else {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+class FakeArchive():
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.paths = []
+
+    def __call__(self, path, stream=False):
+        assert stream
+        self.paths.append(path)
+        return FakeResponse(self.documents[path])
+
+@pytest.fixture
+def archive():
+    return FakeArchive({
+        f"{FOLDER}/index.json": json.dumps({"directory": {"item": INDEX_ITEMS}}).encode(),
+        f"{FOLDER}/nvda-20241027_htm.xml": INSTANCE,
+    })
+
+@pytest.fixture
+def filing():
+    return Filing(cik=1045810, company="NVIDIA CORP", form="10-Q",
+                  filing_date="2024-11-20", accession_no=ACCESSION)
+
+@pytest.fixture
+def store(tmp_path):
+    with FilingStore(tmp_path/"store") as s:
+        yield s
+
+@pytest.mark.parametrize("encoding", ["gzip", None])
+def test_get_decoded_counts_wire_bytes(encoding):
+    data = b"<xbrl>" + b"0" * 10_000 + b"</xbrl>"
+    response = FakeResponse(data, encoding)
+    decoded, wire = get_decoded("/x", lambda path, stream: response)
+    assert decoded == data
+    assert wire == len(response.raw.data)
+    assert response.closed
+    if encoding == "gzip":
+        assert wire < len(data)
+
+@pytest.mark.parametrize("names, primary, expected", [
+    (["a.htm", "a_cal.xml", "a_htm.xml", "FilingSummary.xml"], "a.htm", ("a_htm.xml", "xbrl")),
+    (["FilingSummary.xml", "a_lab.xml", "a-20101231.xml"], None, ("a-20101231.xml", "xbrl")),
+    (["a.htm", "a_pre.xml", "FilingSummary.xml"], "a.htm", ("a.htm", "ixbrl")),
+    # Report pages of older filings are not instances
+    (["R1.xml", "R2.xml", "FilingSummary.xml", "a-20101231.xml"], None,
+     ("a-20101231.xml", "xbrl")),
+    (["R1.xml", "R2.xml", "a.htm"], "a.htm", ("a.htm", "ixbrl")),
+])
+def test_choose_instance(names, primary, expected):
+    assert choose_instance([{"name": n} for n in names], primary) == expected
+
+def test_choose_instance_raises():
+    with pytest.raises(InstanceNotFound):
+        choose_instance([{"name": "a.htm"}, {"name": "a_pre.xml"}])
+
+def test_package_bytes_prefers_complete_submission():
+    assert package_bytes(INDEX_ITEMS, ACCESSION) == 9874321
+    assert package_bytes(INDEX_ITEMS[1:], ACCESSION) == sum(
+        int(i["size"]) for i in INDEX_ITEMS[2:])
+
+def test_fetch_instance_only(archive, filing, store):
+    result = fetch_instance(filing, store, archive)
+    assert archive.paths == [f"{FOLDER}/index.json", f"{FOLDER}/nvda-20241027_htm.xml"]
+    assert store.get_xbrl(ACCESSION) == INSTANCE
+    assert result.raw_bytes == len(INSTANCE)
+    assert result.wire_bytes < len(INSTANCE)
+    assert result.bytes_saved == 9874321 - result.wire_bytes
+    stats = store.transfer_stats()
+    assert stats["filings"] == 1
+    assert stats["bytes_saved"] == result.bytes_saved
+
+def test_fetch_inline_only_marks_filing(filing, store):
+    items = [i for i in INDEX_ITEMS if not i["name"].endswith(".xml")]
+    archive = FakeArchive({
+        f"{FOLDER}/index.json": json.dumps({"directory": {"item": items}}).encode(),
+    })
+    filing.primary_document = "nvda-20241027.htm"
+    result = fetch_instance(filing, store, archive)
+    assert archive.paths == [f"{FOLDER}/index.json"]
+    assert result.kind == IXBRL_KIND and result.bytes_saved == 0
+    assert store.get(ACCESSION, IXBRL_KIND) == b"nvda-20241027.htm"
+    assert store.transfer_stats()["filings"] == 0
+
+def test_instance_facts_parser_fetches_once(archive, filing, store):
+    parse = instance_facts_parser(store, archive)
+    first = parse(filing)
+    second = parse(filing)
+    assert len(archive.paths) == 2
+    assert "us-gaap:Revenues" in set(first["concept"])
+    assert first.equals(second)
+
+def test_parse_stored_caches_parsed_facts(store, monkeypatch):
+    store.put_xbrl(ACCESSION, INSTANCE)
+    first = parse_stored(store, ACCESSION)
+    assert (ACCESSION, parsed_kind()) in store
+    monkeypatch.setattr(stock_lab.fetch, "parse_instance", None)
+    assert parse_stored(store, ACCESSION).equals(first)
+
+def test_parsed_kind_tracks_concepts():
+    assert parsed_kind() == parsed_kind()
+    assert parsed_kind(["us-gaap:Revenues"]) != parsed_kind()
+
+def test_parsed_kind_tracks_parser_source(monkeypatch):
+    before = parsed_kind()
+    source = inspect.getsource(stock_lab.xbrl_instance)
+    monkeypatch.setattr(stock_lab.fetch.inspect, "getsource",
+                        lambda module: source + "\n# parser edited\n")
+    stock_lab.fetch.parser_fingerprint.cache_clear()
+    try:
+        assert parsed_kind() != before
+    finally:
+        stock_lab.fetch.parser_fingerprint.cache_clear()
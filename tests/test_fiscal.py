@@ -0,0 +1,116 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_lab.fiscal import FiscalCalendar, fiscal_year_ends, period_months
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+def fact(cik, form, period_start, period_end, period_instant=None, value=1.0):
+    return {
+        "cik": cik,
+        "form": form,
+        "fact_type": "revenue",
+        "value": value,
+        "period_start": pd.Timestamp(period_start) if period_start else pd.NaT,
+        "period_end": pd.Timestamp(period_end) if period_end else pd.NaT,
+        "period_instant": pd.Timestamp(period_instant) if period_instant else pd.NaT,
+    }
+
+NVDA, MSFT, AAPL = 1045810, 789019, 320193
+
+@pytest.fixture
+def facts():
+    return pd.DataFrame([
+        # NVDA: 52/53-week years ending late January
+        fact(NVDA, "10-K", "2023-01-30", "2024-01-28"),
+        fact(NVDA, "10-K", "2022-01-31", "2023-01-29"),
+        fact(NVDA, "10-Q", "2024-01-29", "2024-04-28"),
+        fact(NVDA, "10-Q", "2024-04-29", "2024-07-28"),
+        fact(NVDA, "10-K", "2023-10-30", "2024-01-28"),
+        fact(NVDA, "10-Q", None, None, period_instant="2024-04-28"),
+        # MSFT: years ending June 30
+        fact(MSFT, "10-K", "2023-07-01", "2024-06-30"),
+        fact(MSFT, "10-Q", "2024-07-01", "2024-09-30"),
+        fact(MSFT, "10-Q", "2024-01-01", "2024-03-31"),
+        # Six months year to date in a 10-Q is not a fiscal year.
+        fact(MSFT, "10-Q", "2024-01-01", "2024-06-30"),
+        # AAPL: only quarterly filings here, so calendar year is assumed.
+        fact(AAPL, "10-Q", "2024-07-01", "2024-09-28"),
+        fact(AAPL, "10-Q", None, None),
+    ])
+
+@pytest.mark.parametrize("date, month", [
+    ("2024-01-28", "2024-01"),
+    ("2025-02-01", "2025-01"),
+    ("2024-12-31", "2024-12"),
+    ("2024-09-28", "2024-09"),
+    ("2024-03-31", "2024-03"),
+])
+def test_period_months(date, month):
+    months = period_months(np.array([date], dtype="datetime64[ns]"))
+    assert months[0] == np.datetime64(month, "M").astype(np.int64)
+
+def test_fiscal_year_ends(facts):
+    index = fiscal_year_ends(facts).set_index("cik")
+    assert index.loc[NVDA, "fiscal_year_end_month"] == 1
+    assert index.loc[NVDA, "annual_periods"] == 2
+    assert index.loc[MSFT, "fiscal_year_end_month"] == 6
+    assert index.loc[AAPL, "fiscal_year_end_month"] == 12
+    assert index.loc[AAPL, "annual_periods"] == 0
+
+def test_align(facts):
+    aligned = FiscalCalendar.from_facts(facts).align(facts)
+    got = aligned[["fiscal_year", "fiscal_quarter", "calendar_quarter",
+                   "period_quarters"]].astype(object).where(aligned.notna(), None)
+    assert got.values.tolist() == [
+        [2024, 4, "2023Q4", 4],
+        [2023, 4, "2022Q4", 4],
+        [2025, 1, "2024Q1", 1],
+        [2025, 2, "2024Q2", 1],
+        [2024, 4, "2023Q4", 1],
+        [2025, 1, "2024Q1", 0],
+        [2024, 4, "2024Q2", 4],
+        [2025, 1, "2024Q3", 1],
+        [2024, 3, "2024Q1", 1],
+        [2024, 4, "2024Q2", 2],
+        [2024, 3, "2024Q3", 1],
+        [None, None, None, None],
+    ]
+    assert "fiscal_year" not in facts.columns
+
+def test_overrides_and_round_trip(tmp_path, facts):
+    calendar = FiscalCalendar.from_facts(facts, overrides={AAPL: 9})
+    calendar.to_parquet(tmp_path/"calendar.parquet")
+    loaded = FiscalCalendar.from_parquet(tmp_path/"calendar.parquet")
+    pd.testing.assert_frame_equal(loaded.index, calendar.index)
+    assert loaded.year_end_month([AAPL, NVDA, 42]).tolist() == [9, 1, 12]
+    aligned = loaded.align(facts.loc[facts["cik"] == AAPL].head(1))
+    assert aligned["fiscal_year"].tolist() == [2024]
+    assert aligned["fiscal_quarter"].tolist() == [4]
+
+def test_empty_calendar(facts):
+    calendar = FiscalCalendar.from_facts(facts.head(0))
+    aligned = calendar.align(facts)
+    assert aligned["fiscal_quarter"].iloc[6] == 2
+
+@pytest.mark.slow
+def test_align_millions_of_rows():
+    n = 2_000_000
+    rng = np.random.default_rng(0)
+    ends = pd.Timestamp("2000-01-31") + pd.to_timedelta(rng.integers(0, 9000, n), "D")
+    facts = pd.DataFrame({
+        "cik": rng.integers(0, 5000, n),
+        "form": "10-K",
+        "period_start": ends - pd.Timedelta(364, "D"),
+        "period_end": ends,
+    })
+    calendar = FiscalCalendar.from_facts(facts)
+    started = time.perf_counter()
+    aligned = calendar.align(facts)
+    assert time.perf_counter() - started < 10
+    assert aligned["fiscal_quarter"].notna().all()
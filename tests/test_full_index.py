@@ -0,0 +1,104 @@
+import pandas as pd
+import pytest
+
+import stock_lab.utils
+from stock_lab.full_index import (
+    AccessionCatalog, build_catalog, filed_knowledge_time, local_fetch, parse_form_idx,
+    parse_master_idx, quarters_between, index_path, CATALOG_COLUMNS
+)
+
+INDEX_DIR = stock_lab.utils.REPO_ROOT/"tests/data/full_index"
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+@pytest.mark.parametrize("start, end, expected", [
+    ("2024-07-01", "2024-12-31", [(2024, 3), (2024, 4)]),
+    ("2023-12-15", "2024-01-02", [(2023, 4), (2024, 1)]),
+    ("2024-05-01", "2024-05-02", [(2024, 2)]),
+])
+def test_quarters_between(start, end, expected):
+    assert quarters_between(start, end) == expected
+
+def test_index_path():
+    assert index_path(2024, 3) == "/Archives/edgar/full-index/2024/QTR3/form.idx"
+
+def test_parse_form_idx():
+    df = parse_form_idx((INDEX_DIR/"2024/QTR3/form.idx").read_text())
+    assert list(df.columns) == CATALOG_COLUMNS
+    assert len(df) == 6
+    nvda = df.loc[df["accession_no"] == "0001045810-24-000264"].iloc[0]
+    assert nvda["cik"] == 1045810
+    assert nvda["company"] == "NVIDIA CORP"
+    assert nvda["form"] == "10-Q"
+    assert nvda["date_filed"] == pd.Timestamp("2024-08-28")
+    # Forms with spaces and names wider than their column
+    assert "SC 13G" in set(df["form"])
+    long_name = df.loc[df["cik"] == 1999999].iloc[0]
+    assert long_name["company"].endswith("OVERFLOWS THE COLUMN INC")
+    assert long_name["form"] == "10-Q/A"
+
+@pytest.mark.parametrize("quarter", ["QTR3", "QTR4"])
+def test_master_matches_form_idx(quarter):
+    by_form = parse_form_idx((INDEX_DIR/f"2024/{quarter}/form.idx").read_text())
+    by_master = parse_master_idx((INDEX_DIR/f"2024/{quarter}/master.idx").read_text())
+    key = ["accession_no", "form"]
+    pd.testing.assert_frame_equal(
+        by_form.sort_values(key, ignore_index=True),
+        by_master.sort_values(key, ignore_index=True),
+    )
+
+@pytest.fixture
+def catalog():
+    return build_catalog("2024-07-01", "2024-12-31", forms=None,
+                         fetch=local_fetch(INDEX_DIR))
+
+@pytest.mark.parametrize("amendments, forms, n_filings", [
+    (True, {"10-K", "10-Q", "10-Q/A"}, 7),
+    (False, {"10-K", "10-Q"}, 6),
+])
+def test_build_catalog_quarterly_forms(amendments, forms, n_filings):
+    quarterly = build_catalog("2024-07-01", "2024-12-31",
+                              fetch=local_fetch(INDEX_DIR), amendments=amendments)
+    assert set(quarterly.df["form"]) == forms
+    assert len(quarterly) == n_filings
+
+def test_catalog_for_cik(catalog):
+    nvda = catalog.for_cik(1045810)
+    assert nvda["accession_no"].tolist() == [
+        "0001045810-24-000262", "0001045810-24-000264", "0001045810-24-000316"
+    ]
+    assert catalog.for_cik(42).empty
+
+@pytest.mark.parametrize("kwargs, expected", [
+    ({"forms": ["10-Q"], "ciks": [1045810]},
+     ["0001045810-24-000264", "0001045810-24-000316"]),
+    ({"forms": ["10-K", "10-Q"], "start": "2024-11-01", "end": "2024-11-01"},
+     ["0000320193-24-000123"]),
+    ({"forms": ["SC 13G"]},
+     ["0000102909-24-001234"]),
+])
+def test_catalog_filter(catalog, kwargs, expected):
+    assert catalog.filter(**kwargs).df["accession_no"].tolist() == expected
+
+def test_catalog_filings(catalog):
+    filing = next(catalog.filter(ciks=[1045810], forms=["10-Q"]).filings())
+    assert filing.accession_no == "0001045810-24-000264"
+    assert filing.cik == 1045810
+    assert filing.form == "10-Q"
+    assert filing.filing_date == "2024-08-28"
+    assert filing.acceptance_datetime == pd.Timestamp("2024-08-29T04:00:00Z")
+
+@pytest.mark.parametrize("date_filed, known", [
+    ("2024-08-28", "2024-08-29T04:00:00Z"),
+    ("2024-01-05", "2024-01-06T05:00:00Z"),
+])
+def test_filed_knowledge_time(date_filed, known):
+    assert filed_knowledge_time(date_filed) == pd.Timestamp(known)
+    assert str(filed_knowledge_time(date_filed).tz) == "UTC"
+
+def test_catalog_save_load(catalog, tmp_path):
+    catalog.save(tmp_path/"catalog.parquet")
+    loaded = AccessionCatalog.load(tmp_path/"catalog.parquet")
+    pd.testing.assert_frame_equal(loaded.df, catalog.df)
@@ -0,0 +1,177 @@
+import json
+from functools import partial
+
+import pandas as pd
+import pytest
+import requests
+
+import main
+import stock_lab.throttle
+from stock_lab.fetch import filing_folder
+from stock_lab.mock_edgar import (
+    MockEdgarServer, fixture_documents, fixture_quarters, serving
+)
+from stock_lab.throttle import SharedRateLimiter, ThrottledError, sec_get
+
+NVDA_CIK = 1045810
+ACCESSION = "0001045810-24-000316"
+FOLDER = filing_folder(NVDA_CIK, ACCESSION)
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+@pytest.fixture(scope="module")
+def documents():
+    return fixture_documents()
+
+@pytest.fixture
+def limiter(tmp_path, monkeypatch):
+    # Keep the test's request budget apart from the host-wide one.
+    limiter = SharedRateLimiter(tmp_path/"ratelimit.json", cooldown=0.05)
+    monkeypatch.setattr(stock_lab.throttle, "_default_limiter", limiter)
+    return limiter
+
+def test_fixture_documents(documents):
+    tickers = json.loads(documents["/files/company_tickers.json"])
+    assert tickers["0"]["cik_str"] == NVDA_CIK
+    submissions = json.loads(documents[f"/submissions/CIK{NVDA_CIK:010d}.json"])
+    assert len(submissions["filings"]["recent"]["accessionNumber"]) == 12
+    items = json.loads(documents[f"{FOLDER}/index.json"])["directory"]["item"]
+    assert [i["name"] for i in items][-1] == "nvda-20241027_htm.xml"
+    assert b"NVIDIA CORP" in documents["/Archives/edgar/full-index/2024/QTR4/form.idx"]
+
+def test_serves_documents_gzipped(documents, limiter):
+    with serving(MockEdgarServer(documents)) as server:
+        response = sec_get(f"{FOLDER}/nvda-20241027_htm.xml")
+        empty = sec_get("/Archives/edgar/full-index/1999/QTR1/form.idx")
+        with pytest.raises(requests.HTTPError):
+            sec_get("/Archives/edgar/data/1/missing.xml")
+    assert response.content == documents[f"{FOLDER}/nvda-20241027_htm.xml"]
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Form Type" in empty.text
+    assert server.summary()["statuses"] == {200: 2, 404: 1}
+
+def test_throttle_is_retried(documents, tmp_path):
+    limiter = SharedRateLimiter(tmp_path/"ratelimit.json", max_rate=100, min_rate=20,
+                                cooldown=0)
+    server = MockEdgarServer(documents, throttle_rate=0.5, retry_after=0, seed=1)
+    with serving(server):
+        for _ in range(5):
+            sec_get(f"{FOLDER}/index.json", limiter, sleep=lambda s: None)
+    statuses = server.summary()["statuses"]
+    assert statuses[200] == 5
+    assert statuses[429] > 0
+    assert limiter.state()["rate"] < limiter.max_rate
+
+def test_throttle_exhausts_retries(documents, limiter):
+    with serving(MockEdgarServer(documents, throttle_rate=1.0, retry_after=0)):
+        with pytest.raises(ThrottledError):
+            sec_get(f"{FOLDER}/index.json", max_retries=2, sleep=lambda s: None)
+
+def test_failures_raise(documents, limiter):
+    with serving(MockEdgarServer(documents, failure_rate=1.0)):
+        with pytest.raises(requests.HTTPError):
+            sec_get(f"{FOLDER}/index.json")
+
+def test_latency_and_peak_rate(documents, limiter):
+    server = MockEdgarServer(documents, latency=0.02)
+    with serving(server):
+        for _ in range(3):
+            sec_get(f"{FOLDER}/index.json")
+    summary = server.summary()
+    assert summary["p50_seconds"] >= 0.02
+    assert 1 <= summary["peak_requests_per_second"] <= 3
+
+def test_max_rate_throttles(documents):
+    server = MockEdgarServer(documents, max_rate=2)
+    with serving(server):
+        statuses = [requests.get(f"{server.url}{FOLDER}/index.json").status_code
+                    for _ in range(4)]
+    assert statuses == [200, 200, 429, 429]
+
+def test_serving_restores_base_url(documents, monkeypatch):
+    monkeypatch.setenv("EDGAR_BASE_URL", "https://example.com")
+    with serving(MockEdgarServer(documents)) as server:
+        assert stock_lab.throttle.sec_url("/x") == f"{server.url}/x"
+    assert stock_lab.throttle.sec_url("/x") == "https://example.com/x"
+
+# -----------------------------------------------------------------------------
+#                               Integration tests
+# -----------------------------------------------------------------------------
+
+@pytest.mark.slow
+def test_crawl_load(documents, limiter, tmp_path, capsys):
+    """
+    main.py's catalog then crawl --catalog --store workflow against a
+    slow, throttling stand-in that enforces SEC's 10 requests/second.
+    """
+    server = MockEdgarServer(documents, latency=0.02, jitter=0.03, throttle_rate=0.05,
+                             retry_after=0, max_rate=10, seed=7)
+    first, last = fixture_quarters()
+    with serving(server):
+        main.catalog(tmp_path/"catalog.parquet", first, last)
+        main.crawl(tmp_path/"facts", catalog_path=tmp_path/"catalog.parquet",
+                   store_dir=tmp_path/"store", metrics_path=tmp_path/"metrics.json")
+
+    facts = pd.read_parquet(tmp_path/"facts"/f"{NVDA_CIK}.parquet")
+    assert facts["accession_no"].nunique() == 12
+    metrics = json.loads((tmp_path/"metrics.json").read_text())
+    summary = server.summary()
+    assert summary["statuses"][200] == summary["requests"] - summary["statuses"].get(429, 0)
+    assert summary["peak_requests_per_second"] <= 10
+    with capsys.disabled():
+        print(
+            f"\n{metrics['filings']} filings in {metrics['elapsed_seconds']:.1f}s"
+            f" ({metrics['filings_per_second']:.2f}/s),"
+            f" parse p99 <= {metrics['latency']['parse']['p99']}s;"
+            f" server: {summary['requests']} requests {summary['statuses']},"
+            f" p50 {summary['p50_seconds'] * 1000:.0f}ms"
+            f" p99 {summary['p99_seconds'] * 1000:.0f}ms,"
+            f" peak {summary['peak_requests_per_second']}/s"
+        )
+
+@pytest.mark.slow
+def test_crawl_workers_report_metrics(documents, limiter, tmp_path):
+    """
+    crawl --workers merges the telemetry each worker sends back with its
+    company, so metrics match what the workers did.
+    """
+    first, last = fixture_quarters()
+    server = MockEdgarServer(documents)
+    with serving(server):
+        main.catalog(tmp_path/"catalog.parquet", first, last)
+        catalog_requests = server.summary()["requests"]
+        main.crawl(tmp_path/"facts", workers=2, catalog_path=tmp_path/"catalog.parquet",
+                   store_dir=tmp_path/"store", metrics_path=tmp_path/"metrics.json")
+    metrics = json.loads((tmp_path/"metrics.json").read_text())
+    assert metrics["filings"] == 12
+    assert metrics["requests"] == server.summary()["requests"] - catalog_requests
+    assert metrics["latency"]["parse"]["count"] == 12
+
+@pytest.mark.slow
+def test_crawl_load_with_failures(documents, limiter, tmp_path, capsys):
+    """
+    crawl --catalog --store against a stand-in that also answers 500s:
+    the failing company is reported instead of aborting the crawl, and a
+    rerun finishes it from the instances already stored.
+    """
+    first, last = fixture_quarters()
+    with serving(MockEdgarServer(documents)):
+        main.catalog(tmp_path/"catalog.parquet", first, last)
+    capsys.readouterr()
+    failing = MockEdgarServer(documents, latency=0.01, jitter=0.02, throttle_rate=0.05,
+                              failure_rate=0.2, retry_after=0, max_rate=10, seed=7)
+    crawl = partial(main.crawl, tmp_path/"facts", catalog_path=tmp_path/"catalog.parquet",
+                    store_dir=tmp_path/"store", metrics_path=tmp_path/"metrics.json")
+    with serving(failing):
+        crawl()
+    assert f"CIK {NVDA_CIK} failed: HTTPError" in capsys.readouterr().out
+    assert not (tmp_path/"facts"/f"{NVDA_CIK}.parquet").exists()
+
+    rerun = MockEdgarServer(documents)
+    with serving(rerun):
+        crawl()
+    facts = pd.read_parquet(tmp_path/"facts"/f"{NVDA_CIK}.parquet")
+    assert facts["accession_no"].nunique() == 12
+    assert rerun.summary()["requests"] < 24
@@ -0,0 +1,80 @@
+import pytest
+
+import stock_lab.fetch
+import stock_lab.throttle
+from stock_lab.fetch import filing_folder, instance_facts_parser, parsed_kind
+from stock_lab.mock_edgar import (
+    FIXTURE_DIR, INSTANCE_PATH, MockEdgarServer, fixture_documents, serving
+)
+from stock_lab.prefetch import prefetch, prefetch_dir
+from stock_lab.store import FilingStore, XBRL_KIND
+from stock_lab.throttle import SharedRateLimiter
+from stock_lab.utils import load_filings_from_dir
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+@pytest.fixture(scope="module")
+def documents():
+    return fixture_documents()
+
+@pytest.fixture(scope="module")
+def filings():
+    return load_filings_from_dir(FIXTURE_DIR)
+
+@pytest.fixture
+def limiter(tmp_path, monkeypatch):
+    # Keep the test's request budget apart from the host-wide one.
+    limiter = SharedRateLimiter(tmp_path/"ratelimit.json", max_rate=1000, burst=100)
+    monkeypatch.setattr(stock_lab.throttle, "_default_limiter", limiter)
+    return limiter
+
+def test_prefetch_dir(documents, filings, limiter, tmp_path):
+    server = MockEdgarServer(documents)
+    with serving(server):
+        summary = prefetch_dir(FIXTURE_DIR, tmp_path/"store", parse_workers=2)
+    assert summary == {"filings": 12, "cached": 0, "fetched": 12, "parsed": 12,
+                       "inline": 0, "failures": []}
+    assert server.summary()["requests"] == 24
+    with FilingStore(tmp_path/"store") as store:
+        assert all((f.accession_no, parsed_kind()) in store for f in filings)
+
+def test_prefetch_skips_cached(documents, filings, limiter, tmp_path):
+    with serving(MockEdgarServer(documents)):
+        prefetch(filings[:3], tmp_path/"store", parse_workers=1)
+    server = MockEdgarServer(documents)
+    with serving(server):
+        summary = prefetch(filings, tmp_path/"store", parse_workers=1)
+    assert summary["cached"] == 3 and summary["fetched"] == 9
+    assert server.summary()["requests"] == 18
+
+def test_prefetch_parses_stored_instances(filings, tmp_path):
+    with FilingStore(tmp_path/"store") as store:
+        store.put(filings[0].accession_no, XBRL_KIND, INSTANCE_PATH.read_bytes())
+
+    def offline(path, stream=False):
+        raise AssertionError(f"Unexpected request for {path}")
+
+    summary = prefetch(filings[:1], tmp_path/"store", parse_workers=1, get=offline)
+    assert summary["parsed"] == 1 and summary["fetched"] == 0
+
+def test_prefetch_records_failures(documents, filings, limiter, tmp_path):
+    folder = filing_folder(filings[0].cik, filings[0].accession_no)
+    missing = {k: v for k, v in documents.items() if k != f"{folder}/index.json"}
+    with serving(MockEdgarServer(missing)):
+        summary = prefetch(filings[:2], tmp_path/"store", parse_workers=1)
+    assert summary["fetched"] == 1 and summary["parsed"] == 1
+    assert [accession for accession, _ in summary["failures"]] == [filings[0].accession_no]
+
+def test_extraction_starts_hot(documents, filings, limiter, tmp_path, monkeypatch):
+    with serving(MockEdgarServer(documents)):
+        prefetch(filings[:1], tmp_path/"store", parse_workers=1)
+
+    def cold(*args, **kwargs):
+        raise AssertionError("parsed again")
+
+    monkeypatch.setattr(stock_lab.fetch, "parse_instance", cold)
+    with FilingStore(tmp_path/"store") as store:
+        facts_df = instance_facts_parser(store, get=cold)(filings[0])
+    assert "us-gaap:Revenues" in set(facts_df["concept"])
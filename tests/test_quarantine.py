@@ -0,0 +1,105 @@
+import pytest
+from edgar import Filing
+
+import stock_lab.crawl
+from stock_lab.crawl import process_company
+from stock_lab.facts import FilingFacts, MissingFact, InvalidFact
+from stock_lab.quarantine import QuarantineLedger
+
+from tests.test_data import negative_revenue
+
+ACCESSION = "0000000001-24-000001"
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+class FakeClock():
+
+    def __init__(self, start=1_700_000_000.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def quarantine(tmp_path, clock):
+    with QuarantineLedger(tmp_path/"quarantine.sqlite", ttl=3600, clock=clock) as q:
+        yield q
+
+def failure(fact_type, error_class=MissingFact):
+    error = error_class(f"no {fact_type}")
+    error.fact_type = fact_type
+    return error
+
+def test_get_rows_errors_carry_fact_type():
+    with pytest.raises(InvalidFact) as info:
+        FilingFacts(negative_revenue).get_rows()
+    assert info.value.fact_type == "revenue"
+
+def test_record_and_skip(quarantine):
+    quarantine.record(ACCESSION, 1, failure("revenue"))
+    assert quarantine.active([ACCESSION, "0000000001-24-000002"]) == {ACCESSION}
+
+def test_ttl_expiry(quarantine, clock):
+    quarantine.record(ACCESSION, 1, failure("revenue"))
+    clock.now += 3600
+    assert quarantine.active([ACCESSION]) == set()
+
+def test_schema_change_releases_only_that_fact_type(tmp_path, quarantine, clock, monkeypatch):
+    quarantine.record("acc-revenue", 1, failure("revenue"))
+    quarantine.record("acc-eps", 1, failure("eps"))
+    gaap_tags = dict(FilingFacts.gaap_tags)
+    gaap_tags["revenue"] = {**gaap_tags["revenue"],
+                            "tags": gaap_tags["revenue"]["tags"] + ("us-gaap:NewTag",)}
+    monkeypatch.setattr(FilingFacts, "gaap_tags", gaap_tags)
+    with QuarantineLedger(tmp_path/"quarantine.sqlite", ttl=3600, clock=clock) as reopened:
+        assert reopened.active(["acc-revenue", "acc-eps"]) == {"acc-eps"}
+
+def test_validator_version_change_releases_all(tmp_path, quarantine, clock, monkeypatch):
+    quarantine.record(ACCESSION, 1, failure("revenue"))
+    monkeypatch.setattr("stock_lab.quarantine.VALIDATOR_VERSION", 2)
+    assert quarantine.active([ACCESSION]) == set()
+
+def test_repeat_failures_counted_and_release(quarantine):
+    quarantine.record(ACCESSION, 1, failure("revenue"))
+    quarantine.record(ACCESSION, 1, failure("eps", InvalidFact))
+    row = quarantine.listing().iloc[0]
+    assert row["attempts"] == 2
+    assert row["fact_type"] == "eps"
+    assert row["error_class"] == "InvalidFact"
+    quarantine.release(ACCESSION)
+    assert quarantine.listing().empty
+
+def test_summary_groups_failures(quarantine, clock):
+    quarantine.record("a1", 1, failure("revenue"))
+    quarantine.record("a2", 2, failure("revenue"))
+    quarantine.record("a3", 2, failure("cap_ex", InvalidFact))
+    clock.now += 3600
+    quarantine.record("a4", 3, failure("revenue"))
+    summary = quarantine.summary().set_index(["fact_type", "error_class"])
+    assert summary.loc[("revenue", "MissingFact"), "filings"] == 3
+    assert summary.loc[("revenue", "MissingFact"), "active"] == 1
+    assert summary.loc[("revenue", "MissingFact"), "companies"] == 3
+    assert summary.loc[("cap_ex", "InvalidFact"), "filings"] == 1
+
+def test_process_company_skips_quarantined(tmp_path, quarantine, monkeypatch):
+    parsed = []
+    def fake_facts_df(filing):
+        parsed.append(filing.accession_no)
+        return negative_revenue
+    monkeypatch.setattr(stock_lab.crawl, "filing_facts_df", fake_facts_df)
+    filings = [Filing(cik=1, company="A", form="10-Q", filing_date="2024-05-01",
+                      accession_no=ACCESSION)]
+
+    rows, failures = process_company(1, tmp_path, filings=filings, quarantine=quarantine)
+    assert rows == 0
+    assert failures[0][0] == ACCESSION
+    assert quarantine.active([ACCESSION]) == {ACCESSION}
+
+    assert process_company(1, tmp_path, filings=filings, quarantine=quarantine) == (0, [])
+    assert parsed == [ACCESSION]
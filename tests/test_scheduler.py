@@ -0,0 +1,91 @@
+import os
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+from stock_lab.scheduler import (
+    PriorityScheduler, classify_companies, schedule_companies, stored_at,
+    WATCHLIST, RECENT, STALE, BACKFILL
+)
+
+NOW = pd.Timestamp("2024-11-21", tz="UTC")
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+@pytest.fixture
+def companies():
+    return pd.DataFrame({
+        "cik": [1, 2, 3, 4, 5, 6],
+        "last_filed": ["2024-11-20", "2024-11-19", "2024-06-01", "2024-11-20",
+                       "2024-10-01", None],
+        "last_stored": ["2024-11-01 00:00", "2024-11-01 00:00", "2024-01-01 00:00", "2024-11-20 12:00",
+                        None, "2024-11-10 00:00"],
+        "filings": [1, 1, 1, 1, 1, 1],
+    })
+
+def test_classify(companies):
+    df = classify_companies(companies, watchlist={4}, now=NOW).set_index("cik")
+    assert df["klass"].to_dict() == {
+        1: RECENT,     # filed yesterday, stored before that
+        2: RECENT,
+        3: STALE,      # stored 10 months ago
+        4: WATCHLIST,
+        5: STALE,      # never stored
+        6: BACKFILL,
+    }
+    assert df.loc[1, "priority"] < df.loc[2, "priority"]
+    assert df.loc[5, "priority"] < df.loc[3, "priority"]
+
+def test_priority_order_within_class():
+    scheduler = PriorityScheduler({STALE: 1})
+    for cik, priority in [(1, 3.0), (2, 1.0), (3, 2.0)]:
+        scheduler.push(cik, STALE, priority)
+    assert [cik for cik, _ in scheduler] == [2, 3, 1]
+
+def test_weighted_fair_share():
+    scheduler = PriorityScheduler({WATCHLIST: 3, BACKFILL: 1})
+    for cik in range(100):
+        scheduler.push(cik, WATCHLIST)
+        scheduler.push(1000 + cik, BACKFILL)
+    first = Counter(scheduler.pop()[1] for _ in range(40))
+    assert first == {WATCHLIST: 30, BACKFILL: 10}
+
+def test_fair_share_counts_request_cost():
+    scheduler = PriorityScheduler({RECENT: 1, BACKFILL: 1})
+    for cik in range(20):
+        scheduler.push(cik, RECENT, cost=4)
+        scheduler.push(100 + cik, BACKFILL, cost=1)
+    for _ in range(10):
+        scheduler.pop()
+    assert scheduler.spent[RECENT] == pytest.approx(scheduler.spent[BACKFILL], abs=4)
+
+def test_idle_class_does_not_bank_budget():
+    scheduler = PriorityScheduler({WATCHLIST: 1, BACKFILL: 1})
+    for cik in range(10):
+        scheduler.push(cik, BACKFILL)
+    for _ in range(8):
+        scheduler.pop()
+    for cik in range(10):
+        scheduler.push(100 + cik, WATCHLIST)
+    assert Counter(scheduler.pop()[1] for _ in range(4)) == {WATCHLIST: 2, BACKFILL: 2}
+
+def test_empty_pop_raises():
+    with pytest.raises(IndexError):
+        PriorityScheduler().pop()
+
+def test_schedule_companies_drains_everything(companies):
+    order = list(schedule_companies(companies, watchlist={4}, now=NOW))
+    assert sorted(cik for cik, _ in order) == [1, 2, 3, 4, 5, 6]
+    assert order[0] == (4, WATCHLIST)
+
+def test_stored_at(tmp_path):
+    for name in ["10.parquet", "10-0000000010-24-000001.parquet", "20.parquet",
+                 "metrics.parquet"]:
+        (tmp_path/name).touch()
+    os.utime(tmp_path/"20.parquet", (1_700_000_000, 1_700_000_000))
+    times = stored_at(tmp_path)
+    assert sorted(times.index) == [10, 20]
+    assert times[20] == pd.Timestamp(1_700_000_000, unit="s", tz="UTC")
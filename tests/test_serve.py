@@ -0,0 +1,221 @@
+import asyncio
+import json
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import stock_lab.serve
+from stock_lab.crawl import load_fact_store
+from stock_lab.serve import FactServer, FactService, NotFound
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+def fact(cik, fact_type, period_end, accepted, value, accession):
+    return {
+        "cik": cik,
+        "accession_no": accession,
+        "acceptance_datetime": pd.Timestamp(accepted, tz="UTC"),
+        "fact_type": fact_type,
+        "value": value,
+        "period_end": pd.Timestamp(period_end),
+    }
+
+@pytest.fixture
+def facts_dir(tmp_path):
+    rows = [
+        fact(1, "revenue", "2024-03-31", "2024-05-01 21:00", 100.0, "a1"),
+        fact(1, "revenue", "2024-06-30", "2024-08-01 21:00", 110.0, "a2"),
+        fact(1, "eps", "2024-06-30", "2024-08-01 21:00", 1.5, "a2"),
+        # Q1 restated after Q2 was filed
+        fact(1, "revenue", "2024-03-31", "2024-09-15 12:00", 95.0, "a3"),
+        fact(2, "revenue", "2024-06-30", "2024-07-20 13:00", 500.0, "b1"),
+    ]
+    df = pd.DataFrame(rows)
+    for cik, company_df in df.groupby("cik"):
+        company_df.to_parquet(tmp_path/f"{cik}.parquet", index=False)
+    return tmp_path
+
+def test_history(facts_dir):
+    service = FactService(facts_dir)
+    rows = json.loads(asyncio.run(service.history(1)))
+    assert len(rows) == 4
+    rows = json.loads(asyncio.run(service.history(1, "revenue")))
+    assert [r["value"] for r in rows] == [100.0, 110.0, 95.0]
+
+def test_history_as_of_hides_later_restatements(facts_dir):
+    service = FactService(facts_dir)
+    rows = json.loads(asyncio.run(service.history(1, "revenue", "2024-09-01")))
+    assert sorted(r["value"] for r in rows) == [100.0, 110.0]
+
+def test_history_missing_company(facts_dir):
+    with pytest.raises(NotFound):
+        asyncio.run(FactService(facts_dir).history(3))
+
+def test_history_includes_feed_files(facts_dir):
+    feed = pd.DataFrame([fact(1, "revenue", "2024-09-30", "2024-11-01 21:00", 120.0, "a4")])
+    feed.to_parquet(facts_dir/"1-a4.parquet", index=False)
+    pd.DataFrame([fact(3, "eps", "2024-09-30", "2024-11-02 21:00", 0.5, "c1")]).to_parquet(
+        facts_dir/"3-c1.parquet", index=False)
+    # Company 12's file is not company 1's.
+    pd.DataFrame([fact(12, "eps", "2024-09-30", "2024-11-02 21:00", 9.0, "d1")]).to_parquet(
+        facts_dir/"12.parquet", index=False)
+    service = FactService(facts_dir)
+    rows = json.loads(asyncio.run(service.history(1, "revenue")))
+    assert [r["value"] for r in rows] == [100.0, 110.0, 95.0, 120.0]
+    rows = json.loads(asyncio.run(service.history(3)))
+    assert [r["value"] for r in rows] == [0.5]
+
+def test_history_refreshed_after_feed_filing(facts_dir):
+    service = FactService(facts_dir)
+    asyncio.run(service.history(2))
+    feed = pd.DataFrame([fact(2, "revenue", "2024-09-30", "2024-10-20 13:00", 550.0, "b2")])
+    feed.to_parquet(facts_dir/"2-b2.parquet", index=False)
+    rows = json.loads(asyncio.run(service.history(2)))
+    assert [r["value"] for r in rows] == [500.0, 550.0]
+
+def test_cross_section(facts_dir):
+    service = FactService(facts_dir)
+    rows = json.loads(asyncio.run(service.cross_section("revenue", "2024-08-15")))
+    assert {r["cik"]: r["value"] for r in rows} == {1: 110.0, 2: 500.0}
+    # Company 2 had filed nothing yet.
+    rows = json.loads(asyncio.run(service.cross_section("revenue", "2024-06-01")))
+    assert {r["cik"]: r["value"] for r in rows} == {1: 100.0}
+
+def test_cache_hits_and_eviction(facts_dir):
+    service = FactService(facts_dir, max_entries=2)
+
+    async def run():
+        await service.history(1)
+        await service.history(1)
+        await service.history(2)
+        await service.history(1, "eps")
+    asyncio.run(run())
+    assert service.stats() == {
+        "entries": 2, "hits": 1, "misses": 3, "coalesced": 0, "in_flight": 0}
+    # Least recently used entry (company 1, all facts) was evicted.
+    assert ("history", 1, None, None) not in [k[:4] for k in service.cache]
+
+def test_history_refreshed_after_recrawl(facts_dir):
+    service = FactService(facts_dir)
+    asyncio.run(service.history(2))
+    df = pd.read_parquet(facts_dir/"2.parquet")
+    df.assign(value=df["value"] * 2).to_parquet(facts_dir/"2.parquet", index=False)
+    rows = json.loads(asyncio.run(service.history(2)))
+    assert rows[0]["value"] == 1000.0
+
+def test_cross_section_refreshed_after_crawl(facts_dir):
+    service = FactService(facts_dir)
+    asyncio.run(service.cross_section("revenue", "2024-08-15"))
+    new = pd.DataFrame([fact(3, "revenue", "2024-06-30", "2024-07-25 13:00", 7.0, "c1")])
+    new.to_parquet(facts_dir/"3.parquet", index=False)
+    rows = json.loads(asyncio.run(service.cross_section("revenue", "2024-08-15")))
+    assert {r["cik"]: r["value"] for r in rows} == {1: 110.0, 2: 500.0, 3: 7.0}
+
+def test_index_built_once_across_threads(facts_dir, monkeypatch):
+    builds = []
+
+    def slow_load(facts_dir):
+        builds.append(1)
+        time.sleep(0.05)
+        return load_fact_store(facts_dir)
+
+    monkeypatch.setattr(stock_lab.serve, "load_fact_store", slow_load)
+    service = FactService(facts_dir)
+    threads = [threading.Thread(target=service._build_index) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1
+
+def test_identical_requests_coalesced(facts_dir):
+    service = FactService(facts_dir)
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return b"[]"
+
+    async def run():
+        waiters = [asyncio.ensure_future(service.query("key", slow)) for _ in range(10)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*waiters)
+    assert asyncio.run(run()) == [b"[]"] * 10
+    assert len(calls) == 1
+    assert service.stats()["coalesced"] == 9
+    assert service.stats()["in_flight"] == 0
+
+def test_failed_query_not_cached(facts_dir):
+    service = FactService(facts_dir)
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        asyncio.run(service.query("key", fail))
+    assert service.cache == {} and service.in_flight == {}
+    assert asyncio.run(service.query("key", lambda: b"ok")) == b"ok"
+
+# -----------------------------------------------------------------------------
+#                                Integration tests
+# -----------------------------------------------------------------------------
+
+async def get(reader, writer, path):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while (line := await reader.readline()) != b"\r\n":
+        name, _, value = line.decode().partition(":")
+        headers[name.lower()] = value.strip()
+    body = await reader.readexactly(int(headers["content-length"]))
+    return status, json.loads(body)
+
+@pytest.mark.parametrize("path, status", [
+    ("/health", 200),
+    ("/companies/1/facts?fact_type=eps", 200),
+    ("/companies/3/facts", 404),
+    ("/companies/abc/facts", 400),
+    ("/cross_section", 400),
+    ("/cross_section?fact_type=revenue&date=2024-08-15", 200),
+    ("/cross_section?fact_type=revenue&date=someday", 400),
+    ("/companies/1/facts?as_of=2024-13-45", 400),
+    ("/nowhere", 404),
+])
+def test_routes(facts_dir, path, status):
+    async def run():
+        server = await FactServer(FactService(facts_dir), port=0).start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        try:
+            return await get(reader, writer, path)
+        finally:
+            writer.close()
+            await server.close()
+    assert asyncio.run(run())[0] == status
+
+def test_keep_alive_and_metrics(facts_dir):
+    async def run():
+        server = await FactServer(FactService(facts_dir), port=0).start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        try:
+            for _ in range(5):
+                status, rows = await get(reader, writer, "/companies/1/facts")
+                assert status == 200 and len(rows) == 4
+            return await get(reader, writer, "/metrics")
+        finally:
+            writer.close()
+            await server.close()
+    status, metrics = asyncio.run(run())
+    assert status == 200
+    assert metrics["requests"] == 5
+    assert metrics["cache"]["hits"] == 4 and metrics["cache"]["misses"] == 1
+    history = metrics["latency"]["history"]
+    assert history["count"] == 5
+    assert history["p50"] <= history["p99"]
@@ -0,0 +1,63 @@
+import pytest
+
+import stock_lab.utils
+from stock_lab.store import FilingStore, DocumentNotFound
+
+NVDA_DIR = stock_lab.utils.REPO_ROOT/"tests/data/nvda"
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+@pytest.fixture
+def store(tmp_path):
+    with FilingStore(tmp_path/"store") as s:
+        yield s
+
+def test_put_get_roundtrip(store):
+    store.put("0000000001-24-000001", "xbrl", b"<xbrl>one</xbrl>")
+    store.put("0000000001-24-000002", "xbrl", b"<xbrl>two</xbrl>")
+    assert store.get_xbrl("0000000001-24-000002") == b"<xbrl>two</xbrl>"
+    assert store.get_xbrl("0000000001-24-000001") == b"<xbrl>one</xbrl>"
+
+def test_duplicate_content_stored_once(store):
+    data = b"same bytes" * 1000
+    first = store.put("0000000001-24-000001", "xbrl", data)
+    second = store.put("0000000001-24-000002", "xbrl", data)
+    assert first == second
+    stats = store.stats()
+    assert stats["documents"] == 2
+    assert stats["blobs"] == 1
+    assert stats["stored_bytes"] < stats["raw_bytes"]
+
+def test_missing_document_raises(store):
+    with pytest.raises(DocumentNotFound):
+        store.get("0000000001-24-000001", "xbrl")
+
+def test_contains(store):
+    store.put("0000000001-24-000001", "xbrl", b"x")
+    assert ("0000000001-24-000001", "xbrl") in store
+    assert "0000000001-24-000001" not in store
+
+def test_packs_roll_over(tmp_path):
+    with FilingStore(tmp_path/"store", max_pack_bytes=10) as s:
+        for i in range(3):
+            s.put(f"acc-{i}", "xbrl", f"document {i}".encode() * 10)
+        assert len(list(s.pack_dir.glob("pack-*.zst"))) == 3
+        assert s.get("acc-1", "xbrl") == b"document 1" * 10
+
+def test_reopen_reads_existing(tmp_path):
+    with FilingStore(tmp_path/"store") as s:
+        s.put("acc", "xbrl", b"persisted")
+    with FilingStore(tmp_path/"store") as s:
+        assert s.get("acc", "xbrl") == b"persisted"
+
+def test_import_pickles(store):
+    imported = store.import_pickles(NVDA_DIR)
+    assert len(imported) == 12
+    assert store.accessions() == sorted(imported)
+    filing = store.get_filing("0001045810-24-000316")
+    assert filing.accession_no == "0001045810-24-000316"
+    assert filing.form == "10-Q"
+    assert filing == stock_lab.utils.load_filing_from_file(
+        NVDA_DIR/"0001045810-24-000316.pkl")
@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+from edgar import Filing
+
+import stock_lab.crawl
+from stock_lab.crawl import process_company
+from stock_lab.facts import FilingFacts
+from stock_lab.tag_stats import NO_MATCH, TagStats
+
+from tests.test_data import (
+    acceptable_values, first_concepts, last_concepts, period_ends,
+    period_instants, period_starts, period_types
+)
+
+CAP_EX = FilingFacts.gaap_tags["cap_ex"]["tags"]
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+class FakeClock():
+
+    def __init__(self, start=1_700_000_000.0):
+        self.now = start
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+@pytest.fixture
+def tag_stats(tmp_path):
+    with TagStats(tmp_path/"tags.sqlite", clock=FakeClock()) as stats:
+        yield stats
+
+def filing_df(concepts):
+    return pd.DataFrame({
+        "concept": concepts,
+        "value": acceptable_values,
+        "period_start": period_starts,
+        "period_end": period_ends,
+        "period_instant": period_instants,
+        "period_type": period_types
+    })
+
+def test_record_persists(tmp_path, tag_stats):
+    for cik in range(3):
+        tag_stats.record(cik, f"a{cik}", {"cap_ex": CAP_EX[1]})
+    tag_stats.record(9, "b", {"cap_ex": CAP_EX[2]}, missing=["gross_profit"])
+    with TagStats(tmp_path/"tags.sqlite") as reopened:
+        coverage = reopened.coverage().set_index(["fact_type", "tag"])
+    assert coverage.loc[("cap_ex", CAP_EX[1]), "companies"] == 3
+    assert coverage.loc[("cap_ex", CAP_EX[2]), "filings"] == 1
+    assert coverage.loc[("gross_profit", NO_MATCH), "filings"] == 1
+
+def test_coverage(tag_stats):
+    tag_stats.record(1, "a1", {"cap_ex": CAP_EX[0]})
+    tag_stats.record(1, "a2", {"cap_ex": CAP_EX[0]})
+    tag_stats.record(2, "b1", {"cap_ex": CAP_EX[4]})
+    tag_stats.record(3, "c1", missing=["cap_ex"])
+    coverage = tag_stats.coverage().set_index("tag")
+    assert coverage.loc[CAP_EX[0], "filings"] == 2
+    assert coverage.loc[CAP_EX[0], "companies"] == 1
+    assert coverage.loc[CAP_EX[0], "share"] == 0.5
+    assert coverage.loc[CAP_EX[4], "priority"] == 4
+    assert pd.isna(coverage.loc[NO_MATCH, "priority"])
+    assert coverage.index[0] == CAP_EX[0]
+
+def test_process_company_records_tags(tmp_path, tag_stats, monkeypatch):
+    frames = {"a1": filing_df(last_concepts), "a2": filing_df(first_concepts[1:] + [""])}
+    monkeypatch.setattr(stock_lab.crawl, "filing_facts_df",
+                        lambda filing: frames[filing.accession_no])
+    filings = [Filing(cik=1, company="A", form="10-Q", filing_date="2024-05-01",
+                      accession_no=accession) for accession in frames]
+    rows, failures = process_company(1, tmp_path, filings=filings, tag_stats=tag_stats)
+    assert [accession for accession, _ in failures] == ["a2"]
+    coverage = tag_stats.coverage()
+    matched = coverage.loc[coverage["tag"] != NO_MATCH]
+    assert dict(zip(matched["fact_type"], matched["tag"])) == dict(
+        zip(FilingFacts.gaap_tags, last_concepts))
+    missing = coverage.loc[coverage["tag"] == NO_MATCH, "fact_type"]
+    assert list(missing) == ["revenue"]
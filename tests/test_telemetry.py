@@ -0,0 +1,113 @@
+import json
+import pickle
+
+import pytest
+
+from stock_lab.telemetry import CrawlTelemetry, Histogram
+from stock_lab.throttle import request_listeners
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+class FakeClock():
+
+    def __init__(self, start=100.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def telemetry(tmp_path, clock):
+    t = CrawlTelemetry(total=10, metrics_path=tmp_path/"metrics.json",
+                       rate_window=10, progress=False, clock=clock)
+    yield t
+    t.detach()
+
+def test_histogram_quantiles():
+    hist = Histogram(buckets=(0.1, 1.0, 10.0))
+    for seconds in [0.05] * 90 + [0.5] * 9 + [20]:
+        hist.observe(seconds)
+    assert hist.counts == [90, 9, 0, 1]
+    assert hist.quantile(0.5) == 0.1
+    assert hist.quantile(0.95) == 1.0
+    assert hist.quantile(1.0) == 20
+    assert hist.snapshot()["count"] == 100
+
+def test_empty_histogram():
+    assert Histogram().quantile(0.99) == 0.0
+
+def test_progress_and_eta(telemetry, clock):
+    clock.now += 20
+    telemetry.advance(4)
+    telemetry.record_filing(8)
+    assert telemetry.eta_seconds() == pytest.approx(30)
+    assert telemetry.filings_per_second() == pytest.approx(0.4)
+
+def test_eta_unknown_before_progress(telemetry):
+    assert telemetry.eta_seconds() is None
+
+def test_request_rate_uses_trailing_window(telemetry, clock):
+    clock.now += 10
+    telemetry.record_request(50)
+    assert telemetry.request_rate() == pytest.approx(5.0)
+    clock.now += 11
+    assert telemetry.request_rate() == 0.0
+    assert telemetry.requests == 50
+
+def test_cache_hit_ratio(telemetry):
+    for hit in [True, True, True, False]:
+        telemetry.record_cache(hit)
+    assert telemetry.snapshot()["cache_hit_ratio"] == 0.75
+
+def test_stage_records_latency(telemetry):
+    with telemetry.stage("parse"):
+        pass
+    with pytest.raises(ValueError):
+        with telemetry.stage("parse"):
+            raise ValueError()
+    assert telemetry.latencies["parse"].count == 2
+
+def test_attach_counts_sec_get_responses(telemetry):
+    telemetry.attach()
+    for listener in request_listeners:
+        listener(object())
+    assert telemetry.requests == 1
+    telemetry.detach()
+    assert telemetry._on_request not in request_listeners
+
+def test_write_metrics(telemetry, tmp_path):
+    telemetry.set_queue_depth("filings", 7)
+    telemetry.observe("fetch", 0.3)
+    telemetry.write_metrics()
+    metrics = json.loads((tmp_path/"metrics.json").read_text())
+    assert metrics["total"] == 10
+    assert metrics["queue_depths"] == {"filings": 7}
+    assert metrics["latency"]["fetch"]["p50"] == 0.5
+    assert metrics["rate_ceiling"] == 10
+
+def test_context_manager_writes_on_stop(tmp_path, clock):
+    path = tmp_path/"metrics.json"
+    with CrawlTelemetry(total=1, metrics_path=path, progress=False, clock=clock) as t:
+        t.advance()
+    assert json.loads(path.read_text())["done"] == 1
+
+def test_merge_worker_export(telemetry, clock):
+    worker = CrawlTelemetry(progress=False, clock=clock)
+    worker.record_filing(3)
+    worker.record_request(5)
+    worker.record_cache(True)
+    worker.observe("parse", 0.3)
+    telemetry.observe("parse", 2.0)
+    telemetry.merge(pickle.loads(pickle.dumps(worker.export())))
+    snapshot = telemetry.snapshot()
+    assert snapshot["filings"] == 3
+    assert snapshot["requests"] == 5
+    assert snapshot["cache_hit_ratio"] == 1.0
+    assert snapshot["latency"]["parse"]["count"] == 2
+    assert snapshot["latency"]["parse"]["max"] == 2.0
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_lab.facts import FilingFacts
+from stock_lab.tensor import (
+    build_tensor, export_tensor, load_tensor, quarter_codes, quarter_labels
+)
+
+FACT_TYPES = list(FilingFacts.gaap_tags)
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+@pytest.fixture
+def facts():
+    rng = np.random.default_rng(0)
+    n_ciks, n_quarters = 20, 12
+    rows = []
+    for cik in rng.choice(10_000, n_ciks, replace=False):
+        for q in range(n_quarters):
+            end = pd.Timestamp("2021-03-31") + pd.offsets.QuarterEnd(q)
+            for fact_type in FACT_TYPES:
+                if rng.random() < 0.2:
+                    continue
+                instant = FilingFacts.gaap_tags[fact_type]["period_type"] == "instant"
+                rows.append({
+                    "cik": int(cik),
+                    "accession_no": f"{cik}-{q}",
+                    "acceptance_datetime": end + pd.Timedelta(40, "D"),
+                    "fact_type": fact_type,
+                    "value": rng.normal(),
+                    "period_start": pd.NaT if instant else end - pd.Timedelta(90, "D"),
+                    "period_end": pd.NaT if instant else end,
+                    "period_instant": end if instant else pd.NaT,
+                    "period_type": "instant" if instant else "duration",
+                    "is_dimensioned": False,
+                })
+    return pd.DataFrame(rows)
+
+def test_quarter_codes():
+    codes = quarter_codes(pd.to_datetime(
+        ["1970-03-31", "2023-07-01", "2024-03-31", "2024-10-27"]))
+    assert list(quarter_labels(codes)) == ["1970Q1", "2023Q2", "2024Q1", "2024Q4"]
+
+def test_build_tensor_matches_pivot(facts):
+    tensor, mask, ciks, quarters, fact_types = build_tensor(facts)
+    period = facts["period_end"].fillna(facts["period_instant"])
+    expected = facts.assign(quarter=period.dt.to_period("Q").astype(str)).pivot_table(
+        index=["cik", "quarter"], columns="fact_type", values="value", aggfunc="first")
+    expected = expected.reindex(
+        pd.MultiIndex.from_product([ciks, quarters]), columns=fact_types)
+    np.testing.assert_array_equal(tensor.reshape(-1, len(fact_types)), expected.to_numpy())
+    np.testing.assert_array_equal(mask, ~np.isnan(tensor))
+    assert list(fact_types) == FACT_TYPES
+    assert quarters[0] == "2021Q1" and len(quarters) == 12
+
+def test_cell_prefers_quarter_over_year_to_date():
+    end = pd.Timestamp("2024-09-30")
+    df = pd.DataFrame({
+        "cik": [1, 1, 1, 1],
+        "fact_type": ["revenue"] * 4,
+        "value": [90.0, 30.0, 31.0, 5.0],
+        "period_start": pd.to_datetime(["2024-01-01", "2024-07-01", "2024-07-01",
+                                        "2024-07-01"]),
+        "period_end": [end] * 4,
+        "period_instant": pd.NaT,
+        "acceptance_datetime": pd.to_datetime(["2024-11-01", "2024-11-01", "2025-02-01",
+                                               "2025-03-01"]),
+        "is_dimensioned": [False, False, False, True],
+    })
+    tensor, mask, _, _, _ = build_tensor(df)
+    # Latest undimensioned quarter figure: the restated 31.
+    assert tensor[0, 0, 0] == 31.0
+    assert mask.sum() == 1
+
+def filing_rows(accession, accepted, periods):
+    """10-Q/10-K shaped rows: (period_start, period_end, value) of revenue."""
+    return pd.DataFrame({
+        "cik": 1,
+        "accession_no": accession,
+        "fact_type": "revenue",
+        "value": [value for _, _, value in periods],
+        "period_start": pd.to_datetime([start for start, _, _ in periods]),
+        "period_end": pd.to_datetime([end for _, end, _ in periods]),
+        "period_instant": pd.NaT,
+        "acceptance_datetime": pd.Timestamp(accepted, tz="UTC"),
+        "is_dimensioned": False,
+    })
+
+@pytest.mark.parametrize("with_nine_months, fourth_quarter", [
+    (True, 40.0),
+    # Without the nine-month figure the fourth quarter stays empty.
+    (False, np.nan),
+])
+def test_annual_figure_fills_fourth_quarter_only_as_difference(
+        with_nine_months, fourth_quarter):
+    q3_periods = [("2023-07-03", "2023-10-01", 30.0)]
+    if with_nine_months:
+        q3_periods.append(("2023-01-02", "2023-10-01", 90.0))
+    df = pd.concat([
+        filing_rows("q3", "2023-11-01", q3_periods),
+        filing_rows("k", "2024-02-20", [("2023-01-02", "2023-12-31", 130.0)]),
+    ], ignore_index=True)
+    tensor, mask, _, quarters, _ = build_tensor(df)
+    revenue = tensor[0, :, FACT_TYPES.index("revenue")]
+    assert list(quarters) == ["2023Q3", "2023Q4"]
+    np.testing.assert_array_equal(revenue, [30.0, fourth_quarter])
+    assert mask.sum() == 1 + with_nine_months
+
+def test_export_tensor_streams_companies(tmp_path, facts):
+    for cik, company in facts.groupby("cik"):
+        company.to_parquet(tmp_path/f"{cik}.parquet")
+    shape = export_tensor(tmp_path, tmp_path/"tensor", dtype=np.float64, chunk_companies=3)
+    tensor, mask, ciks, quarters, fact_types = load_tensor(tmp_path/"tensor")
+    expected = build_tensor(facts)
+    assert shape == tensor.shape
+    np.testing.assert_array_equal(tensor, expected[0])
+    np.testing.assert_array_equal(mask, expected[1])
+    np.testing.assert_array_equal(ciks, expected[2])
+    np.testing.assert_array_equal(quarters, expected[3])
+    np.testing.assert_array_equal(fact_types, expected[4])
+
+def test_export_tensor_empty(tmp_path):
+    assert export_tensor(tmp_path, tmp_path/"tensor") == (0, 0, len(FACT_TYPES))
+
+def test_export_tensor_chunks_by_company(tmp_path):
+    end = pd.Timestamp("2024-09-30")
+
+    def revenue(value, accepted, accession):
+        return pd.DataFrame({
+            "cik": [1], "accession_no": [accession], "fact_type": ["revenue"],
+            "value": [value], "period_start": [pd.Timestamp("2024-07-01")],
+            "period_end": [end], "period_instant": [pd.NaT],
+            "acceptance_datetime": [pd.Timestamp(accepted, tz="UTC")],
+            "is_dimensioned": [False],
+        })
+    revenue(30.0, "2024-11-01", "a1").to_parquet(tmp_path/"1.parquet")
+    # A restatement the feed stored in its own file.
+    revenue(31.0, "2025-02-01", "a2").to_parquet(tmp_path/"1-a2.parquet")
+    export_tensor(tmp_path, tmp_path/"tensor", chunk_companies=1)
+    tensor, mask, ciks, _, _ = load_tensor(tmp_path/"tensor")
+    assert list(ciks) == [1]
+    assert tensor[0, 0, FACT_TYPES.index("revenue")] == 31.0
+    assert mask.sum() == 1
@@ -0,0 +1,176 @@
+import multiprocessing
+import time
+
+import pytest
+from edgar import httpclient
+
+import stock_lab.throttle
+from stock_lab.mock_edgar import MockEdgarServer, fixture_documents, serving
+from stock_lab.throttle import (
+    SharedRateLimiter, ThrottledError, backoff_delay, route_edgar_requests,
+    sec_get, sec_url
+)
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+class FakeClock():
+    """Deterministic clock whose sleep advances time."""
+
+    def __init__(self, start=1000.0):
+        self.now = start
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+class FakeResponse():
+
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+class FakeSession():
+
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.calls = 0
+
+    def get(self, url, headers=None, **kwargs):
+        self.calls += 1
+        return FakeResponse(self.statuses.pop(0))
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def limiter(tmp_path, clock):
+    return SharedRateLimiter(
+        tmp_path/"bucket.json", max_rate=4, burst=1, clock=clock, sleep=clock.sleep)
+
+def test_acquire_paces_to_rate(limiter, clock):
+    start = clock()
+    for _ in range(9):
+        limiter.acquire()
+    # One burst token, then 8 more at 4/s
+    assert clock() - start == pytest.approx(2.0)
+
+def test_state_shared_between_instances(tmp_path, clock):
+    first = SharedRateLimiter(
+        tmp_path/"bucket.json", max_rate=2, clock=clock, sleep=clock.sleep)
+    second = SharedRateLimiter(
+        tmp_path/"bucket.json", max_rate=2, clock=clock, sleep=clock.sleep)
+    first.acquire()
+    waited = second.acquire()
+    assert waited == pytest.approx(0.5)
+
+def test_throttle_cuts_rate_and_pauses(limiter, clock):
+    limiter.acquire()
+    limiter.record_throttle(retry_after=3)
+    state = limiter.state()
+    assert state["rate"] == pytest.approx(2.0)
+    assert state["ceiling"] == pytest.approx(3.8)
+    assert state["paused_until"] == pytest.approx(clock() + 3)
+    assert limiter.acquire() == pytest.approx(3.0)
+
+def test_success_recovers_up_to_learned_ceiling(limiter):
+    limiter.record_throttle()
+    for _ in range(100):
+        limiter.record_success()
+    state = limiter.state()
+    assert state["rate"] == pytest.approx(state["ceiling"])
+    assert state["rate"] < limiter.max_rate
+
+def test_rate_never_below_min(limiter):
+    for _ in range(20):
+        limiter.record_throttle()
+    assert limiter.state()["rate"] == pytest.approx(limiter.min_rate)
+
+@pytest.mark.parametrize("attempt, retry_after", [
+    (0, None),
+    (3, None),
+    (10, None),
+    (1, 7),
+])
+def test_backoff_delay_bounds(attempt, retry_after):
+    for _ in range(50):
+        delay = backoff_delay(attempt, base=0.5, cap=30, retry_after=retry_after)
+        assert delay <= max(min(30, 0.5 * 2 ** attempt), retry_after or 0)
+        assert delay >= (retry_after or 0)
+
+def test_sec_url(monkeypatch):
+    monkeypatch.delenv("EDGAR_BASE_URL", raising=False)
+    assert sec_url("/files/company_tickers.json") == \
+        "https://www.sec.gov/files/company_tickers.json"
+    monkeypatch.setenv("EDGAR_BASE_URL", "http://127.0.0.1:8000/")
+    assert sec_url("Archives/edgar") == "http://127.0.0.1:8000/Archives/edgar"
+    assert sec_url("https://data.sec.gov/x") == "https://data.sec.gov/x"
+
+def test_sec_get_retries_throttles(limiter, clock):
+    session = FakeSession([429, 503, 200])
+    response = sec_get("/x", limiter=limiter, session=session, sleep=clock.sleep)
+    assert response.status_code == 200
+    assert session.calls == 3
+    assert limiter.state()["rate"] < limiter.max_rate
+
+def test_sec_get_raises_when_exhausted(limiter, clock):
+    session = FakeSession([429] * 3)
+    with pytest.raises(ThrottledError):
+        sec_get("/x", limiter=limiter, session=session, max_retries=2,
+                sleep=clock.sleep)
+
+def test_edgar_requests_draw_from_shared_limiter(tmp_path, clock, monkeypatch):
+    manager = httpclient.HTTP_MGR
+    monkeypatch.setattr(manager, "rate_limiter", manager.rate_limiter)
+    monkeypatch.setattr(manager, "cache_mode", "Disabled")
+    monkeypatch.setenv("EDGAR_IDENTITY", "Stock Lab test@example.com")
+    seen = []
+    monkeypatch.setattr(stock_lab.throttle, "request_listeners", [seen.append])
+    limiter = SharedRateLimiter(tmp_path/"ratelimit.json", burst=10,
+                                clock=clock, sleep=clock.sleep)
+    route_edgar_requests(limiter)
+    route_edgar_requests(limiter)
+    try:
+        with serving(MockEdgarServer(fixture_documents())) as server:
+            with httpclient.http_client() as client:
+                response = client.get(f"{server.url}/files/company_tickers.json")
+    finally:
+        manager.close()
+    assert response.status_code == 200
+    assert seen == [None]
+    assert limiter.state()["tokens"] == 9
+
+# -----------------------------------------------------------------------------
+#                               Integration tests
+# -----------------------------------------------------------------------------
+
+def _acquire_n(state_path, n):
+    limiter = SharedRateLimiter(state_path, max_rate=20, burst=1)
+    for _ in range(n):
+        limiter.acquire()
+
+@pytest.mark.slow
+def test_budget_shared_across_processes(tmp_path):
+    state_path = tmp_path/"bucket.json"
+    workers = [
+        multiprocessing.get_context("spawn").Process(
+            target=_acquire_n, args=(state_path, 10))
+        for _ in range(3)
+    ]
+    start = time.time()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    # 30 tokens at 20/s with a burst of 1 cannot finish faster than ~1.45s
+    assert time.time() - start >= 1.4
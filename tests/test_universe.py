@@ -0,0 +1,110 @@
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_lab.universe import (
+    UniverseReader, VersionNotFound, attach_universe, current_version,
+    publish_universe
+)
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+@pytest.fixture
+def facts():
+    n = 1000
+    return pd.DataFrame({
+        "cik": np.repeat(np.arange(100, dtype="int64"), 10),
+        "accession_no": [f"0000000001-24-{i // 10:06d}" for i in range(n)],
+        "acceptance_datetime": pd.date_range("2024-01-01", periods=n, freq="h", tz="UTC"),
+        "fact_type": np.tile(["revenue", "eps"], n // 2),
+        "value": np.arange(n, dtype="float64"),
+        "period_end": pd.date_range("2020-01-01", periods=n, freq="D"),
+        "concept": [None if i % 7 == 0 else "us-gaap:Revenues" for i in range(n)],
+    })
+
+def test_publish_and_attach(tmp_path, facts):
+    version = publish_universe(facts, tmp_path)
+    universe = attach_universe(tmp_path)
+    assert universe.version == version == current_version(tmp_path)
+    assert len(universe) == len(facts)
+    df = universe.frame()
+    pd.testing.assert_series_equal(df["value"], facts["value"])
+    pd.testing.assert_series_equal(df["cik"], facts["cik"])
+    pd.testing.assert_series_equal(df["period_end"], facts["period_end"])
+    # tz-aware times are published as naive UTC
+    pd.testing.assert_series_equal(
+        df["acceptance_datetime"], facts["acceptance_datetime"].dt.tz_localize(None))
+    for column in ["accession_no", "fact_type", "concept"]:
+        assert df[column].dtype == "category"
+        # Missing categories come back as NaN; the fixture holds None.
+        published = df[column].astype(object).where(df[column].notna(), None)
+        pd.testing.assert_series_equal(published, facts[column],
+                                       check_dtype=False)
+
+def test_object_datetimes_published_as_utc(tmp_path):
+    accepted = [pd.Timestamp("2024-11-20T16:31:22-05:00"),
+                pd.Timestamp("2024-11-20T21:40:00Z"), None]
+    facts = pd.DataFrame({"acceptance_datetime": pd.Series(accepted, dtype=object),
+                          "form": pd.Series(["10-Q", "10-K", "10-Q"], dtype=object)})
+    publish_universe(facts, tmp_path)
+    df = attach_universe(tmp_path).frame()
+    assert df["acceptance_datetime"].dtype == "datetime64[ns]"
+    assert list(df["acceptance_datetime"][:2]) == [pd.Timestamp("2024-11-20T21:31:22"),
+                                                   pd.Timestamp("2024-11-20T21:40:00")]
+    assert pd.isna(df["acceptance_datetime"][2])
+    assert df["form"].dtype == "category"
+
+def test_frame_is_zero_copy_and_read_only(tmp_path, facts):
+    publish_universe(facts, tmp_path)
+    universe = attach_universe(tmp_path)
+    df = universe.frame(["value", "fact_type"])
+    assert not universe.arrays["value"].flags.writeable
+    assert np.shares_memory(df["value"].to_numpy(), universe.arrays["value"])
+    codes, _ = universe.arrays["fact_type"]
+    assert np.shares_memory(df["fact_type"].cat.codes.to_numpy(), codes)
+    with pytest.raises(ValueError):
+        df.iloc[0, 0] = -1.0
+
+def test_reader_swaps_in_new_version(tmp_path, facts):
+    publish_universe(facts, tmp_path)
+    reader = UniverseReader(tmp_path)
+    old = reader.current()
+    assert reader.current() is old
+    publish_universe(facts.assign(value=facts["value"] * 2), tmp_path)
+    new = reader.current()
+    assert new.version != old.version
+    assert new.arrays["value"][1] == 2.0
+    # A version attached before the swap stays readable.
+    assert old.arrays["value"][1] == 1.0
+
+def test_old_versions_pruned(tmp_path, facts):
+    versions = [publish_universe(facts, tmp_path, keep=2) for _ in range(4)]
+    kept = sorted(p.name for p in tmp_path.iterdir() if p.is_dir())
+    assert kept == versions[-2:]
+    attach_universe(tmp_path, versions[-2])
+    with pytest.raises(VersionNotFound):
+        attach_universe(tmp_path, versions[0])
+
+def test_attach_before_publish(tmp_path):
+    with pytest.raises(VersionNotFound):
+        attach_universe(tmp_path)
+
+def _sum_values(root, queue):
+    queue.put(float(attach_universe(root).arrays["value"].sum()))
+
+def test_workers_attach(tmp_path, facts):
+    publish_universe(facts, tmp_path)
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    workers = [context.Process(target=_sum_values, args=(str(tmp_path), queue))
+               for _ in range(3)]
+    for w in workers:
+        w.start()
+    totals = [queue.get(timeout=30) for _ in workers]
+    for w in workers:
+        w.join()
+    assert totals == [facts["value"].sum()] * 3
@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from stock_lab.workers import (
+    GovernedPool, SpillingCollector, MemoryLimitExceeded, WorkerCrashed,
+    current_rss
+)
+
+def double(x):
+    return x * 2
+
+def fail_on_three(x):
+    if x == 3:
+        raise ValueError("three")
+    return x
+
+def worker_pid(x):
+    return os.getpid()
+
+def hog_memory(x):
+    if x == "hog":
+        block = bytearray(512 * 1024 * 1024)
+        block[::4096] = b"x" * len(block[::4096])
+        time.sleep(2)
+    return x
+
+def large_result(x):
+    return b"x" * (16 * 1024 * 1024)
+
+def crash(x):
+    if x == "crash":
+        os._exit(3)
+    return x
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+def test_current_rss():
+    assert current_rss() > 1024 * 1024
+
+def test_pool_maps_all_items():
+    results = GovernedPool(double, workers=3).imap_unordered(range(20))
+    assert sorted(result for _, result, _ in results) == [x * 2 for x in range(20)]
+
+def test_pool_reports_task_errors():
+    results = list(GovernedPool(fail_on_three, workers=2).imap_unordered(range(5)))
+    errors = [(item, error) for item, _, error in results if error is not None]
+    assert len(results) == 5
+    assert [item for item, _ in errors] == [3]
+    assert isinstance(errors[0][1], ValueError)
+
+@pytest.mark.parametrize("pool_kwargs, min_pids", [
+    # Recycled after every 2 tasks
+    ({"max_tasks": 2}, 5),
+
+    # Recycled after every task because RSS is always over 1 byte
+    ({"recycle_rss": 1}, 10),
+])
+def test_pool_recycles_workers(pool_kwargs, min_pids):
+    pool = GovernedPool(worker_pid, workers=1, **pool_kwargs)
+    pids = {result for _, result, _ in pool.imap_unordered(range(10))}
+    assert len(pids) >= min_pids
+
+def test_pool_crashed_worker_is_replaced():
+    pool = GovernedPool(crash, workers=1)
+    results = {item: (result, error) for item, result, error in
+               pool.imap_unordered(["a", "crash", "b"])}
+    assert isinstance(results["crash"][1], WorkerCrashed)
+    assert results["a"] == ("a", None)
+    assert results["b"] == ("b", None)
+
+def test_pool_closed_early_does_not_hang():
+    pool = GovernedPool(large_result, workers=3)
+    results = pool.imap_unordered(range(6))
+    next(results)
+    # The other workers are blocked sending results nobody reads.
+    time.sleep(0.2)
+    closer = threading.Thread(target=results.close, daemon=True)
+    closer.start()
+    closer.join(30)
+    assert not closer.is_alive()
+
+@pytest.mark.slow
+def test_watchdog_kills_task_over_limit():
+    pool = GovernedPool(hog_memory, workers=1,
+                        task_rss_limit=current_rss() + 256 * 1024 * 1024,
+                        watchdog_interval=0.05)
+    results = {item: (result, error) for item, result, error in
+               pool.imap_unordered(["a", "hog", "b"])}
+    assert isinstance(results["hog"][1], MemoryLimitExceeded)
+    assert results["b"] == ("b", None)
+
+def test_spilling_collector(tmp_path):
+    collector = SpillingCollector(tmp_path, max_bytes=1)
+    for i in range(3):
+        collector.add(pd.DataFrame({"value": [i, i]}))
+    assert len(collector.parts) == 3
+    assert collector.frames == []
+    assert collector.rows == 6
+    assert collector.to_frame()["value"].tolist() == [0, 0, 1, 1, 2, 2]
+
+def test_spilling_collector_keeps_small_results_in_memory(tmp_path):
+    collector = SpillingCollector(tmp_path)
+    collector.add(pd.DataFrame({"value": [1]}))
+    assert collector.parts == []
+    assert collector.to_frame()["value"].tolist() == [1]
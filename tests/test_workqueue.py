@@ -0,0 +1,170 @@
+import multiprocessing
+
+import pandas as pd
+import pytest
+
+import main
+from stock_lab.workqueue import (
+    SQLiteWorkQueue, WorkQueue, LeaseLost, company_tasks, accession_tasks, run_worker,
+    PENDING, LEASED, DONE, FAILED
+)
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+class FakeClock():
+
+    def __init__(self, start=1000.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    q = SQLiteWorkQueue(tmp_path/"queue.sqlite", lease_seconds=60,
+                        max_attempts=2, clock=clock)
+    q.enqueue([("a", {"n": 1}), ("b", {"n": 2}), ("c", {"n": 3})])
+    yield q
+    q.close()
+
+def test_work_queue_is_abstract():
+    class Partial(WorkQueue):
+        def enqueue(self, tasks):
+            pass
+    with pytest.raises(TypeError):
+        Partial()
+
+def test_enqueue_ignores_existing(queue):
+    assert queue.enqueue([("a", {"n": 9}), ("d", {"n": 4})]) == 1
+    assert queue.counts()[PENDING] == 4
+
+def test_lease_hands_out_each_task_once(queue):
+    first = queue.lease("w1", n=2)
+    second = queue.lease("w2", n=2)
+    assert [t.task_id for t in first] == ["a", "b"]
+    assert [t.task_id for t in second] == ["c"]
+    assert first[0].payload == {"n": 1}
+    assert queue.lease("w3") == []
+
+def test_expired_lease_is_reclaimed(queue, clock):
+    task = queue.lease("w1")[0]
+    clock.now += 61
+    reclaimed = queue.lease("w2", n=3)
+    assert task.task_id in [t.task_id for t in reclaimed]
+    with pytest.raises(LeaseLost):
+        queue.complete(task.task_id, "w1")
+
+def test_renew_keeps_lease(queue, clock):
+    task = queue.lease("w1")[0]
+    clock.now += 50
+    queue.renew(task.task_id, "w1")
+    clock.now += 50
+    assert task.task_id not in [t.task_id for t in queue.lease("w2", n=3)]
+    queue.complete(task.task_id, "w1")
+    assert queue.counts()[DONE] == 1
+
+def test_fail_retries_until_max_attempts(queue):
+    task = queue.lease("w1")[0]
+    queue.fail(task.task_id, "w1", "boom")
+    assert queue.counts()[PENDING] == 3
+    retried = queue.lease("w1")[0]
+    assert retried.task_id == "b"
+    queue.complete("b", "w1")
+    retried = queue.lease("w1", n=2)
+    assert [t.task_id for t in retried] == ["c", "a"]
+    queue.fail("a", "w1", "boom again")
+    assert queue.failed() == [("a", 2, "boom again")]
+
+def test_crashed_worker_out_of_attempts_fails(queue, clock):
+    for _ in range(2):
+        queue.lease("w1", n=3)
+        clock.now += 61
+    queue.lease("w2")
+    counts = queue.counts()
+    assert counts[FAILED] == 3
+    assert counts[LEASED] == 0
+
+def test_company_tasks():
+    companies = pd.DataFrame({
+        "cik": [1045810, 1045810, 320193],
+        "ticker": ["NVDA", "NVDA2", "AAPL"],
+        "company": ["NVIDIA CORP", "NVIDIA CORP", "Apple Inc."],
+    })
+    assert list(company_tasks(companies)) == [
+        ("cik:1045810", {"cik": 1045810, "ticker": "NVDA", "company": "NVIDIA CORP"}),
+        ("cik:320193", {"cik": 320193, "ticker": "AAPL", "company": "Apple Inc."}),
+    ]
+
+@pytest.fixture
+def catalog_df():
+    return pd.DataFrame({
+        "cik": [1045810, 1045810],
+        "company": ["NVIDIA CORP", "NVIDIA CORP"],
+        "form": ["10-Q", "10-Q"],
+        "date_filed": pd.to_datetime(["2024-11-20", "2024-11-20"]),
+        "accession_no": ["0001045810-24-000316", "0001045810-24-000316"],
+        "filename": ["edgar/data/1045810/0001045810-24-000316.txt"] * 2,
+    })
+
+def test_accession_tasks(catalog_df):
+    assert list(accession_tasks(catalog_df)) == [
+        ("acc:0001045810-24-000316",
+         {"cik": 1045810, "company": "NVIDIA CORP", "form": "10-Q",
+          "date_filed": "2024-11-20", "accession_no": "0001045810-24-000316"}),
+    ]
+
+def test_run_task_dispatches_on_payload(catalog_df, tmp_path, monkeypatch):
+    stored, crawled = [], []
+    monkeypatch.setattr(main, "store_filing", lambda filing, out: stored.append(filing))
+    monkeypatch.setattr(main, "process_company", lambda cik, out: crawled.append(cik))
+    for _, payload in accession_tasks(catalog_df):
+        main.run_task(payload, tmp_path)
+    main.run_task({"cik": 320193, "ticker": "AAPL", "company": "Apple Inc."}, tmp_path)
+    assert [(f.cik, f.accession_no, f.form) for f in stored] == [
+        (1045810, "0001045810-24-000316", "10-Q")]
+    assert stored[0].acceptance_datetime == pd.Timestamp("2024-11-21 05:00", tz="UTC")
+    assert crawled == [320193]
+
+def test_run_worker_drains_queue(queue):
+    seen = []
+    def handler(payload):
+        if payload["n"] == 2:
+            raise ValueError("bad task")
+        seen.append(payload["n"])
+    assert run_worker(queue, handler, "w1", poll_interval=0) == 2
+    assert sorted(seen) == [1, 3]
+    assert queue.counts() == {PENDING: 0, LEASED: 0, DONE: 2, FAILED: 1}
+
+# -----------------------------------------------------------------------------
+#                               Integration tests
+# -----------------------------------------------------------------------------
+
+def _drain(path, results):
+    queue = SQLiteWorkQueue(path)
+    run_worker(queue, lambda payload: results.put(payload["n"]),
+               f"worker-{multiprocessing.current_process().pid}", poll_interval=0)
+
+@pytest.mark.slow
+def test_workers_in_processes_share_queue(tmp_path):
+    path = tmp_path/"queue.sqlite"
+    queue = SQLiteWorkQueue(path)
+    queue.enqueue((str(n), {"n": n}) for n in range(200))
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    workers = [
+        context.Process(target=_drain, args=(path, results))
+        for _ in range(4)
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    seen = sorted(results.get() for _ in range(200))
+    assert seen == list(range(200))
+    assert queue.counts()[DONE] == 200
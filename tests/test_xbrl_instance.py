@@ -0,0 +1,88 @@
+import io
+
+import pandas as pd
+import pytest
+from edgar.xbrl.xbrl import XBRL
+
+import stock_lab.utils
+import stock_lab.xbrl_instance
+from stock_lab.crawl import xbrl_facts_df, filing_facts_df
+from stock_lab.facts import FilingFacts
+from stock_lab.xbrl_instance import parse_instance, configured_concepts
+
+SAMPLE = stock_lab.utils.REPO_ROOT/"tests/data/xbrl/sample_instance.xml"
+COMPARED_COLUMNS = [
+    "concept", "value", "unit_ref", "decimals", "context_ref", "period_type",
+    "period_start", "period_end", "period_instant", "is_dimensioned",
+    "dim_us-gaap_StatementBusinessSegmentsAxis",
+]
+
+# -----------------------------------------------------------------------------
+#                                   Unit Tests
+# -----------------------------------------------------------------------------
+
+@pytest.fixture
+def sample_text():
+    return SAMPLE.read_text()
+
+@pytest.fixture
+def edgar_facts(sample_text):
+    xbrl = XBRL()
+    xbrl.parser.parse_instance_content(sample_text)
+    df = xbrl.facts.to_dataframe()
+    return df.loc[df["concept"].isin(configured_concepts())].reset_index(drop=True)
+
+def test_matches_edgartools_columns(sample_text, edgar_facts):
+    ours = parse_instance(sample_text)
+    pd.testing.assert_frame_equal(
+        ours[COMPARED_COLUMNS], edgar_facts[COMPARED_COLUMNS], check_dtype=False)
+
+def test_get_rows_matches_edgartools(sample_text, edgar_facts):
+    pd.testing.assert_frame_equal(
+        FilingFacts(parse_instance(sample_text)).get_rows()[["fact_type", "concept", "value"]],
+        FilingFacts(edgar_facts).get_rows()[["fact_type", "concept", "value"]],
+    )
+
+def test_keeps_only_requested_concepts(sample_text):
+    df = parse_instance(sample_text, concepts=["us-gaap:Revenues", "dei:DocumentType"])
+    assert set(df["concept"]) == {"us-gaap:Revenues", "dei:DocumentType"}
+    assert df.loc[df["concept"] == "dei:DocumentType", "numeric_value"].isna().all()
+
+def test_duplicate_taggings_dropped(sample_text):
+    df = parse_instance(sample_text)
+    assert (df["concept"] == "us-gaap:NetIncomeLoss").sum() == 1
+
+def test_dimensions_and_units(sample_text):
+    df = parse_instance(sample_text).set_index("context_ref")
+    assert df.loc["c-q3-compute", "is_dimensioned"]
+    assert df.loc["c-q3-compute", "dim_us-gaap_StatementBusinessSegmentsAxis"] == \
+        "nvda:ComputeAndNetworkingMember"
+    eps = df.loc[df["concept"] == "us-gaap:EarningsPerShareDiluted"].iloc[0]
+    assert eps["currency"] is None
+    assert df.loc["c-end", "currency"] == "USD"
+
+@pytest.mark.parametrize("chunk_bytes", [7, 1 << 16])
+def test_streams_file_objects_in_chunks(sample_text, monkeypatch, chunk_bytes):
+    monkeypatch.setattr(stock_lab.xbrl_instance, "CHUNK_BYTES", chunk_bytes)
+    pd.testing.assert_frame_equal(
+        parse_instance(io.BytesIO(SAMPLE.read_bytes())), parse_instance(sample_text))
+
+def test_no_matching_facts_has_schema(sample_text):
+    df = parse_instance(sample_text, concepts=["us-gaap:NotInFiling"])
+    assert df.empty
+    assert list(df.columns) == stock_lab.xbrl_instance.FACT_COLUMNS
+
+# -----------------------------------------------------------------------------
+#                               Integration tests
+# -----------------------------------------------------------------------------
+
+@pytest.mark.integration
+@pytest.mark.parametrize("path", sorted(
+    (stock_lab.utils.REPO_ROOT/"tests/data/nvda").glob("*.pkl")), ids=lambda p: p.stem)
+def test_nvda_get_rows_match_edgartools(path):
+    filing = stock_lab.utils.load_filing_from_file(path)
+    expected = FilingFacts(xbrl_facts_df(filing)).get_rows()
+    actual = FilingFacts(filing_facts_df(filing)).get_rows()
+    columns = ["fact_type", "concept", "value", "period_start", "period_end",
+               "period_instant", "period_type"]
+    pd.testing.assert_frame_equal(actual[columns], expected[columns])